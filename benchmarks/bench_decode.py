@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark upload preparation: ffmpeg subprocess round-trip vs in-process resampling.
+
+Generates a synthetic 44.1 kHz stereo recording, then times
+  1. the old path: ffmpeg converts to a 16 kHz mono WAV on disk, which is read back
+  2. the new path: soundfile decode + NumPy polyphase resample into an in-memory WAV
+
+Usage:
+    python benchmarks/bench_decode.py [--seconds 600] [--repeat 3]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from whisper_transcription_tool import audio
+
+
+def ffmpeg_round_trip(input_file: str, output_file: str) -> bytes:
+    """Convert with an ffmpeg subprocess to a temp file and read the result back."""
+    import ffmpeg
+    stream = ffmpeg.input(input_file)
+    stream = ffmpeg.output(stream, output_file, acodec="pcm_s16le", ac=1, ar=audio.WHISPER_RATE)
+    ffmpeg.run(stream, capture_stdout=True, capture_stderr=True, overwrite_output=True)
+    with open(output_file, "rb") as f:
+        return f.read()
+
+
+def in_process(input_file: str) -> bytes:
+    """Decode, downmix and resample in memory."""
+    return audio.prepare_upload(input_file).getvalue()
+
+
+def best_of(repeat: int, fn, *args) -> tuple:
+    """Return the fastest wall time over ``repeat`` runs and the last result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=int, default=600, help="Length of the synthetic recording")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per method (best time is reported)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.wav")
+        rng = np.random.default_rng(0)
+        t = np.arange(audio.RATE * args.seconds) / audio.RATE
+        tone = 0.3 * np.sin(2 * np.pi * 440 * t)
+        stereo = np.stack([tone, tone], axis=1) + 0.01 * rng.standard_normal((len(t), 2))
+        sf.write(source, stereo.astype(np.float32), audio.RATE, subtype="PCM_16")
+        source_mb = os.path.getsize(source) / (1024 * 1024)
+        print(f"Source: {args.seconds} s, 44.1 kHz stereo, {source_mb:.1f} MB")
+
+        new_time, new_bytes = best_of(args.repeat, in_process, source)
+        print(f"in-process resample : {new_time:8.3f} s  -> {len(new_bytes) / (1024 * 1024):.1f} MB")
+
+        if shutil.which("ffmpeg"):
+            target = os.path.join(tmp, "converted.wav")
+            old_time, old_bytes = best_of(args.repeat, ffmpeg_round_trip, source, target)
+            print(f"ffmpeg round-trip   : {old_time:8.3f} s  -> {len(old_bytes) / (1024 * 1024):.1f} MB")
+            print(f"speedup             : {old_time / new_time:8.2f}x")
+        else:
+            print("ffmpeg not found on PATH; skipping the subprocess baseline.")
+
+
+if __name__ == "__main__":
+    main()
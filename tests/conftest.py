@@ -0,0 +1,18 @@
+import pytest
+
+from whisper_transcription_tool import catalog, search
+
+
+@pytest.fixture(autouse=True)
+def isolated_catalog(tmp_path, monkeypatch):
+    """Point the catalog and search index at a fresh database so tests never touch data/."""
+    path = str(tmp_path / "catalog.db")
+    monkeypatch.setattr(catalog, "CATALOG_PATH", path)
+    monkeypatch.setattr(search, "INDEX_PATH", path)
+    for module in (catalog, search):
+        monkeypatch.setattr(module._local, "conn", None, raising=False)
+    yield
+    for module in (catalog, search):
+        conn = getattr(module._local, "conn", None)
+        if conn is not None:
+            conn.close()
@@ -0,0 +1,204 @@
+import threading
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from whisper_transcription_tool import audio
+
+RATE = 16000
+
+
+def tone(seconds: float, rate: int = RATE) -> np.ndarray:
+    t = np.arange(int(seconds * rate)) / rate
+    return (8000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+
+
+def silence(seconds: float, rate: int = RATE) -> np.ndarray:
+    return np.zeros(int(seconds * rate), dtype=np.int16)
+
+
+def assert_matches_map(samples, trimmed, offset_map):
+    assert len(trimmed) == sum(n for _, _, n in offset_map)
+    for t, o, n in offset_map:
+        np.testing.assert_array_equal(trimmed[t:t + n], samples[o:o + n])
+
+
+def test_trim_silence_cuts_long_inner_gap():
+    samples = np.concatenate([tone(1), silence(3), tone(1)])
+    trimmed, offset_map = audio.trim_silence(samples, RATE)
+
+    assert len(offset_map) == 2
+    assert len(trimmed) < len(samples)
+    assert_matches_map(samples, trimmed, offset_map)
+
+
+def test_trim_silence_cuts_trailing_silence():
+    samples = np.concatenate([tone(2), silence(5)])
+    trimmed, offset_map = audio.trim_silence(samples, RATE)
+
+    assert len(offset_map) == 1
+    assert offset_map[0][1] == 0
+    assert len(trimmed) < len(samples)
+    assert len(trimmed) <= 2 * RATE + RATE * audio.VAD_MAX_SILENCE_MS // 1000 + RATE
+    assert_matches_map(samples, trimmed, offset_map)
+
+
+def test_trim_silence_all_silent_input():
+    samples = silence(5)
+    trimmed, offset_map = audio.trim_silence(samples, RATE)
+
+    assert len(trimmed) == RATE * audio.VAD_MAX_SILENCE_MS // 1000
+    assert_matches_map(samples, trimmed, offset_map)
+
+
+def test_trim_silence_keeps_audio_without_long_gaps():
+    samples = np.concatenate([tone(0.5), silence(0.3), tone(0.5)])
+    trimmed, offset_map = audio.trim_silence(samples, RATE)
+
+    assert trimmed is samples
+    assert offset_map == [(0, 0, len(samples))]
+
+
+def test_map_to_original_inverts_trim():
+    samples = np.concatenate([tone(1), silence(3), tone(1), silence(4), tone(1)])
+    trimmed, offset_map = audio.trim_silence(samples, RATE)
+
+    starts = audio.offset_starts(offset_map)
+    for t, o, n in offset_map:
+        for position in (t, t + n // 2, t + n - 1):
+            assert audio.map_to_original(offset_map, position) == o + position - t
+            assert audio.map_to_original(offset_map, position, starts) == o + position - t
+
+
+def test_resample_poly_length_and_tone():
+    rate = 44100
+    t = np.arange(rate) / rate
+    signal = np.sin(2 * np.pi * 440 * t).astype(np.float32)
+    out = audio.resample_poly(signal, rate, RATE)
+
+    assert len(out) == RATE
+    expected = np.sin(2 * np.pi * 440 * np.arange(RATE) / RATE)
+    # Skip the filter's edge transients
+    np.testing.assert_allclose(out[500:-500], expected[500:-500], atol=2e-3)
+
+
+def test_resample_poly_removes_content_above_new_nyquist():
+    rate = 48000
+    t = np.arange(rate) / rate
+    out = audio.resample_poly(np.sin(2 * np.pi * 12000 * t), rate, RATE)
+
+    assert np.abs(out[500:-500]).max() < 1e-2
+
+
+def test_load_audio_resamples_and_downmixes(tmp_path):
+    path = tmp_path / "stereo.wav"
+    stereo = np.stack([tone(1, 44100), tone(1, 44100)], axis=1)
+    sf.write(path, stereo, 44100)
+
+    samples, rate = audio.load_audio(str(path))
+    assert rate == RATE
+    assert samples.dtype == np.int16
+    assert len(samples) == RATE
+
+    samples, rate = audio.load_audio(str(path), target_rate=None)
+    assert (len(samples), rate) == (44100, 44100)
+
+
+def test_load_audio_ffmpeg_fallback_keeps_file_rate(tmp_path, monkeypatch):
+    path = tmp_path / "speech.aac"
+    path.write_bytes(b"not something libsndfile can read")
+    decoded_at = []
+
+    def decode(file_path, rate):
+        decoded_at.append(rate)
+        return np.zeros(rate, dtype=np.int16)
+
+    monkeypatch.setattr(audio, "_ffmpeg_decode", decode)
+    monkeypatch.setattr(audio.ffmpeg, "probe", lambda *args, **kwargs: {"streams": [{"sample_rate": "22050"}]})
+
+    assert audio.load_audio(str(path), target_rate=None)[1] == 22050
+    assert audio.load_audio(str(path))[1] == RATE
+    assert decoded_at == [22050, RATE]
+
+
+def test_wav_stream_writer_header_tracks_data(tmp_path):
+    path = tmp_path / "rec.wav"
+    chunk = tone(0.5).tobytes()
+    writer = audio.WavStreamWriter(str(path), rate=RATE, header_interval=0)
+    writer.write(chunk)
+
+    # Playable before close: the header was patched after the write
+    info = sf.info(str(path))
+    assert (info.samplerate, info.channels, info.frames) == (RATE, 1, RATE // 2)
+
+    writer.write(chunk)
+    writer.close()
+    data, rate = sf.read(str(path), dtype="int16")
+    assert rate == RATE
+    assert writer.frames_written == len(data) == RATE
+    np.testing.assert_array_equal(data, np.concatenate([tone(0.5), tone(0.5)]))
+
+
+def test_wav_stream_writer_defers_header_patches(tmp_path):
+    path = tmp_path / "rec.wav"
+    with audio.WavStreamWriter(str(path), rate=RATE, header_interval=3600) as writer:
+        writer.write(tone(0.5).tobytes())
+        with open(path, "rb") as file:
+            assert file.read(44)[40:44] == b"\0\0\0\0"
+    assert sf.info(str(path)).frames == RATE // 2
+
+
+def test_ring_buffer_wraps_around():
+    ring = audio.RingBuffer(capacity_frames=8)
+    out = np.zeros(8, dtype=np.int16)
+
+    assert ring.write(np.arange(6, dtype=np.int16)) == 6
+    assert ring.read_into(out[:4]) == 4
+    np.testing.assert_array_equal(out[:4], [0, 1, 2, 3])
+
+    # Crosses the end of the backing array
+    assert ring.write(np.arange(6, 12, dtype=np.int16)) == 6
+    assert ring.available_frames == 8
+    assert ring.read_into(out) == 8
+    np.testing.assert_array_equal(out, np.arange(4, 12))
+
+
+def test_ring_buffer_drops_newest_when_full():
+    ring = audio.RingBuffer(capacity_frames=4, channels=2)
+
+    assert ring.write(np.arange(6, dtype=np.int16)) == 3
+    assert ring.write(np.arange(4, dtype=np.int16)) == 1
+    assert ring.dropped_frames == 1
+    assert ring.high_water_frames == 4
+
+    out = np.zeros(8, dtype=np.int16)
+    assert ring.read_into(out) == 8
+    np.testing.assert_array_equal(out, [0, 1, 2, 3, 4, 5, 0, 1])
+
+
+def test_ring_buffer_read_times_out_when_empty():
+    ring = audio.RingBuffer(capacity_frames=4)
+    assert ring.read_into(np.zeros(4, dtype=np.int16), timeout=0.01) == 0
+
+
+def test_recorder_device_failure_leaves_no_drain_thread(tmp_path, monkeypatch):
+    class NoDevice:
+        def get_sample_size(self, sample_format):
+            return 2
+
+        def open(self, **kwargs):
+            raise OSError("Invalid sample rate")
+
+    monkeypatch.setattr(audio.pyaudio, "PyAudio", NoDevice)
+    recorder = audio.AudioRecorder()
+    threads = threading.active_count()
+
+    with pytest.raises(OSError):
+        recorder.start_recording(str(tmp_path / "take.wav"))
+
+    assert not recorder.is_recording
+    assert recorder.thread is None
+    assert threading.active_count() == threads
+    assert recorder.stop_recording() is None
+    assert sf.info(str(tmp_path / "take.wav")).frames == 0
@@ -0,0 +1,56 @@
+import time
+
+from whisper_transcription_tool import cache
+
+
+def test_disk_cache_roundtrip_and_eviction(tmp_path):
+    disk = cache.DiskCache(str(tmp_path), max_bytes=300)
+    for i in range(5):
+        disk.put(f"k{i}", {"text": "x" * 80})
+        time.sleep(0.01)
+
+    assert disk.get("k4") == {"text": "x" * 80}
+    assert disk.get("k0") is None
+    assert disk.stats()["evictions"] > 0
+    assert disk.stats()["bytes"] <= 300
+
+
+def test_disk_cache_hit_counts_persist_across_runs(tmp_path):
+    first = cache.DiskCache(str(tmp_path), max_bytes=1 << 20)
+    first.put("key", {"text": "hello"})
+    first.get("key")
+    first.get("missing")
+    first.flush_stats()
+
+    second = cache.DiskCache(str(tmp_path), max_bytes=1 << 20)
+    second.get("key")
+    stats = second.stats()
+
+    assert (stats["hits"], stats["misses"]) == (1, 0)
+    assert (stats["total"]["hits"], stats["total"]["misses"]) == (2, 1)
+    assert stats["entries"] == 1
+
+
+def test_llm_cache_hit_counts_persist_across_runs(tmp_path):
+    key = cache.LLMCache.make_key("gpt", [{"role": "user", "content": "hi"}], temperature=0)
+    first = cache.LLMCache(str(tmp_path))
+    assert first.get(key) is None
+    first.put(key, {"answer": 42})
+    assert first.get(key) == {"answer": 42}
+    first.flush_stats()
+
+    second = cache.LLMCache(str(tmp_path))
+    assert second.get(key) == {"answer": 42}
+    total = second.stats()["total"]
+
+    assert (total["memory_hits"], total["disk_hits"], total["misses"]) == (1, 1, 1)
+    assert total["hit_ratio"] == 2 / 3
+
+
+def test_llm_cache_expires_entries(tmp_path):
+    llm = cache.LLMCache(str(tmp_path), ttl_seconds=0.05)
+    llm.put("key", "value")
+    time.sleep(0.1)
+
+    assert llm.get("key") is None
+    assert llm.stats()["expired"] == 1
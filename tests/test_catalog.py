@@ -0,0 +1,63 @@
+import os
+import threading
+
+from whisper_transcription_tool import catalog
+
+
+def make_kind(tmp_path, count):
+    directory = tmp_path / "notes"
+    directory.mkdir()
+    for i in range(count):
+        path = directory / f"note_{i}.txt"
+        path.write_text(str(i))
+        os.utime(path, (1000 + i, 1000 + i))
+    catalog.define_kind("note", str(directory), (".txt",))
+    return directory
+
+
+def test_get_artifact_matches_listing_order(tmp_path):
+    make_kind(tmp_path, 5)
+    names = [row["name"] for row in catalog.list_artifacts("note")]
+
+    assert names == [f"note_{i}.txt" for i in reversed(range(5))]
+    assert [catalog.get_artifact("note", i)["name"] for i in range(1, 6)] == names
+    assert catalog.get_artifact("note", 0) is None
+    assert catalog.get_artifact("note", 6) is None
+
+
+def test_get_artifact_sees_new_files(tmp_path):
+    directory = make_kind(tmp_path, 3)
+    assert catalog.get_artifact("note", 1)["name"] == "note_2.txt"
+
+    path = directory / "note_new.txt"
+    path.write_text("new")
+    os.utime(path, (2000, 2000))
+    catalog.register(str(path), "note")
+    assert catalog.get_artifact("note", 1)["name"] == "note_new.txt"
+    assert catalog.count_artifacts("note") == 4
+
+
+def test_get_artifact_sees_other_connections(tmp_path):
+    directory = make_kind(tmp_path, 3)
+    assert catalog.get_artifact("note", 1)["name"] == "note_2.txt"
+
+    thread = threading.Thread(target=catalog.unregister, args=(str(directory / "note_2.txt"),))
+    thread.start()
+    thread.join()
+    assert catalog.get_artifact("note", 1)["name"] == "note_1.txt"
+
+
+def test_stale_positions_are_read_with_one_query(tmp_path):
+    directory = make_kind(tmp_path, 3)
+    listed = [row["path"] for row in catalog.list_artifacts("note")]
+
+    path = directory / "note_new.txt"
+    path.write_text("new")
+    os.utime(path, (2000, 2000))
+    catalog.register(str(path), "note")
+
+    assert catalog.get_artifact("note", 1)["name"] == "note_new.txt"
+    assert catalog.get_artifact("note", 4)["name"] == "note_0.txt"
+    assert catalog.get_artifact("note", 5) is None
+    # The saved listing is left for the next list_artifacts call to replace
+    assert catalog._positions()["note"][1] == listed
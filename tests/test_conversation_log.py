@@ -0,0 +1,77 @@
+import os
+
+from whisper_transcription_tool import conversation_log
+from whisper_transcription_tool.conversation_log import ConversationLog
+
+
+def write_conversation(path, turns=3):
+    log = ConversationLog(str(path), header={"transcript_path": "t.txt"})
+    log.append_message({"role": "system", "content": "You help."})
+    for i in range(turns):
+        log.append_message({"role": "user", "content": f"question {i}"})
+        log.append_message({"role": "assistant", "content": f"answer {i}"})
+    log.append_summary("earlier talk", 2)
+    log.close()
+
+
+def contents(messages):
+    return [message["content"] for message in messages]
+
+
+def test_load_all_and_last_turns(tmp_path):
+    path = tmp_path / "chat.jsonl"
+    write_conversation(path)
+
+    loaded = conversation_log.load(str(path))
+    assert loaded["header"]["transcript_path"] == "t.txt"
+    assert len(loaded["messages"]) == 7
+    assert (loaded["summary"], loaded["summarized"], loaded["skipped"]) == (
+        "earlier talk",
+        2,
+        0,
+    )
+
+    loaded = conversation_log.load(str(path), last_turns=1)
+    assert contents(loaded["messages"]) == ["You help.", "question 2", "answer 2"]
+    assert loaded["skipped"] == 4
+    assert conversation_log.message_count(str(path)) == 7
+
+
+def test_missing_sidecar_is_rebuilt(tmp_path):
+    path = tmp_path / "chat.jsonl"
+    write_conversation(path)
+    os.remove(conversation_log.index_path(str(path)))
+
+    assert conversation_log.message_count(str(path)) == 7
+    assert os.path.exists(conversation_log.index_path(str(path)))
+    assert len(conversation_log.load(str(path))["messages"]) == 7
+
+
+def test_sidecar_behind_the_log_is_caught_up(tmp_path):
+    path = tmp_path / "chat.jsonl"
+    write_conversation(path)
+    sidecar = conversation_log.index_path(str(path))
+    # As if the process died between the log write and the sidecar write
+    os.truncate(sidecar, os.path.getsize(sidecar) - conversation_log._ENTRY.size)
+
+    assert (
+        contents(conversation_log.load(str(path), last_turns=1)["messages"])[-1]
+        == "answer 2"
+    )
+    assert conversation_log.load(str(path))["summary"] == "earlier talk"
+
+
+def test_torn_tail_is_dropped_and_cut_before_appending(tmp_path):
+    path = tmp_path / "chat.jsonl"
+    write_conversation(path)
+    with open(path, "ab") as file:
+        file.write(b'{"type": "message", "role": "user", "cont')
+
+    assert len(conversation_log.load(str(path))["messages"]) == 7
+
+    log = ConversationLog(str(path))
+    log.append_message({"role": "user", "content": "after the crash"})
+    log.close()
+    loaded = conversation_log.load(str(path))
+    assert contents(loaded["messages"])[-1] == "after the crash"
+    assert len(loaded["messages"]) == 8
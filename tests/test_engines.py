@@ -0,0 +1,32 @@
+import numpy as np
+import soundfile as sf
+
+from whisper_transcription_tool import client, engines, transcription
+
+
+def test_openai_engine_cache_params_include_model():
+    assert engines.OpenAIEngine("whisper-1").cache_params() == {"model": "whisper-1"}
+    assert engines.OpenAIEngine("gpt-4o-transcribe").cache_params() != \
+        engines.OpenAIEngine("whisper-1").cache_params()
+
+
+def test_transcribe_audio_uses_requested_model(tmp_path, monkeypatch):
+    path = tmp_path / "speech.wav"
+    sf.write(path, np.zeros(16000, dtype=np.int16), 16000)
+    sent = []
+
+    def transcribe(hedge=None, **kwargs):
+        sent.append(kwargs["model"])
+        return "hello"
+
+    monkeypatch.setattr(client, "transcribe", transcribe)
+    result = transcription.transcribe_audio(str(path), model="gpt-4o-transcribe", engine="openai",
+                                            use_cache=False, transcript_path=str(tmp_path / "out.txt"))
+
+    assert sent == ["gpt-4o-transcribe"]
+    assert result["model_used"] == "gpt-4o-transcribe"
+
+
+def test_local_engines_ignore_api_model():
+    transcriber = transcription._get_transcriber("stub", "gpt-4o-transcribe")
+    assert transcriber is engines.get_engine("stub")
@@ -0,0 +1,84 @@
+import threading
+import time
+
+from whisper_transcription_tool.hedging import HedgePolicy
+from whisper_transcription_tool.scheduler import RequestScheduler
+
+
+def warmed_policy(**settings):
+    policy = HedgePolicy("test", enabled=True, budget=1.0, min_samples=5, min_delay=0.01, **settings)
+    for _ in range(5):
+        policy.record(0.01)
+    return policy
+
+
+def slow_first_call(delays):
+    calls = []
+    lock = threading.Lock()
+
+    def fn():
+        with lock:
+            index = len(calls)
+            calls.append(index)
+        time.sleep(delays[min(index, len(delays) - 1)])
+        return index
+    return fn, calls
+
+
+def test_hedge_takes_its_own_scheduler_slot():
+    scheduler = RequestScheduler("test", max_concurrency=2, min_concurrency=2)
+    policy = warmed_policy()
+    fn, calls = slow_first_call([0.3, 0.01])
+    seen = []
+
+    def wrapped():
+        seen.append(scheduler.in_flight)
+        return fn()
+
+    result = scheduler.call(policy.run, wrapped, scheduler=scheduler)
+
+    assert result == 1
+    assert seen == [1, 2]
+    assert policy.stats()["hedges_won"] == 1
+    assert policy.stats()["hedges_abandoned"] == 1
+    # The abandoned primary keeps the hedge's slot until it finishes
+    assert scheduler.in_flight == 1
+    time.sleep(0.4)
+    assert scheduler.in_flight == 0
+
+
+def test_no_hedge_without_a_free_slot():
+    scheduler = RequestScheduler("test", max_concurrency=1, min_concurrency=1)
+    policy = warmed_policy()
+    fn, calls = slow_first_call([0.1])
+
+    assert scheduler.call(policy.run, fn, scheduler=scheduler) == 0
+    assert calls == [0]
+    assert policy.stats()["hedges_fired"] == 0
+    assert scheduler.in_flight == 0
+
+
+def test_no_hedge_without_rate_budget():
+    scheduler = RequestScheduler("test", requests_per_minute=1, max_concurrency=4)
+    policy = warmed_policy()
+    fn, calls = slow_first_call([0.1])
+
+    assert scheduler.call(policy.run, fn, scheduler=scheduler) == 0
+    assert calls == [0]
+    assert scheduler.in_flight == 0
+
+
+def test_budget_caps_hedges_at_its_fraction_of_requests():
+    policy = HedgePolicy("test", enabled=True, budget=0.1, percentile=0.0, min_samples=5, min_delay=0.005)
+    for _ in range(5):
+        policy.record(0.001)
+    fn, calls = slow_first_call([0.015])
+
+    for _ in range(100):
+        policy.run(fn)
+
+    stats = policy.stats()
+    assert stats["hedges_fired"] == 10
+    assert stats["hedge_rate"] == 0.1
+    # The losers are still reported, but don't eat into the budget
+    assert stats["hedges_abandoned"] == 10
@@ -0,0 +1,113 @@
+import base64
+import io
+import os
+from types import SimpleNamespace
+
+from PIL import Image
+
+from whisper_transcription_tool import catalog, image_gen
+
+
+def png_bytes(size=(8, 8)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def b64_image(data):
+    return SimpleNamespace(b64_json=base64.b64encode(data).decode("ascii"), url=None)
+
+
+def test_b64_image_is_written_as_is_and_registered(tmp_path, monkeypatch):
+    _, extensions, order = catalog._kinds["image"]
+    monkeypatch.setitem(catalog._kinds, "image", (str(tmp_path), extensions, order))
+    data = png_bytes()
+    filepath = str(tmp_path / "out.png")
+
+    assert image_gen.save_image(b64_image(data), filepath, validate=False)
+    with open(filepath, "rb") as file:
+        assert file.read() == data
+    assert not os.path.exists(filepath + ".part")
+    assert catalog.get_artifact("image", 1)["path"] == os.path.abspath(filepath)
+
+
+def test_b64_image_is_converted_to_the_extension_format(tmp_path):
+    filepath = str(tmp_path / "out.jpg")
+
+    assert image_gen.save_image(b64_image(png_bytes()), filepath, validate=False)
+    with Image.open(filepath) as image:
+        assert image.format == "JPEG"
+    assert not os.path.exists(filepath + ".part")
+
+
+def test_truncated_b64_image_fails_validation(tmp_path):
+    filepath = str(tmp_path / "out.png")
+    data = png_bytes((64, 64))
+
+    assert not image_gen.write_image(
+        base64.b64encode(data[: len(data) // 2]).decode(), filepath, validate=True
+    )
+    assert not os.path.exists(filepath)
+    assert not os.path.exists(filepath + ".part")
+
+
+def test_url_image_is_streamed_to_disk(tmp_path, monkeypatch):
+    data = png_bytes()
+
+    class Response:
+        headers = {"content-length": str(len(data))}
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def raise_for_status(self):
+            pass
+
+        def iter_content(self, block_size):
+            return (data[i : i + 10] for i in range(0, len(data), 10))
+
+    requests_made = []
+
+    def get(url, stream, timeout):
+        requests_made.append(timeout)
+        return Response()
+
+    monkeypatch.setattr(image_gen.requests, "get", get)
+    filepath = str(tmp_path / "out.png")
+
+    assert image_gen.save_image(
+        SimpleNamespace(b64_json=None, url="https://example.test/x.png"), filepath
+    )
+    with open(filepath, "rb") as file:
+        assert file.read() == data
+    assert requests_made == [image_gen.DOWNLOAD_TIMEOUT]
+
+
+def test_stalled_download_leaves_no_partial_file(tmp_path, monkeypatch):
+    class Stalled:
+        headers = {}
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def raise_for_status(self):
+            pass
+
+        def iter_content(self, block_size):
+            yield png_bytes()[:10]
+            raise image_gen.requests.exceptions.ReadTimeout("read timed out")
+
+    monkeypatch.setattr(
+        image_gen.requests, "get", lambda url, stream, timeout: Stalled()
+    )
+    filepath = str(tmp_path / "out.png")
+
+    assert not image_gen.download_image("https://example.test/x.png", filepath)
+    assert not os.path.exists(filepath)
+    assert not os.path.exists(filepath + ".part")
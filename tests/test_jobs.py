@@ -0,0 +1,71 @@
+import socket
+import time
+
+import pytest
+
+from whisper_transcription_tool import jobs
+
+
+@pytest.fixture(autouse=True)
+def job_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOBS_PATH", str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(jobs._local, "conn", None, raising=False)
+    yield
+    if jobs._local.conn is not None:
+        jobs._local.conn.close()
+
+
+def set_running(job_id, owner, updated):
+    jobs._connect().execute("UPDATE jobs SET status = 'running', owner = ?, updated = ? WHERE id = ?",
+                            (owner, updated, job_id))
+
+
+def status(job_id):
+    return jobs._connect().execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+
+
+def test_enqueue_reuses_queued_stages():
+    first = jobs.enqueue_pipeline("a.wav", ["summary", {"task": "translate", "target_language": "French"}])
+    again = jobs.enqueue_pipeline("a.wav", ["summary"])
+
+    assert len(first) == 3
+    assert again == first[:2]
+
+
+def test_process_job_waits_for_its_transcription():
+    transcribe_id, process_id = jobs.enqueue_pipeline("a.wav", ["summary"])
+
+    job = jobs._claim()
+    assert job["id"] == transcribe_id
+    assert jobs._claim() is None
+
+    jobs._complete(job, "a.txt")
+    job = jobs._claim()
+    assert (job["id"], job["parent_output"]) == (process_id, "a.txt")
+
+
+def test_recover_returns_orphaned_jobs_to_pending():
+    dead, stale, live, own = (jobs.enqueue_pipeline(f"{name}.wav")[0] for name in ("dead", "stale", "live", "own"))
+    now = time.time()
+    host = socket.gethostname()
+    # No process has this pid: pids are capped well below it
+    set_running(dead, f"{host}:99999999", now)
+    set_running(stale, "elsewhere:1", now - jobs.LEASE_SECONDS - 1)
+    set_running(live, "elsewhere:1", now)
+    set_running(own, jobs._OWNER, now - jobs.LEASE_SECONDS - 1)
+
+    assert jobs.recover() == 2
+    assert [status(job_id) for job_id in (dead, stale, live, own)] == ["pending", "pending", "running", "running"]
+
+
+def test_failed_job_is_retried_then_fails_its_descendants():
+    transcribe_id, process_id = jobs.enqueue_pipeline("a.wav", ["summary"])
+
+    for attempt in range(1, jobs.MAX_ATTEMPTS + 1):
+        job = jobs._claim()
+        assert (job["id"], job["attempts"]) == (transcribe_id, attempt)
+        jobs._fail(job, "boom")
+
+    assert status(transcribe_id) == "failed"
+    assert status(process_id) == "failed"
+    assert jobs._claim() is None
@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+import pytest
+
+from whisper_transcription_tool import scheduler
+from whisper_transcription_tool.scheduler import RequestScheduler, TokenBucket, parse_duration
+
+
+@pytest.mark.parametrize("value, seconds", [
+    ("20ms", 0.02), ("1s", 1.0), ("6m0s", 360.0), ("1h2m3.5s", 3723.5), ("2.5", 2.5),
+    (None, None), ("", None), ("soon", None),
+])
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == seconds
+
+
+def test_token_bucket_queues_callers_in_debt():
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.reserve(60) == 0.0
+    # Empty at one token a second: the next reservation waits for it
+    assert bucket.reserve(1) == pytest.approx(1.0, abs=0.05)
+    assert bucket.reserve(1) == pytest.approx(2.0, abs=0.05)
+    bucket.adjust(2)
+    assert bucket.reserve(1) == pytest.approx(1.0, abs=0.05)
+
+
+def test_token_bucket_without_rate_never_delays():
+    bucket = TokenBucket(per_minute=0)
+    assert bucket.reserve(10 ** 9) == 0.0
+
+
+def test_token_bucket_syncs_with_headers():
+    bucket = TokenBucket(per_minute=60)
+    bucket.sync(limit=600, remaining=0)
+    assert bucket.rate == 10.0
+    assert bucket.reserve(1) == pytest.approx(0.1, abs=0.01)
+
+
+class StatusError(Exception):
+    """Carries the attributes the scheduler reads from openai.APIStatusError."""
+
+    def __init__(self, status_code, headers=None, code=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.code = code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+def test_retry_uses_rate_limit_hints(monkeypatch):
+    monkeypatch.setattr(scheduler.random, "uniform", lambda low, high: 0.0)
+    limiter = RequestScheduler("test", max_concurrency=4)
+    error = StatusError(429, {"retry-after-ms": "1500", "x-ratelimit-reset-requests": "2s"})
+
+    assert limiter._on_error(error, 0) == 2.0
+    assert limiter.throttled == 1
+    assert limiter.limit < 2.0
+
+
+def test_no_retry_for_exhausted_quota_or_client_errors():
+    limiter = RequestScheduler("test")
+    quota = StatusError(429, code="insufficient_quota")
+
+    assert limiter._on_error(quota, 0) is None
+    assert limiter._on_error(StatusError(400), 0) is None
+    assert limiter.failures == 2
+
+
+def test_call_retries_transient_errors(monkeypatch):
+    monkeypatch.setattr(scheduler, "BASE_DELAY", 0.001)
+    limiter = RequestScheduler("test")
+    outcomes = [StatusError(503), StatusError(500), "ok"]
+
+    def fn():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert limiter.call(fn) == "ok"
+    assert (limiter.retries, limiter.successes) == (2, 1)
@@ -0,0 +1,83 @@
+import os
+
+from whisper_transcription_tool import catalog, search
+
+
+def make_notes(tmp_path):
+    directory = tmp_path / "notes"
+    directory.mkdir()
+    catalog.define_kind("note", str(directory), (".txt",))
+    return directory
+
+
+def paths(results):
+    return [os.path.basename(result["path"]) for result in results]
+
+
+def test_build_query_quotes_words_and_phrases():
+    assert search.build_query('budget "next quarter" (draft)') == '"budget" AND "next quarter" AND "draft"'
+    assert search.build_query("?!") is None
+
+
+def test_indexed_file_is_found_with_highlighted_snippet(tmp_path):
+    directory = make_notes(tmp_path)
+    path = directory / "meeting.txt"
+    path.write_text("We agreed to raise the marketing budget next quarter.")
+    catalog.register(str(path), "note")
+    search.index_file(str(path), "note")
+
+    results = search.search("budget", kinds=["note"])
+    assert paths(results) == ["meeting.txt"]
+    assert f"{search.HIGHLIGHT_START}budget{search.HIGHLIGHT_END}" in results[0]["snippet"]
+    assert paths(search.search('"quarter next"', kinds=["note"])) == []
+
+
+def test_sync_follows_files_added_and_deleted_behind_our_back(tmp_path):
+    directory = make_notes(tmp_path)
+    (directory / "a.txt").write_text("apples and pears")
+    (directory / "b.txt").write_text("bananas")
+
+    assert paths(search.search("apples", kinds=["note"])) == ["a.txt"]
+
+    # Deleted and copied in without going through the index
+    os.remove(directory / "b.txt")
+    (directory / "c.txt").write_text("more apples")
+
+    assert sorted(paths(search.search("apples", kinds=["note"]))) == ["a.txt", "c.txt"]
+    assert search.search("bananas", kinds=["note"]) == []
+
+
+def test_reindexing_a_saved_file_replaces_its_text(tmp_path):
+    directory = make_notes(tmp_path)
+    path = directory / "a.txt"
+    path.write_text("apples")
+    search.index_file(str(path), "note")
+    path.write_text("cherries")
+    search.index_file(str(path), "note")
+
+    assert search.search("apples", kinds=["note"]) == []
+    assert paths(search.search("cherries", kinds=["note"])) == ["a.txt"]
+
+
+def test_rebuild_reindexes_everything(tmp_path):
+    directory = make_notes(tmp_path)
+    for name in ("a", "b"):
+        (directory / f"{name}.txt").write_text(f"text {name}")
+
+    assert search.rebuild(["note"]) == 2
+    assert sorted(paths(search.search("text", kinds=["note"]))) == ["a.txt", "b.txt"]
+
+
+def test_search_chunks_only_returns_the_given_files(tmp_path):
+    files = []
+    for name, text in [("a.txt", "the launch date moved"), ("b.txt", "launch budget approved"),
+                       ("c.txt", "launch party planned")]:
+        path = tmp_path / name
+        path.write_text(text)
+        files.append(str(path))
+    search.index_chunks(files)
+
+    results = search.search_chunks("launch budget", files[:2])
+    assert sorted(paths(results)) == ["a.txt", "b.txt"]
+    assert paths(results)[0] == "b.txt"
+    assert search.search_chunks("launch", []) == []
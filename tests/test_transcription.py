@@ -0,0 +1,95 @@
+import asyncio
+import os
+import threading
+from io import BytesIO
+
+import numpy as np
+import soundfile as sf
+
+from whisper_transcription_tool import client, transcription
+
+RATE = 16000
+
+
+def speech_with_gaps(seconds: int) -> np.ndarray:
+    """One second of tone, then three of silence, repeated."""
+    t = np.arange(RATE) / RATE
+    tone = (8000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+    block = np.concatenate([tone, np.zeros(3 * RATE, dtype=np.int16)])
+    return np.tile(block, seconds // 4)
+
+
+def test_needs_chunking_measures_prepared_upload(monkeypatch):
+    monkeypatch.setattr(transcription, "MAX_UPLOAD_BYTES", 100)
+    small, large = BytesIO(b"x" * 100), BytesIO(b"x" * 101)
+    large.seek(10)
+
+    assert not transcription._needs_chunking(small)
+    assert transcription._needs_chunking(large)
+    assert large.tell() == 10
+
+
+def test_trimmed_upload_over_limit_is_chunked(tmp_path, monkeypatch):
+    path = tmp_path / "long.wav"
+    sf.write(path, speech_with_gaps(40), RATE)
+    uploads = []
+
+    def transcribe(hedge=None, **kwargs):
+        uploads.append(kwargs["file"])
+        return "words"
+
+    monkeypatch.setattr(client, "transcribe", transcribe)
+    monkeypatch.setattr(transcription, "MAX_UPLOAD_BYTES", 64 * 1024)
+    result = transcription.transcribe_audio(str(path), trim_silence=True, codec="wav", engine="openai",
+                                            use_cache=False, transcript_path=str(tmp_path / "out.txt"))
+
+    assert "segments" in result
+    assert result["offset_map"]
+    assert result["segments"][-1]["end"] <= 40
+    assert uploads
+
+
+def test_same_stem_inputs_get_their_own_batch_transcripts(tmp_path, monkeypatch):
+    for name in ("a/talk.wav", "b/talk.wav", "a/talk.mp3"):
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_bytes(b"")
+    paths = [str(tmp_path / name) for name in ("a/talk.wav", "b/talk.wav", "a/talk.mp3")]
+    assert len({transcription.batch_transcript_path(p) for p in paths}) == 3
+    assert transcription.batch_transcript_path(paths[0]) == transcription.batch_transcript_path(
+        os.path.join(str(tmp_path), "b", "..", "a", "talk.wav"))
+
+    monkeypatch.setattr(transcription, "TRANSCRIPTS_DIR", str(tmp_path / "out"))
+    monkeypatch.setattr(transcription.audio, "get_duration", lambda path: 1.0)
+
+    def transcribe(path, transcript_path=None, **kwargs):
+        os.makedirs(os.path.dirname(transcript_path), exist_ok=True)
+        with open(transcript_path, "w") as file:
+            file.write(path)
+        return {"text": path}
+
+    monkeypatch.setattr(transcription, "transcribe_audio", transcribe)
+    assert transcription.transcribe_directory(str(tmp_path / "a"))["transcribed"] == 2
+    summary = transcription.transcribe_directory(str(tmp_path / "b"))
+    assert summary["transcribed"] == 1
+    assert len(os.listdir(tmp_path / "out")) == 3
+
+
+def test_async_transcription_saves_off_the_event_loop(tmp_path, monkeypatch):
+    path = tmp_path / "speech.wav"
+    sf.write(path, np.zeros(RATE, dtype=np.int16), RATE)
+    save_threads = []
+
+    async def transcribe_async(hedge=None, **kwargs):
+        return "words"
+
+    def save_transcript(text, transcript_path=None, source_path=None):
+        save_threads.append(threading.current_thread())
+        return transcript_path
+
+    monkeypatch.setattr(client, "transcribe_async", transcribe_async)
+    monkeypatch.setattr(transcription, "save_transcript", save_transcript)
+    result = asyncio.run(transcription.transcribe_audio_async(
+        str(path), engine="openai", use_cache=False, transcript_path=str(tmp_path / "out.txt")))
+
+    assert result["text"] == "words"
+    assert save_threads and save_threads[0] is not threading.main_thread()
@@ -1,59 +1,329 @@
 import os
+import math
 import wave
+import bisect
+import struct
+import tempfile
 import threading
 import pyaudio
 import numpy as np
 import soundfile as sf
 import sounddevice as sd
 import ffmpeg
+from io import BytesIO
 from pathlib import Path
-from typing import Optional, List, Tuple, Dict, Any
+from typing import Optional, List, Tuple, Dict, Any, BinaryIO, Union
 from datetime import datetime
 import time
+from whisper_transcription_tool import catalog
+from whisper_transcription_tool.errors import AudioError
 
 # Audio recording parameters
 FORMAT = pyaudio.paInt16
 CHANNELS = 1
 RATE = 44100
+WHISPER_RATE = 16000  # Whisper's native rate; capturing or uploading more is wasted bandwidth
 CHUNK = 1024
-TEMP_AUDIO_FILE = "temp_recording.wav"
+HEADER_PATCH_INTERVAL = 5.0  # Seconds between WAV header rewrites while recording
+RING_BUFFER_SECONDS = 10  # Capture headroom before the callback starts dropping audio
 RECORDINGS_DIR = "data/recordings"
+SPOOL_MAX_BYTES = 32 * 1024 * 1024  # Converted audio stays in memory below this size
+PIPE_BLOCK_BYTES = 1024 * 1024
+
+# Voice activity detection parameters
+VAD_FRAME_MS = 30
+VAD_HANGOVER_MS = 150  # Speech padding so word onsets/endings survive trimming
+VAD_MARGIN_DB = 10.0  # Energy above the noise floor that counts as speech
+VAD_MIN_THRESHOLD_DB = -50.0
+VAD_ZCR_THRESHOLD = 0.25
+VAD_MAX_SILENCE_MS = 500
+
+# Polyphase resampler parameters
+RESAMPLE_HALF_TAPS = 16  # Filter half-length in units of the slower rate's samples
+RESAMPLE_KAISER_BETA = 8.0
+RESAMPLE_BLOCK = 1 << 22  # Input window elements materialized per matrix product
 
 # Create necessary directories if they don't exist
 os.makedirs(RECORDINGS_DIR, exist_ok=True)
+catalog.define_kind("recording", RECORDINGS_DIR, (".wav", ".mp3", ".m4a"))
+
+class WavStreamWriter:
+    """
+    Write PCM audio to a WAV file incrementally.
+    
+    Chunks go straight to disk as they arrive, so memory use stays flat no
+    matter how long the recording runs. The RIFF and data chunk sizes in the
+    header are rewritten every ``header_interval`` seconds, which keeps the
+    file playable up to the last patch if the process dies mid-recording.
+    
+    The target may also be an already-open seekable binary file (e.g. a spooled
+    temp file); it is then left open on ``close`` and is not fsynced.
+    """
+    
+    HEADER_SIZE = 44
+    
+    def __init__(self, target: Union[str, BinaryIO], channels: int = CHANNELS, sample_width: int = 2,
+                 rate: int = RATE, header_interval: float = HEADER_PATCH_INTERVAL) -> None:
+        """
+        Open the output file and write a provisional header.
+        
+        Args:
+            target: Path of the WAV file to create, or a seekable binary file object
+            channels: Number of interleaved channels
+            sample_width: Bytes per sample (2 for 16-bit PCM)
+            rate: Sample rate in Hz
+            header_interval: Seconds between header patches (0 patches on every write)
+        """
+        self._owns_file = isinstance(target, str)
+        self.filepath = target if self._owns_file else getattr(target, "name", None)
+        self.channels = channels
+        self.sample_width = sample_width
+        self.rate = rate
+        self.header_interval = header_interval
+        self.data_bytes = 0
+        self._file = open(target, "wb") if self._owns_file else target
+        self._closed = False
+        self._last_patch = time.monotonic()
+        self._file.write(self._build_header())
+    
+    def _build_header(self) -> bytes:
+        """Build a canonical 44-byte PCM WAV header for the data written so far."""
+        block_align = self.channels * self.sample_width
+        return struct.pack(
+            "<4sI4s4sIHHIIHH4sI",
+            b"RIFF", 36 + self.data_bytes, b"WAVE",
+            b"fmt ", 16, 1, self.channels, self.rate,
+            self.rate * block_align, block_align, self.sample_width * 8,
+            b"data", self.data_bytes
+        )
+    
+    @property
+    def frames_written(self) -> int:
+        """Number of sample frames written so far."""
+        return self.data_bytes // (self.channels * self.sample_width)
+    
+    def write(self, data: bytes) -> None:
+        """
+        Append raw PCM data to the file.
+        
+        Args:
+            data: Interleaved PCM bytes (or any bytes-like buffer) matching the writer's format
+        """
+        self._file.write(data)
+        self.data_bytes += memoryview(data).nbytes
+        if time.monotonic() - self._last_patch >= self.header_interval:
+            self.patch_header()
+    
+    def patch_header(self) -> None:
+        """Rewrite the header with the current sizes and flush everything to disk."""
+        position = self._file.tell()
+        self._file.seek(0)
+        self._file.write(self._build_header())
+        self._file.seek(position)
+        self._file.flush()
+        if self._owns_file:
+            os.fsync(self._file.fileno())
+        self._last_patch = time.monotonic()
+    
+    def close(self) -> None:
+        """Finalize the header and close the file (caller-provided files stay open)."""
+        if self._closed:
+            return
+        self.patch_header()
+        self._closed = True
+        if self._owns_file:
+            self._file.close()
+    
+    def __enter__(self) -> "WavStreamWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class RingBuffer:
+    """
+    Preallocated single-producer/single-consumer buffer of PCM samples.
+    
+    The capture callback writes into a fixed NumPy array and a consumer thread
+    drains it, so no per-chunk objects are allocated on the audio thread. When
+    the consumer falls behind and the buffer is full, the newest samples are
+    dropped and counted rather than blocking the callback.
+    """
+    
+    def __init__(self, capacity_frames: int, channels: int = CHANNELS,
+                 dtype: Any = np.int16) -> None:
+        """
+        Initialize the ring buffer.
+        
+        Args:
+            capacity_frames: Number of sample frames the buffer can hold
+            channels: Number of interleaved channels per frame
+            dtype: NumPy sample type
+        """
+        self.channels = channels
+        self.capacity = capacity_frames * channels
+        self._buffer = np.zeros(self.capacity, dtype=dtype)
+        self._read_pos = 0
+        self._write_pos = 0
+        self._condition = threading.Condition()
+        self.dropped_frames = 0
+        self.high_water_frames = 0
+    
+    @property
+    def available_frames(self) -> int:
+        """Number of frames waiting to be read."""
+        with self._condition:
+            return (self._write_pos - self._read_pos) // self.channels
+    
+    def write(self, samples: np.ndarray) -> int:
+        """
+        Copy interleaved samples into the buffer.
+        
+        Args:
+            samples: 1-D array of interleaved samples
+            
+        Returns:
+            int: Number of frames stored (the rest were dropped)
+        """
+        with self._condition:
+            free = self.capacity - (self._write_pos - self._read_pos)
+            count = min(len(samples), free - free % self.channels)
+            if count < len(samples):
+                self.dropped_frames += (len(samples) - count) // self.channels
+            
+            start = self._write_pos % self.capacity
+            first = min(count, self.capacity - start)
+            self._buffer[start:start + first] = samples[:first]
+            self._buffer[:count - first] = samples[first:count]
+            self._write_pos += count
+            
+            self.high_water_frames = max(
+                self.high_water_frames, (self._write_pos - self._read_pos) // self.channels
+            )
+            self._condition.notify()
+        return count // self.channels
+    
+    def read_into(self, out: np.ndarray, timeout: Optional[float] = None) -> int:
+        """
+        Move buffered samples into a caller-provided array.
+        
+        Args:
+            out: Preallocated 1-D array that receives the samples
+            timeout: Seconds to wait for data when the buffer is empty
+            
+        Returns:
+            int: Number of samples copied into ``out``
+        """
+        with self._condition:
+            if self._write_pos == self._read_pos:
+                self._condition.wait(timeout)
+            count = min(len(out), self._write_pos - self._read_pos)
+            
+            start = self._read_pos % self.capacity
+            first = min(count, self.capacity - start)
+            out[:first] = self._buffer[start:start + first]
+            out[first:count] = self._buffer[:count - first]
+            self._read_pos += count
+        return count
+
 
 class AudioRecorder:
     """Class for handling audio recording functionality."""
     
-    def __init__(self) -> None:
-        """Initialize the audio recorder."""
+    def __init__(self, rate: int = RATE) -> None:
+        """
+        Initialize the audio recorder.
+        
+        Args:
+            rate: Capture sample rate in Hz (use WHISPER_RATE for upload-ready recordings)
+        """
+        self.rate: int = rate
+        self.output_path: Optional[str] = None
         self.is_recording: bool = False
-        self.frames: List[bytes] = []
+        self.writer: Optional[WavStreamWriter] = None
+        self.buffer: RingBuffer = RingBuffer(rate * RING_BUFFER_SECONDS, channels=CHANNELS)
         self.audio: pyaudio.PyAudio = pyaudio.PyAudio()
         self.stream: Optional[pyaudio.Stream] = None
         self.thread: Optional[threading.Thread] = None
+        self.overflows: int = 0
+        self.frames_captured: int = 0
 
-    def start_recording(self) -> None:
-        """Start audio recording in a separate thread."""
-        self.is_recording = True
-        self.frames = []
-        self.stream = self.audio.open(
-            format=FORMAT,
+    def _capture_callback(self, in_data: bytes, frame_count: int,
+                          time_info: Dict[str, float], status: int) -> Tuple[None, int]:
+        """PortAudio callback: copy the captured block into the ring buffer."""
+        if status & pyaudio.paInputOverflow:
+            self.overflows += 1
+        self.frames_captured += frame_count
+        self.buffer.write(np.frombuffer(in_data, dtype=np.int16))
+        return None, pyaudio.paContinue
+
+    def start_recording(self, output_path: Optional[str] = None) -> None:
+        """
+        Start callback-driven capture with a consumer thread draining to disk.
+        
+        Args:
+            output_path: Where to write the WAV file. Defaults to a unique temp
+                file, so concurrent recorders never share a path.
+        """
+        if output_path is None:
+            fd, output_path = tempfile.mkstemp(prefix="recording_", suffix=".wav")
+            os.close(fd)
+        self.output_path = output_path
+        self.overflows = 0
+        self.frames_captured = 0
+        self.buffer = RingBuffer(self.rate * RING_BUFFER_SECONDS, channels=CHANNELS)
+        self.writer = WavStreamWriter(
+            self.output_path,
             channels=CHANNELS,
-            rate=RATE,
-            input=True,
-            frames_per_buffer=CHUNK
+            sample_width=self.audio.get_sample_size(FORMAT),
+            rate=self.rate
         )
         
-        def record() -> None:
-            while self.is_recording:
-                data = self.stream.read(CHUNK)
-                self.frames.append(data)
+        def drain() -> None:
+            scratch = np.empty(CHUNK * CHANNELS * 8, dtype=np.int16)
+            while self.is_recording or self.buffer.available_frames:
+                count = self.buffer.read_into(scratch, timeout=0.1)
+                if count:
+                    self.writer.write(scratch[:count])
         
-        self.thread = threading.Thread(target=record)
+        # Open the device before starting the consumer, so a missing mic or an
+        # unsupported rate can't leave the drain thread running forever.
+        # Blocks captured before the thread starts wait in the ring buffer.
+        try:
+            self.stream = self.audio.open(
+                format=FORMAT,
+                channels=CHANNELS,
+                rate=self.rate,
+                input=True,
+                frames_per_buffer=CHUNK,
+                stream_callback=self._capture_callback
+            )
+        except Exception:
+            self.writer.close()
+            raise
+        self.is_recording = True
+        self.thread = threading.Thread(target=drain)
         self.thread.start()
         print("Recording started... Press 'f' to finish recording.")
 
+    def capture_stats(self) -> Dict[str, int]:
+        """
+        Report capture health counters for the current or last recording.
+        
+        Returns:
+            Dict[str, int]: Frames captured and written, input overflows reported by
+            PortAudio, frames dropped because the ring buffer was full, and the
+            buffer's high-water mark in frames
+        """
+        return {
+            "frames_captured": self.frames_captured,
+            "frames_written": self.writer.frames_written if self.writer else 0,
+            "overflows": self.overflows,
+            "dropped_frames": self.buffer.dropped_frames,
+            "buffer_high_water_frames": self.buffer.high_water_frames
+        }
+
     def stop_recording(self) -> Optional[str]:
         """
         Stop the recording and save the audio file.
@@ -63,37 +333,44 @@ class AudioRecorder:
         """
         if not self.is_recording:
             return None
+        
+        # Stop the callback first so the consumer can drain everything captured
+        if self.stream:
+            self.stream.stop_stream()
+            self.stream.close()
             
         self.is_recording = False
         if self.thread:
             self.thread.join()
         
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
+        # Finalize the WAV header; the audio data is already on disk
+        if self.writer:
+            self.writer.close()
         
-        # Save the recorded audio to a WAV file
-        wf = wave.open(TEMP_AUDIO_FILE, 'wb')
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(self.audio.get_sample_size(FORMAT))
-        wf.setframerate(RATE)
-        wf.writeframes(b''.join(self.frames))
-        wf.close()
+        stats = self.capture_stats()
+        if stats["overflows"] or stats["dropped_frames"]:
+            print(f"Warning: {stats['overflows']} input overflows, "
+                  f"{stats['dropped_frames']} frames dropped during capture")
         
-        print(f"Recording saved to {TEMP_AUDIO_FILE}")
-        return TEMP_AUDIO_FILE
+        print(f"Recording saved to {self.output_path}")
+        return self.output_path
 
     def close(self) -> None:
         """Clean up resources."""
         self.audio.terminate()
 
 
-def convert_to_wav(input_file: str) -> Optional[str]:
+def convert_to_wav(input_file: str, output_file: Optional[str] = None) -> Optional[str]:
     """
-    Convert audio file to WAV format if needed.
+    Convert audio file to a 16 kHz mono WAV if needed.
+    
+    Decoding and resampling happen in-process (see ``load_audio``); ffmpeg is
+    only spawned for formats libsndfile cannot read.
     
     Args:
         input_file: Path to the input audio file
+        output_file: Destination path. Defaults to a unique temp file that the
+            caller is responsible for deleting.
         
     Returns:
         Optional[str]: Path to the converted WAV file or None if conversion failed
@@ -101,12 +378,12 @@ def convert_to_wav(input_file: str) -> Optional[str]:
     if input_file.lower().endswith('.wav'):
         return input_file
         
-    output_file = "temp_converted.wav"
     try:
-        # Use ffmpeg to convert the file
-        stream = ffmpeg.input(input_file)
-        stream = ffmpeg.output(stream, output_file, acodec='pcm_s16le', ac=1, ar=16000)
-        ffmpeg.run(stream, capture_stdout=True, capture_stderr=True, overwrite_output=True)
+        samples, rate = load_audio(input_file, WHISPER_RATE)
+        if output_file is None:
+            fd, output_file = tempfile.mkstemp(prefix="converted_", suffix=".wav")
+            os.close(fd)
+        sf.write(output_file, samples, rate, subtype="PCM_16")
         return output_file
     except ffmpeg.Error as e:
         print(f"Error converting file: {e.stderr.decode()}")
@@ -116,6 +393,444 @@ def convert_to_wav(input_file: str) -> Optional[str]:
         return None
 
 
+def convert_to_wav_stream(input_file: str, rate: int = WHISPER_RATE) -> Optional[BinaryIO]:
+    """
+    Convert any ffmpeg-readable file to a 16 kHz mono WAV without a shared temp path.
+    
+    ffmpeg writes raw PCM to a pipe, which is streamed in large blocks into a
+    private spooled temp file: it stays in memory up to ``SPOOL_MAX_BYTES`` and
+    rolls over to an anonymous temp file beyond that. Any number of conversions
+    can run in parallel.
+    
+    Args:
+        input_file: Path to the input audio file
+        rate: Output sample rate in Hz
+        
+    Returns:
+        Optional[BinaryIO]: Rewound WAV file object (close it when done) or None
+        if conversion failed
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, suffix=".wav")
+    try:
+        process = (
+            ffmpeg.input(input_file)
+            .output("pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=rate)
+            .global_args("-loglevel", "error")
+            .run_async(pipe_stdout=True, pipe_stderr=True)
+        )
+        writer = WavStreamWriter(spool, channels=1, sample_width=2, rate=rate,
+                                 header_interval=float("inf"))
+        while True:
+            block = process.stdout.read(PIPE_BLOCK_BYTES)
+            if not block:
+                break
+            writer.write(block)
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            print(f"Error converting file: {stderr.decode(errors='replace')}")
+            spool.close()
+            return None
+        
+        writer.close()
+        spool.seek(0)
+        return spool
+    except Exception as e:
+        print(f"Error converting file: {e}")
+        spool.close()
+        return None
+
+
+def _ffmpeg_decode(file_path: str, rate: int) -> np.ndarray:
+    """Decode any ffmpeg-readable file to mono int16 at ``rate`` through a pipe."""
+    out, _ = (
+        ffmpeg.input(file_path)
+        .output("pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=rate)
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+    return np.frombuffer(out, dtype=np.int16)
+
+
+def _probe_rate(file_path: str) -> int:
+    """Get the sample rate of a file's first audio stream with ffprobe."""
+    probe = ffmpeg.probe(file_path, select_streams="a:0")
+    return int(probe["streams"][0]["sample_rate"])
+
+
+def _kaiser_lowpass(up: int, down: int, half_taps: int = RESAMPLE_HALF_TAPS) -> np.ndarray:
+    """Design the anti-aliasing FIR filter for an ``up``/``down`` polyphase resampler."""
+    ratio = max(up, down)
+    length = 2 * half_taps * ratio + 1
+    n = np.arange(length) - (length - 1) / 2
+    cutoff = 1.0 / ratio
+    return (up * cutoff * np.sinc(cutoff * n) * np.kaiser(length, RESAMPLE_KAISER_BETA)).astype(np.float32)
+
+
+def resample_poly(samples: np.ndarray, orig_rate: int, target_rate: int) -> np.ndarray:
+    """
+    Resample a mono signal by a rational factor with a polyphase FIR filter.
+    
+    Equivalent to upsampling by ``up``, low-pass filtering and decimating by
+    ``down``, but only the filter taps that land on real input samples are
+    evaluated. Every ``down`` input samples yield ``up`` outputs through the
+    same set of filter phases, so the whole signal is processed as one matrix
+    product of overlapping input windows against a per-period filter matrix,
+    in blocks to bound memory.
+    
+    Args:
+        samples: Mono samples (any numeric dtype)
+        orig_rate: Input sample rate in Hz
+        target_rate: Output sample rate in Hz
+        
+    Returns:
+        np.ndarray: Resampled float32 signal
+    """
+    signal = np.asarray(samples, dtype=np.float32)
+    if orig_rate == target_rate or len(signal) == 0:
+        return signal
+    
+    g = math.gcd(orig_rate, target_rate)
+    up, down = target_rate // g, orig_rate // g
+    h = _kaiser_lowpass(up, down)
+    delay = (len(h) - 1) // 2
+    
+    # Polyphase decomposition: phases[p, k] = h[p + k * up]
+    taps = -(-len(h) // up)
+    phases = np.zeros(up * taps, dtype=np.float32)
+    phases[:len(h)] = h
+    phases = phases.reshape(taps, up).T
+    
+    # Output m * up + j reads input window ending at m * down + offsets[j];
+    # column j of ``matrix`` holds its phase laid out over the shared window
+    j = np.arange(up)
+    offsets = (j * down + delay) // up + taps
+    lo = offsets.min() - taps + 1
+    width = offsets.max() - lo + 1
+    rows = offsets[:, None] - np.arange(taps)[None, :] - lo
+    matrix = np.zeros((width, up), dtype=np.float32)
+    matrix[rows, np.broadcast_to(j[:, None], rows.shape)] = phases[(j * down + delay) % up]
+    
+    n_out = -(-len(signal) * up // down)
+    periods = -(-n_out // up)
+    padded = np.zeros(periods * down + lo + width + down, dtype=np.float32)
+    padded[taps:taps + len(signal)] = signal
+    out = np.empty(periods * up, dtype=np.float32)
+    
+    step = max(1, RESAMPLE_BLOCK // width)
+    for m in range(0, periods, step):
+        m_end = min(m + step, periods)
+        windows = np.lib.stride_tricks.as_strided(
+            padded[m * down + lo:],
+            shape=(m_end - m, width),
+            strides=(down * padded.itemsize, padded.itemsize)
+        )
+        out[m * up:m_end * up] = (windows @ matrix).ravel()
+    return out[:n_out]
+
+
+def load_audio(file_path: str, target_rate: Optional[int] = WHISPER_RATE) -> Tuple[np.ndarray, int]:
+    """
+    Decode an audio file in-process to mono 16-bit samples, optionally resampled.
+    
+    libsndfile handles WAV/FLAC/OGG (and MP3 on recent builds) without spawning
+    a process; anything it cannot read falls back to an ffmpeg pipe decode.
+    
+    Args:
+        file_path: Path to the audio file
+        target_rate: Output sample rate in Hz, or None to keep the file's rate
+        
+    Returns:
+        Tuple[np.ndarray, int]: Mono int16 samples and their sample rate
+    """
+    try:
+        data, rate = sf.read(file_path, dtype="float32", always_2d=True)
+    except RuntimeError:
+        rate = target_rate or _probe_rate(file_path)
+        return _ffmpeg_decode(file_path, rate), rate
+    
+    channels = data.shape[1]
+    mono = data @ np.full(channels, 1.0 / channels, dtype=np.float32) if channels > 1 else data[:, 0]
+    if target_rate and target_rate != rate:
+        mono = resample_poly(mono, rate, target_rate)
+        rate = target_rate
+    return np.clip(np.round(mono * 32768.0), -32768, 32767).astype(np.int16), rate
+
+
+def prepare_upload(file_path: str, target_rate: int = WHISPER_RATE) -> BytesIO:
+    """
+    Build an upload-ready 16 kHz mono WAV in memory.
+    
+    Args:
+        file_path: Path to the source audio file
+        target_rate: Output sample rate in Hz
+        
+    Returns:
+        BytesIO: In-memory WAV named after the source file
+    """
+    samples, rate = load_audio(file_path, target_rate)
+    return encode_wav(samples, rate, name=f"{Path(file_path).stem}.wav")
+
+
+def encode_wav(samples: np.ndarray, rate: int, name: str = "audio.wav") -> BytesIO:
+    """
+    Encode mono int16 samples as an in-memory WAV file.
+    
+    Args:
+        samples: Mono int16 samples
+        rate: Sample rate in Hz
+        name: Filename reported to upload APIs that sniff the extension
+        
+    Returns:
+        BytesIO: Rewound WAV buffer with a ``name`` attribute
+    """
+    buffer = BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(np.ascontiguousarray(samples, dtype=np.int16).tobytes())
+    buffer.name = name
+    buffer.seek(0)
+    return buffer
+
+
+def encode_audio(samples: np.ndarray, rate: int, codec: str = "wav",
+                 name: str = "audio") -> BytesIO:
+    """
+    Encode mono int16 samples in memory with an upload-friendly codec.
+    
+    Args:
+        samples: Mono int16 samples
+        rate: Sample rate in Hz
+        codec: "wav", "flac" (lossless) or "opus" (lossy, Ogg container)
+        name: Filename stem; the codec's extension is appended
+        
+    Returns:
+        BytesIO: Rewound encoded buffer with a ``name`` attribute
+    """
+    if codec == "wav":
+        return encode_wav(samples, rate, name=f"{name}.wav")
+    
+    formats = {"flac": ("FLAC", "PCM_16", "flac"), "opus": ("OGG", "OPUS", "ogg")}
+    if codec not in formats:
+        raise AudioError(f"Unsupported upload codec: {codec}")
+    container, subtype, extension = formats[codec]
+    
+    buffer = BytesIO()
+    sf.write(buffer, samples, rate, format=container, subtype=subtype)
+    buffer.name = f"{name}.{extension}"
+    buffer.seek(0)
+    return buffer
+
+
+def frame_features(samples: np.ndarray, rate: int,
+                   frame_ms: int = VAD_FRAME_MS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute per-frame energy and zero-crossing rate over the whole signal at once.
+    
+    Args:
+        samples: Mono samples
+        rate: Sample rate in Hz
+        frame_ms: Frame length in milliseconds
+        
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Frame energy in dBFS and zero-crossing rate (0-1)
+    """
+    frame_len = max(1, rate * frame_ms // 1000)
+    n_frames = -(-len(samples) // frame_len)
+    padded = np.zeros(n_frames * frame_len, dtype=np.float32)
+    padded[:len(samples)] = samples
+    frames = padded.reshape(n_frames, frame_len) / 32768.0
+    
+    energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / max(1, frame_len - 1)
+    return energy_db, zcr
+
+
+def detect_speech(samples: np.ndarray, rate: int, frame_ms: int = VAD_FRAME_MS,
+                  threshold_db: Optional[float] = None,
+                  hangover_ms: int = VAD_HANGOVER_MS) -> np.ndarray:
+    """
+    Classify each frame as speech or silence.
+    
+    Frames are speech when their energy clears a threshold that adapts to the
+    recording's noise floor. Quieter frames with a high zero-crossing rate
+    (unvoiced consonants) also count, and speech is extended by a short
+    hangover so word endings are not clipped.
+    
+    Args:
+        samples: Mono samples
+        rate: Sample rate in Hz
+        frame_ms: Frame length in milliseconds
+        threshold_db: Fixed energy threshold in dBFS (adaptive when None)
+        hangover_ms: Speech padding added on both sides of every detection
+        
+    Returns:
+        np.ndarray: Boolean speech mask with one entry per frame
+    """
+    energy_db, zcr = frame_features(samples, rate, frame_ms)
+    if len(energy_db) == 0:
+        return np.zeros(0, dtype=bool)
+    
+    if threshold_db is None:
+        noise_floor = np.percentile(energy_db, 10)
+        threshold_db = max(noise_floor + VAD_MARGIN_DB, VAD_MIN_THRESHOLD_DB)
+    
+    speech = (energy_db > threshold_db) | (
+        (zcr > VAD_ZCR_THRESHOLD) & (energy_db > threshold_db - VAD_MARGIN_DB / 2)
+    )
+    
+    hangover = hangover_ms // frame_ms
+    if hangover > 0:
+        kernel = np.ones(2 * hangover + 1, dtype=np.int32)
+        speech = np.convolve(speech.astype(np.int32), kernel, mode="same") > 0
+    return speech
+
+
+def trim_silence(samples: np.ndarray, rate: int,
+                 max_silence_ms: int = VAD_MAX_SILENCE_MS,
+                 frame_ms: int = VAD_FRAME_MS) -> Tuple[np.ndarray, List[Tuple[int, int, int]]]:
+    """
+    Compress silent spans longer than ``max_silence_ms`` down to that length.
+    
+    Args:
+        samples: Mono samples
+        rate: Sample rate in Hz
+        max_silence_ms: Longest silence kept verbatim; longer gaps are shortened to it
+        frame_ms: VAD frame length in milliseconds
+        
+    Returns:
+        Tuple[np.ndarray, List[Tuple[int, int, int]]]: The trimmed samples and an
+        offset map of ``(trimmed_start, original_start, length)`` spans in samples
+    """
+    frame_len = max(1, rate * frame_ms // 1000)
+    max_gap = rate * max_silence_ms // 1000
+    speech = detect_speech(samples, rate, frame_ms)
+    
+    # Silent runs as [start, end) sample ranges
+    edges = np.diff(np.concatenate(([1], speech.astype(np.int8), [1])))
+    gap_starts = np.flatnonzero(edges == -1) * frame_len
+    gap_ends = np.minimum(np.flatnonzero(edges == 1) * frame_len, len(samples))
+    long_gaps = (gap_ends - gap_starts) > max_gap
+    
+    # Keep everything except the tail of each long gap
+    cut_starts = gap_starts[long_gaps] + max_gap
+    cut_ends = gap_ends[long_gaps]
+    keep_starts = np.concatenate(([0], cut_ends))
+    keep_ends = np.concatenate((cut_starts, [len(samples)]))
+    lengths = keep_ends - keep_starts
+    valid = lengths > 0
+    keep_starts, lengths = keep_starts[valid], lengths[valid]
+    
+    trimmed_starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(lengths) else lengths
+    offset_map = [(int(t), int(o), int(n)) for t, o, n in zip(trimmed_starts, keep_starts, lengths)]
+    
+    if len(offset_map) == 1 and offset_map[0][1] == 0 and offset_map[0][2] == len(samples):
+        return samples, offset_map
+    trimmed = np.concatenate([samples[o:o + n] for _, o, n in offset_map]) if offset_map else samples[:0]
+    return trimmed, offset_map
+
+
+def offset_starts(offset_map: List[Tuple[int, int, int]]) -> List[int]:
+    """
+    Get the trimmed start of every span in an offset map, for ``map_to_original``.
+    
+    Args:
+        offset_map: Offset map returned by ``trim_silence``
+        
+    Returns:
+        List[int]: Ascending trimmed start positions
+    """
+    return [span[0] for span in offset_map]
+
+
+def map_to_original(offset_map: List[Tuple[int, int, int]], position: int,
+                    starts: Optional[List[int]] = None) -> int:
+    """
+    Map a sample position in trimmed audio back to the original recording.
+    
+    Args:
+        offset_map: Offset map returned by ``trim_silence``
+        position: Sample index in the trimmed audio
+        starts: ``offset_starts(offset_map)``; pass it when mapping many positions
+            so each lookup is a binary search (it is rebuilt per call otherwise)
+        
+    Returns:
+        int: Corresponding sample index in the original audio
+    """
+    if not offset_map:
+        return position
+    if starts is None:
+        starts = offset_starts(offset_map)
+    index = max(0, bisect.bisect_right(starts, position) - 1)
+    trimmed_start, original_start, length = offset_map[index]
+    return original_start + min(position - trimmed_start, length)
+
+
+def split_at_silence(samples: np.ndarray, rate: int, max_segment_samples: int,
+                     min_segment_samples: int = 0,
+                     frame_ms: int = VAD_FRAME_MS) -> List[Tuple[int, int]]:
+    """
+    Split audio into segments no longer than ``max_segment_samples``, cutting in silence.
+    
+    Each cut is placed at the middle of the last silent run that still fits the
+    size bound, so words are not split across segments. Spans with no usable
+    silence are cut hard at the bound.
+    
+    Args:
+        samples: Mono samples
+        rate: Sample rate in Hz
+        max_segment_samples: Upper bound on segment length in samples
+        min_segment_samples: Ignore silences that would create shorter segments
+        frame_ms: VAD frame length in milliseconds
+        
+    Returns:
+        List[Tuple[int, int]]: Ordered ``(start, end)`` sample ranges covering the input
+    """
+    total = len(samples)
+    if total <= max_segment_samples:
+        return [(0, total)] if total else []
+    
+    frame_len = max(1, rate * frame_ms // 1000)
+    speech = detect_speech(samples, rate, frame_ms)
+    edges = np.diff(np.concatenate(([1], speech.astype(np.int8), [1])))
+    gap_starts = np.flatnonzero(edges == -1)
+    gap_ends = np.flatnonzero(edges == 1)
+    cut_points = ((gap_starts + gap_ends) // 2) * frame_len
+    
+    bounds = []
+    start = 0
+    while total - start > max_segment_samples:
+        limit = start + max_segment_samples
+        lo = bisect.bisect_right(cut_points, start + min_segment_samples)
+        hi = bisect.bisect_right(cut_points, limit)
+        end = int(cut_points[hi - 1]) if hi > lo else limit
+        bounds.append((start, end))
+        start = end
+    bounds.append((start, total))
+    return bounds
+
+
+def get_duration(file_path: str) -> Optional[float]:
+    """
+    Get an audio file's duration from its header, without decoding it.
+    
+    Args:
+        file_path: Path to the audio file
+        
+    Returns:
+        Optional[float]: Duration in seconds or None if it could not be determined
+    """
+    try:
+        return sf.info(file_path).duration
+    except RuntimeError:
+        pass
+    try:
+        return float(ffmpeg.probe(file_path)["format"]["duration"])
+    except Exception:
+        return None
+
+
 def list_audio_files() -> list:
     """
     List all audio files in the recordings directory.
@@ -124,23 +839,18 @@ def list_audio_files() -> list:
         list: List of audio file paths
     """
     try:
-        files = os.listdir(RECORDINGS_DIR)
-        audio_files = [f for f in files if f.endswith(('.wav', '.mp3', '.m4a'))]
+        audio_files = catalog.list_artifacts("recording")
         
         if not audio_files:
             print("No audio files found.")
             return []
             
-        # Sort files by modification time (newest first)
-        audio_files.sort(key=lambda x: os.path.getmtime(os.path.join(RECORDINGS_DIR, x)), reverse=True)
-        
-        # Format the list for display
+        # Format the list for display (the catalog returns newest first)
         formatted_list = []
-        for i, file in enumerate(audio_files):
-            file_path = os.path.join(RECORDINGS_DIR, file)
-            size_mb = os.path.getsize(file_path) / (1024 * 1024)
-            mod_time = datetime.fromtimestamp(os.path.getmtime(file_path)).strftime("%Y-%m-%d %H:%M:%S")
-            formatted_list.append(f"{i+1}. {file} ({size_mb:.2f} MB) - {mod_time}")
+        for i, entry in enumerate(audio_files):
+            size_mb = entry["size"] / (1024 * 1024)
+            mod_time = datetime.fromtimestamp(entry["mtime"]).strftime("%Y-%m-%d %H:%M:%S")
+            formatted_list.append(f"{i+1}. {entry['name']} ({size_mb:.2f} MB) - {mod_time}")
             
         return formatted_list
         
@@ -160,22 +870,16 @@ def get_audio_file_path(index: int) -> Optional[str]:
         Optional[str]: Path to the audio file or None if not found
     """
     try:
-        files = os.listdir(RECORDINGS_DIR)
-        audio_files = [f for f in files if f.endswith(('.wav', '.mp3', '.m4a'))]
+        entry = catalog.get_artifact("recording", index)
+        if entry is not None:
+            return entry["path"]
         
-        if not audio_files:
+        count = catalog.count_artifacts("recording")
+        if not count:
             print("No audio files found.")
-            return None
-            
-        # Sort files by modification time (newest first)
-        audio_files.sort(key=lambda x: os.path.getmtime(os.path.join(RECORDINGS_DIR, x)), reverse=True)
-        
-        if index < 1 or index > len(audio_files):
-            print(f"Invalid file index. Please choose a number between 1 and {len(audio_files)}.")
-            return None
-            
-        file_path = os.path.join(RECORDINGS_DIR, audio_files[index-1])
-        return file_path
+        else:
+            print(f"Invalid file index. Please choose a number between 1 and {count}.")
+        return None
         
     except Exception as e:
         print(f"Error getting audio file path: {e}")
@@ -195,6 +899,7 @@ def delete_audio_file(file_path: str) -> bool:
     try:
         if os.path.exists(file_path):
             os.remove(file_path)
+            catalog.unregister(file_path)
             print(f"File {os.path.basename(file_path)} deleted.")
             return True
         else:
@@ -205,12 +910,14 @@ def delete_audio_file(file_path: str) -> bool:
         return False
 
 
-def record_audio(duration: int = 0) -> Optional[str]:
+def record_audio(duration: int = 0, rate: int = RATE) -> Optional[str]:
     """
     Record audio from the microphone.
     
     Args:
         duration: Recording duration in seconds. If 0, record until Ctrl+C is pressed.
+        rate: Capture sample rate in Hz. WHISPER_RATE (16 kHz) records upload-ready
+            audio about 2.75x smaller than the 44.1 kHz default.
         
     Returns:
         Optional[str]: Path to the recorded audio file or None if recording failed
@@ -222,55 +929,49 @@ def record_audio(duration: int = 0) -> Optional[str]:
         stream = p.open(
             format=FORMAT,
             channels=CHANNELS,
-            rate=RATE,
+            rate=rate,
             input=True,
             frames_per_buffer=CHUNK
         )
         
-        print("Recording started...")
-        frames = []
+        # Stream chunks straight into the output file as they are captured
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"recording_{timestamp}.wav"
+        filepath = os.path.join(RECORDINGS_DIR, filename)
         
-        # Record for specified duration or until interrupted
-        if duration > 0:
-            # Record for specific duration
-            for i in range(0, int(RATE / CHUNK * duration)):
-                data = stream.read(CHUNK)
-                frames.append(data)
-                
-            print(f"Recording completed ({duration} seconds)")
-        else:
-            # Record until Ctrl+C is pressed
-            try:
-                print("Press Ctrl+C to stop recording")
-                start_time = time.time()
-                while True:
-                    data = stream.read(CHUNK)
-                    frames.append(data)
+        with WavStreamWriter(filepath, channels=CHANNELS,
+                             sample_width=p.get_sample_size(FORMAT), rate=rate) as writer:
+            print("Recording started...")
+            
+            # Record for specified duration or until interrupted
+            if duration > 0:
+                # Record for specific duration
+                for i in range(0, int(rate / CHUNK * duration)):
+                    writer.write(stream.read(CHUNK))
                     
-                    # Print elapsed time every 5 seconds
-                    current_time = time.time()
-                    elapsed = current_time - start_time
-                    if elapsed % 5 < 0.1:  # Print approximately every 5 seconds
-                        print(f"Recording... {int(elapsed)} seconds")
+                print(f"Recording completed ({duration} seconds)")
+            else:
+                # Record until Ctrl+C is pressed
+                try:
+                    print("Press Ctrl+C to stop recording")
+                    start_time = time.time()
+                    while True:
+                        writer.write(stream.read(CHUNK))
                         
-            except KeyboardInterrupt:
-                print("\nRecording stopped by user")
+                        # Print elapsed time every 5 seconds
+                        current_time = time.time()
+                        elapsed = current_time - start_time
+                        if elapsed % 5 < 0.1:  # Print approximately every 5 seconds
+                            print(f"Recording... {int(elapsed)} seconds")
+                            
+                except KeyboardInterrupt:
+                    print("\nRecording stopped by user")
                 
         # Stop and close the stream
         stream.stop_stream()
         stream.close()
-        
-        # Save the recorded audio to a file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"recording_{timestamp}.wav"
-        filepath = os.path.join(RECORDINGS_DIR, filename)
-        
-        with wave.open(filepath, 'wb') as wf:
-            wf.setnchannels(CHANNELS)
-            wf.setsampwidth(p.get_sample_size(FORMAT))
-            wf.setframerate(RATE)
-            wf.writeframes(b''.join(frames))
             
+        catalog.register(filepath, "recording")
         print(f"Audio saved to {filepath}")
         return filepath
         
@@ -0,0 +1,442 @@
+"""
+Result caches for the Whisper Transcription Tool.
+
+``DiskCache`` stores JSON results on disk (transcriptions); ``LLMCache`` puts
+an in-memory LRU with expiry in front of one for chat completion responses.
+Both keep hit/miss counters for the current process and persist them, so
+``--cache-stats`` can report totals across runs.
+"""
+import os
+import json
+import time
+import atexit
+import hashlib
+import threading
+from collections import OrderedDict, Counter
+from typing import Optional, Dict, Any, List, Tuple
+
+# Constants
+CACHE_DIR = "data/cache"
+HASH_BLOCK_BYTES = 1024 * 1024
+STATS_FILE = "stats.jsonl"
+
+
+def hash_file(file_path: str) -> str:
+    """
+    Compute the SHA-256 of a file's content, streaming it in large blocks.
+    
+    Args:
+        file_path: Path to the file
+        
+    Returns:
+        str: Hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_key(*parts: Any) -> str:
+    """
+    Build a cache key from arbitrary JSON-serializable parts.
+    
+    Args:
+        *parts: Values that together identify a result (content hash, model, parameters...)
+        
+    Returns:
+        str: Hex digest usable as a cache key
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class StatsLog:
+    """
+    Counters persisted across runs in an append-only JSON-lines file.
+    
+    Each process appends the counts it added since its last flush as one line
+    (at exit, or on ``flush``), so concurrent processes never overwrite each
+    other's counts; totals are the sum of all lines plus what is still pending.
+    """
+    
+    def __init__(self, path: str) -> None:
+        """
+        Initialize the log.
+        
+        Args:
+            path: File the counts are appended to
+        """
+        self.path = path
+        self._pending: Counter = Counter()
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+    
+    def add(self, name: str, amount: int = 1) -> None:
+        """
+        Count an event.
+        
+        Args:
+            name: Counter name
+            amount: Amount to add
+        """
+        with self._lock:
+            self._pending[name] += amount
+    
+    def flush(self) -> None:
+        """Append the pending counts to the file."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(dict(pending)) + "\n")
+        except OSError as e:
+            print(f"Error saving cache statistics: {e}")
+    
+    def totals(self) -> Dict[str, int]:
+        """
+        Sum the counts of every run, including this one.
+        
+        Returns:
+            Dict[str, int]: Totals by counter name
+        """
+        totals: Counter = Counter()
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        totals.update(json.loads(line))
+                    except ValueError:
+                        continue  # A line torn by a crash
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            totals.update(self._pending)
+        return dict(totals)
+
+
+class DiskCache:
+    """
+    Size-bounded, content-addressed JSON cache on disk with LRU eviction.
+    
+    Each entry is one JSON file named after its key. A hit refreshes the
+    file's mtime, so evicting the oldest mtimes first gives least-recently-used
+    order without a separate index. Writes are atomic (temp file + rename),
+    so concurrent workers never read a partial entry.
+    """
+    
+    def __init__(self, directory: str, max_bytes: int, persist_stats: bool = True) -> None:
+        """
+        Initialize the cache.
+        
+        Args:
+            directory: Directory holding the cache entries
+            max_bytes: Total size above which least-recently-used entries are evicted
+            persist_stats: Keep hit/miss totals across runs in the directory
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        os.makedirs(directory, exist_ok=True)
+        self._stats_log = StatsLog(os.path.join(directory, STATS_FILE)) if persist_stats else None
+    
+    def _count(self, name: str, amount: int = 1) -> None:
+        """Add to a counter of this process and to the persisted totals (caller holds the lock)."""
+        setattr(self, name, getattr(self, name) + amount)
+        if self._stats_log is not None:
+            self._stats_log.add(name, amount)
+    
+    def _path(self, key: str) -> str:
+        """Return the file path for a key."""
+        return os.path.join(self.directory, f"{key}.json")
+    
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """List (mtime, size, path) for every entry."""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+    
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached value.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Optional[Any]: The cached value or None on a miss
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                value = json.load(file)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self._count("misses")
+            return None
+        
+        with self._lock:
+            self._count("hits")
+        return value
+    
+    def put(self, key: str, value: Any) -> None:
+        """
+        Store a value, evicting least-recently-used entries if over budget.
+        
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+        """
+        path = self._path(key)
+        data = json.dumps(value).encode("utf-8")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(data)
+        
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            self._size += len(data) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+    
+    def delete(self, key: str) -> None:
+        """
+        Remove an entry if it exists.
+        
+        Args:
+            key: Cache key
+        """
+        path = self._path(key)
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                return
+            if self._size is not None:
+                self._size -= size
+    
+    def _evict(self) -> None:
+        """Delete the oldest entries until the cache is back under 90% of its budget."""
+        target = int(self.max_bytes * 0.9)
+        entries = sorted(self._entries())
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+            self._count("evictions")
+    
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            for _, _, path in self._entries():
+                os.remove(path)
+            self._size = 0
+    
+    def flush_stats(self) -> None:
+        """Persist this process's counts now instead of at exit."""
+        if self._stats_log is not None:
+            self._stats_log.flush()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report hit/miss statistics and current usage.
+        
+        Returns:
+            Dict[str, Any]: Hits, misses, hit ratio and evictions of this process,
+            the same counts over every run ("total"), entry count and bytes used
+        """
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        totals = self._stats_log.totals() if self._stats_log is not None else {}
+        total_hits, total_misses = totals.get("hits", 0), totals.get("misses", 0)
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "total": {
+                "hits": total_hits,
+                "misses": total_misses,
+                "hit_ratio": total_hits / (total_hits + total_misses) if total_hits + total_misses else 0.0,
+                "evictions": totals.get("evictions", 0)
+            },
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes
+        }
+
+
+class LLMCache:
+    """
+    Chat completion cache: an in-memory LRU in front of a DiskCache.
+    
+    Entries expire ``ttl_seconds`` after they were stored. The memory layer
+    holds the ``max_entries`` most recently used responses; the disk layer is
+    bounded by size and shared between runs.
+    """
+    
+    def __init__(self, directory: str, max_entries: int = 256,
+                 max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 7 * 24 * 3600) -> None:
+        """
+        Initialize the cache.
+        
+        Args:
+            directory: Directory of the on-disk layer
+            max_entries: Responses kept in memory
+            max_bytes: Size budget of the on-disk layer
+            ttl_seconds: Age after which an entry is ignored and removed
+        """
+        # The disk layer's own counters would double-count; this cache persists its own
+        self.disk = DiskCache(directory, max_bytes, persist_stats=False)
+        self._stats_log = StatsLog(os.path.join(directory, STATS_FILE))
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, Any]], **params: Any) -> str:
+        """
+        Build the key for a chat request.
+        
+        Args:
+            model: Model name
+            messages: The full message list
+            **params: Every other request parameter (temperature, max_tokens, response_format...)
+            
+        Returns:
+            str: Cache key
+        """
+        return make_key("chat", model, messages, params)
+    
+    def _fresh(self, stored: float) -> bool:
+        return time.time() - stored < self.ttl_seconds
+    
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a response, checking memory before disk.
+        
+        Args:
+            key: Key from ``make_key``
+            
+        Returns:
+            Optional[Any]: The cached response or None on a miss
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._fresh(entry[0]):
+                    self._memory.move_to_end(key)
+                    self._count("memory_hits")
+                    return entry[1]
+                del self._memory[key]
+        
+        entry = self.disk.get(key)
+        if entry is not None and not self._fresh(entry["stored"]):
+            self.disk.delete(key)
+            with self._lock:
+                self._count("expired")
+            entry = None
+        
+        with self._lock:
+            if entry is None:
+                self._count("misses")
+                return None
+            self._count("disk_hits")
+            self._remember(key, entry["stored"], entry["value"])
+        return entry["value"]
+    
+    def _count(self, name: str) -> None:
+        """Add to a counter of this process and to the persisted totals (caller holds the lock)."""
+        setattr(self, name, getattr(self, name) + 1)
+        self._stats_log.add(name)
+    
+    def _remember(self, key: str, stored: float, value: Any) -> None:
+        """Add an entry to the memory layer (caller holds the lock)."""
+        self._memory[key] = (stored, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    
+    def put(self, key: str, value: Any) -> None:
+        """
+        Store a response in both layers.
+        
+        Args:
+            key: Key from ``make_key``
+            value: JSON-serializable response
+        """
+        stored = time.time()
+        with self._lock:
+            self._remember(key, stored, value)
+        self.disk.put(key, {"stored": stored, "value": value})
+    
+    def clear(self) -> None:
+        """Remove every entry from both layers."""
+        with self._lock:
+            self._memory.clear()
+        self.disk.clear()
+    
+    def flush_stats(self) -> None:
+        """Persist this process's counts now instead of at exit."""
+        self._stats_log.flush()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report hit/miss statistics for both layers.
+        
+        Returns:
+            Dict[str, Any]: Memory and disk hits, misses, expired entries and hit
+            ratio of this process, the same counts over every run ("total"), and
+            the disk layer's usage
+        """
+        disk = self.disk.stats()
+        totals = self._stats_log.totals()
+        total_hits = totals.get("memory_hits", 0) + totals.get("disk_hits", 0)
+        total_lookups = total_hits + totals.get("misses", 0)
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_ratio": hits / lookups if lookups else 0.0,
+                "total": {
+                    "memory_hits": totals.get("memory_hits", 0),
+                    "disk_hits": totals.get("disk_hits", 0),
+                    "misses": totals.get("misses", 0),
+                    "expired": totals.get("expired", 0),
+                    "hit_ratio": total_hits / total_lookups if total_lookups else 0.0
+                },
+                "memory_entries": len(self._memory),
+                "entries": disk["entries"],
+                "bytes": disk["bytes"],
+                "max_bytes": disk["max_bytes"]
+            }
@@ -0,0 +1,326 @@
+"""
+SQLite catalog of the files under the data directories.
+
+Listing menus used to re-scan a directory and stat every file on every call. The
+catalog keeps one row per artifact (kind, size, mtime, ctime and the artifact it
+was derived from) so listings are indexed queries, and lookups by listing position
+resolve to a primary-key lookup.
+
+Writers call ``register`` after creating a file. Each kind's directory is also
+reconciled lazily: when its mtime changes (files were added, removed or renamed
+behind our back) the catalog diffs the directory's names against its rows and
+stats only the new files.
+"""
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Tuple, Iterator
+
+# Constants
+CATALOG_PATH = "data/catalog.db"
+ORDER_COLUMNS = ("mtime", "ctime")
+
+# Queries are fixed strings, one per listing order, so no SQL is ever built at run time
+_LIST_QUERIES = {
+    "mtime": "SELECT path, name, size, mtime, ctime, derived_from FROM artifacts "
+             "WHERE kind = ? AND directory = ? ORDER BY mtime DESC, path",
+    "ctime": "SELECT path, name, size, mtime, ctime, derived_from FROM artifacts "
+             "WHERE kind = ? AND directory = ? ORDER BY ctime DESC, path",
+}
+_POSITION_QUERIES = {
+    "mtime": "SELECT path, name, size, mtime, ctime, derived_from FROM artifacts "
+             "WHERE kind = ? AND directory = ? ORDER BY mtime DESC, path LIMIT 1 OFFSET ?",
+    "ctime": "SELECT path, name, size, mtime, ctime, derived_from FROM artifacts "
+             "WHERE kind = ? AND directory = ? ORDER BY ctime DESC, path LIMIT 1 OFFSET ?",
+}
+_BY_PATH_QUERY = "SELECT path, name, size, mtime, ctime, derived_from FROM artifacts WHERE path = ?"
+_DERIVED_QUERY = ("SELECT path, name, size, mtime, ctime, derived_from FROM artifacts "
+                  "WHERE derived_from = ? ORDER BY mtime DESC")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    directory TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    ctime REAL NOT NULL,
+    derived_from TEXT,
+    registered REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS artifacts_by_mtime ON artifacts (kind, directory, mtime DESC);
+CREATE INDEX IF NOT EXISTS artifacts_by_ctime ON artifacts (kind, directory, ctime DESC);
+CREATE INDEX IF NOT EXISTS artifacts_by_source ON artifacts (derived_from);
+CREATE TABLE IF NOT EXISTS directories (
+    kind TEXT NOT NULL,
+    directory TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    PRIMARY KEY (kind, directory)
+);
+"""
+
+# kind -> (directory, extensions, default order column)
+_kinds: Dict[str, Tuple[str, Tuple[str, ...], str]] = {}
+_local = threading.local()
+
+
+def define_kind(kind: str, directory: str, extensions: Tuple[str, ...], order: str = "mtime") -> None:
+    """
+    Declare an artifact kind and the directory it lives in.
+
+    Args:
+        kind: Kind name, e.g. "recording"
+        directory: Directory reconciled for this kind
+        extensions: Lower-case file extensions that belong to the kind
+        order: Column listings are sorted by, newest first ("mtime" or "ctime")
+    """
+    if order not in ORDER_COLUMNS:
+        raise ValueError(f"Unknown order column: {order}")
+    _kinds[kind] = (os.path.normpath(directory), tuple(extensions), order)
+
+
+def kind_directory(kind: str) -> Optional[str]:
+    """
+    Get the directory declared for a kind.
+
+    Args:
+        kind: Artifact kind
+
+    Returns:
+        Optional[str]: The directory, or None if the kind hasn't been declared
+    """
+    entry = _kinds.get(kind)
+    return entry[0] if entry else None
+
+
+def _connect() -> sqlite3.Connection:
+    """Get this thread's connection to the catalog, creating the schema on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(CATALOG_PATH) or ".", exist_ok=True)
+        conn = sqlite3.connect(CATALOG_PATH, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _local.conn = conn
+        _local.positions = {}
+    return conn
+
+
+def _version(conn: sqlite3.Connection) -> Tuple[int, int]:
+    """Identify the catalog's state: changes by other connections, then by this one."""
+    return conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes
+
+
+def _positions() -> Dict[str, Tuple[Tuple[int, int], List[str]]]:
+    """This thread's newest-first paths per kind, with the catalog version they were read at."""
+    return _local.positions
+
+
+@contextmanager
+def _transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """Run a block of statements as one write transaction."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _row_values(path: str, kind: str, st: os.stat_result,
+                derived_from: Optional[str]) -> Tuple[Any, ...]:
+    return (path, kind, os.path.dirname(path), os.path.basename(path), st.st_size,
+            st.st_mtime, st.st_ctime, derived_from, time.time())
+
+
+def register(path: str, kind: str, derived_from: Optional[str] = None) -> None:
+    """
+    Add or refresh an artifact after it has been written.
+
+    Args:
+        path: Path to the file
+        kind: Artifact kind
+        derived_from: Path of the artifact this one was produced from
+    """
+    try:
+        path = os.path.normpath(path)
+        st = os.stat(path)
+        if derived_from is not None:
+            derived_from = os.path.normpath(derived_from)
+        conn = _connect()
+        with _transaction(conn):
+            # Keep a lineage recorded earlier if this write doesn't know it
+            conn.execute(
+                "INSERT INTO artifacts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET kind = excluded.kind, size = excluded.size, "
+                "mtime = excluded.mtime, ctime = excluded.ctime, "
+                "derived_from = COALESCE(excluded.derived_from, artifacts.derived_from)",
+                _row_values(path, kind, st, derived_from)
+            )
+    except Exception as e:
+        print(f"Error updating catalog for {path}: {e}")
+
+
+def unregister(path: str) -> None:
+    """
+    Remove an artifact after its file has been deleted.
+
+    Args:
+        path: Path to the file
+    """
+    try:
+        conn = _connect()
+        with _transaction(conn):
+            conn.execute("DELETE FROM artifacts WHERE path = ?", (os.path.normpath(path),))
+    except Exception as e:
+        print(f"Error updating catalog for {path}: {e}")
+
+
+def _reconcile(conn: sqlite3.Connection, kind: str) -> None:
+    """Bring a kind's rows in line with its directory if the directory changed."""
+    directory, extensions, _ = _kinds[kind]
+    try:
+        dir_mtime = os.stat(directory).st_mtime_ns
+    except FileNotFoundError:
+        return
+
+    row = conn.execute("SELECT mtime_ns FROM directories WHERE kind = ? AND directory = ?",
+                       (kind, directory)).fetchone()
+    if row is not None and row["mtime_ns"] == dir_mtime:
+        return
+
+    names = {name for name in os.listdir(directory) if name.lower().endswith(extensions)}
+    known = {r["name"] for r in conn.execute(
+        "SELECT name FROM artifacts WHERE kind = ? AND directory = ?", (kind, directory))}
+
+    added = []
+    for name in names - known:
+        path = os.path.join(directory, name)
+        try:
+            added.append(_row_values(path, kind, os.stat(path), None))
+        except FileNotFoundError:
+            continue
+
+    with _transaction(conn):
+        conn.executemany("DELETE FROM artifacts WHERE path = ?",
+                         [(os.path.join(directory, name),) for name in known - names])
+        conn.executemany("INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", added)
+        conn.execute("INSERT OR REPLACE INTO directories VALUES (?, ?, ?)", (kind, directory, dir_mtime))
+
+
+def refresh(kind: str) -> None:
+    """
+    Reconcile a kind's rows with its directory if the directory changed.
+
+    Args:
+        kind: Artifact kind declared with ``define_kind``
+    """
+    _reconcile(_connect(), kind)
+
+
+def list_artifacts(kind: str) -> List[Dict[str, Any]]:
+    """
+    List a kind's artifacts, newest first.
+
+    Args:
+        kind: Artifact kind declared with ``define_kind``
+
+    Returns:
+        List[Dict[str, Any]]: Rows with path, name, size, mtime, ctime and derived_from
+    """
+    directory, _, order = _kinds[kind]
+    conn = _connect()
+    _reconcile(conn, kind)
+    rows = [dict(row) for row in conn.execute(_LIST_QUERIES[order], (kind, directory))]
+    _positions()[kind] = (_version(conn), [row["path"] for row in rows])
+    return rows
+
+
+def count_artifacts(kind: str) -> int:
+    """
+    Count a kind's artifacts.
+
+    Args:
+        kind: Artifact kind declared with ``define_kind``
+
+    Returns:
+        int: Number of artifacts
+    """
+    directory, _, _ = _kinds[kind]
+    conn = _connect()
+    _reconcile(conn, kind)
+    return conn.execute("SELECT COUNT(*) FROM artifacts WHERE kind = ? AND directory = ?",
+                        (kind, directory)).fetchone()[0]
+
+
+def get_artifact(kind: str, index: int) -> Optional[Dict[str, Any]]:
+    """
+    Get the artifact at a position in the newest-first listing.
+
+    Positions are resolved against the paths saved by the last ``list_artifacts``
+    call on this thread, so picking from a menu is a primary-key lookup. If the
+    catalog changed since that listing, the position is read with one
+    ``LIMIT 1 OFFSET`` query instead, which costs O(index).
+
+    Args:
+        kind: Artifact kind declared with ``define_kind``
+        index: 1-based position, as shown by the listing menus
+
+    Returns:
+        Optional[Dict[str, Any]]: The artifact row or None if the index is out of range
+    """
+    if index < 1:
+        return None
+    directory, _, order = _kinds[kind]
+    conn = _connect()
+    _reconcile(conn, kind)
+    version, paths = _positions().get(kind, (None, []))
+    if version == _version(conn):
+        if index > len(paths):
+            return None
+        row = conn.execute(_BY_PATH_QUERY, (paths[index - 1],)).fetchone()
+    else:
+        row = conn.execute(_POSITION_QUERIES[order], (kind, directory, index - 1)).fetchone()
+    return dict(row) if row is not None else None
+
+
+def derived(path: str) -> List[Dict[str, Any]]:
+    """
+    List the artifacts produced from a file (e.g. the transcripts of a recording).
+
+    Args:
+        path: Path to the source artifact
+
+    Returns:
+        List[Dict[str, Any]]: Derived artifact rows, newest first
+    """
+    rows = _connect().execute(_DERIVED_QUERY, (os.path.normpath(path),))
+    return [dict(row) for row in rows]
+
+
+def lineage(path: str) -> List[str]:
+    """
+    Follow ``derived_from`` links back to the original artifact.
+
+    Args:
+        path: Path to an artifact
+
+    Returns:
+        List[str]: The artifact's ancestors, nearest first
+    """
+    conn = _connect()
+    ancestors: List[str] = []
+    current = os.path.normpath(path)
+    while len(ancestors) < 100:
+        row = conn.execute("SELECT derived_from FROM artifacts WHERE path = ?", (current,)).fetchone()
+        if row is None or row["derived_from"] is None or row["derived_from"] in ancestors:
+            break
+        current = row["derived_from"]
+        ancestors.append(current)
+    return ancestors
@@ -1,17 +1,19 @@
 import os
 import sys
+import time
 import argparse
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import datetime, timedelta
 from rich.console import Console
 from rich.panel import Panel
 from rich.prompt import Prompt, IntPrompt, Confirm
+from rich.markup import escape
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 # Import modules from the package
-from whisper_transcription_tool import audio, transcription, processors, image_gen, config
+from whisper_transcription_tool import audio, transcription, processors, image_gen, config, client, scheduler, hedging, search, jobs, engines
 
 # Initialize Rich console
 console = Console()
@@ -44,6 +46,8 @@ def display_main_menu() -> None:
     console.print("[3] Process Transcript")
     console.print("[4] Generate Image")
     console.print("[5] File Management")
+    console.print("[6] Search Transcripts")
+    console.print("[7] Converse Across Transcripts")
     console.print("[0] Exit")
 
 
@@ -57,6 +61,7 @@ def display_process_menu() -> None:
     print("5. Translate Transcript")
     print("6. Analyze Sentiment")
     print("7. Converse with AI Assistant")
+    print("8. Run All Analyses (summary, key points, action items, sentiment)")
     print("0. Back to Main Menu")
 
 
@@ -71,6 +76,104 @@ def display_file_menu() -> None:
     console.print("[0] Back to Main Menu")
 
 
+def display_batch_summary(summary: Dict[str, Any]) -> None:
+    """
+    Display the throughput summary of a batch transcription run.
+    
+    Args:
+        summary: Summary returned by ``transcription.transcribe_directory``
+    """
+    console.print(Panel("[bold]Batch Transcription Summary[/]", style="blue"))
+    console.print(f"Files found:       {summary['files']}")
+    console.print(f"Transcribed:       {summary['transcribed']}")
+    console.print(f"Skipped (done):    {summary['skipped']}")
+    console.print(f"Failed:            {len(summary['failed'])}")
+    console.print(f"Elapsed:           {summary['elapsed_seconds']:.1f} s")
+    console.print(f"Throughput:        {summary['files_per_minute']:.1f} files/minute, "
+                  f"{summary['audio_hours_per_hour']:.1f} audio-hours/hour")
+    for stats in scheduler.scheduler_stats().values():
+        console.print(f"API {stats['endpoint']:<14} {stats['successes']} ok, {stats['throttled']} throttled, "
+                      f"{stats['retries']} retries, concurrency {stats['concurrency_limit']}")
+    for stats in hedging.hedging_stats().values():
+        if stats["enabled"]:
+            console.print(f"Hedging {stats['endpoint']:<10} {stats['hedges_fired']} of {stats['requests']} "
+                          f"requests hedged, {stats['hedges_won']} hedges won")
+    for path in summary["failed"]:
+        console.print(f"[bold red]Failed:[/] {path}")
+
+
+def display_job_status() -> None:
+    """Display job counts per stage and the most recent failures."""
+    counts = jobs.job_counts()
+    console.print(Panel("[bold]Job Queue[/]", style="blue"))
+    if not counts:
+        console.print("[yellow]No jobs queued.[/]")
+        return
+    for stage, by_status in counts.items():
+        console.print(f"{stage:<12} " + ", ".join(f"{n} {status}" for status, n in by_status.items()))
+    for job in jobs.list_jobs(status="failed", limit=10):
+        console.print(f"[bold red]Failed:[/] job {job['id']} ({job['stage']}, "
+                      f"{escape(job['input_path'] or str(job['options']))}): {escape(job['error'] or '')}")
+
+
+def display_search_results(query: str, limit: int = 10) -> None:
+    """
+    Search transcripts and processed outputs and display ranked snippets.
+    
+    Args:
+        query: Words to find; "quoted text" matches an exact phrase
+        limit: Maximum number of results
+    """
+    start_time = time.perf_counter()
+    results = search.search(query, limit=limit)
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    
+    if not results:
+        console.print(f"[yellow]No matches for {escape(query)} ({elapsed_ms:.1f} ms).[/]")
+        return
+        
+    console.print(Panel(f"[bold]{len(results)} matches for {escape(query)}[/] ({elapsed_ms:.1f} ms)", style="blue"))
+    for i, result in enumerate(results, 1):
+        snippet = escape(result["snippet"]).replace(search.HIGHLIGHT_START, "[bold yellow]")
+        snippet = snippet.replace(search.HIGHLIGHT_END, "[/]")
+        console.print(f"[{i}] [cyan]{escape(result['path'])}[/] [dim]({result['kind']}, score {result['score']:.2f})[/]")
+        console.print(f"    {snippet}")
+
+
+def search_workflow() -> None:
+    """Handle the transcript search workflow."""
+    try:
+        query = Prompt.ask("Search for (use \"quotes\" for exact phrases)")
+        if query.strip():
+            display_search_results(query)
+    except Exception as e:
+        console.print(f"[bold red]Error in search workflow:[/] {str(e)}")
+
+
+def multi_transcript_conversation_workflow() -> None:
+    """Handle a conversation about every transcript in a date range."""
+    try:
+        start = Prompt.ask("From date (YYYY-MM-DD, blank for the first transcript)", default="")
+        end = Prompt.ask("To date, inclusive (YYYY-MM-DD, blank for today)", default="")
+        try:
+            start_date = datetime.strptime(start, "%Y-%m-%d") if start.strip() else None
+            end_date = datetime.strptime(end, "%Y-%m-%d") + timedelta(days=1) if end.strip() else None
+        except ValueError:
+            console.print("[bold red]Invalid date.[/] Use the YYYY-MM-DD format.")
+            return
+        
+        paths = transcription.transcripts_between(start_date, end_date)
+        if not paths:
+            console.print("[yellow]No transcripts found in that date range.[/]")
+            return
+        console.print(f"Conversing about {len(paths)} transcripts.")
+        
+        from whisper_transcription_tool import conversation
+        conversation.interactive_conversation(documents=paths)
+    except Exception as e:
+        console.print(f"[bold red]Error in conversation workflow:[/] {str(e)}")
+
+
 def record_audio_workflow() -> None:
     """Handle the audio recording workflow."""
     try:
@@ -93,6 +196,9 @@ def record_audio_workflow() -> None:
             transcribe_now = input("Would you like to transcribe this recording now? (y/n): ").lower()
             if transcribe_now == 'y':
                 transcribe_audio_workflow(audio_file)
+            elif input("Queue it for transcription and summary instead? (y/n): ").lower() == 'y':
+                job_ids = jobs.enqueue_pipeline(audio_file, tasks=["summary"])
+                print(f"Queued jobs {', '.join(map(str, job_ids))}. Run them with --run-jobs.")
         
     except KeyboardInterrupt:
         print("\nRecording interrupted.")
@@ -184,6 +290,7 @@ def process_transcript_workflow() -> None:
             if index == 0:
                 return
             transcript = transcription.get_transcript_content(index)
+            source_path = transcription.get_transcript_file_path(index)
         except ValueError:
             print("Invalid input.")
             return
@@ -191,6 +298,9 @@ def process_transcript_workflow() -> None:
         if not transcript:
             return
             
+        # Streamed results are displayed as they are generated
+        stream = config.STREAM_SETTINGS["enabled"]
+        
         # Display processing options
         while True:
             display_process_menu()
@@ -199,22 +309,22 @@ def process_transcript_workflow() -> None:
             if choice == '0':
                 break
             elif choice == '1':
-                summary = processors.get_summary(transcript)
-                if summary:
+                summary = processors.get_summary(transcript, source_path=source_path, stream=stream)
+                if summary and not stream:
                     print("\nSummary:")
                     print("-" * 50)
                     print(summary)
                     print("-" * 50)
             elif choice == '2':
-                key_points = processors.get_key_points(transcript)
-                if key_points:
+                key_points = processors.get_key_points(transcript, source_path=source_path, stream=stream)
+                if key_points and not stream:
                     print("\nKey Points:")
                     print("-" * 50)
                     print(key_points)
                     print("-" * 50)
             elif choice == '3':
-                action_items = processors.get_action_items(transcript)
-                if action_items:
+                action_items = processors.get_action_items(transcript, source_path=source_path, stream=stream)
+                if action_items and not stream:
                     print("\nAction Items:")
                     print("-" * 50)
                     print(action_items)
@@ -239,9 +349,10 @@ def process_transcript_workflow() -> None:
                 }
                 
                 format_type = format_map.get(format_choice, 'clean')
-                reformatted = processors.reformat_transcript(transcript, format_type)
+                reformatted = processors.reformat_transcript(transcript, format_type, source_path=source_path,
+                                                             stream=stream)
                 
-                if reformatted:
+                if reformatted and not stream:
                     print("\nReformatted Transcript:")
                     print("-" * 50)
                     print(reformatted[:300] + "..." if len(reformatted) > 300 else reformatted)
@@ -249,18 +360,19 @@ def process_transcript_workflow() -> None:
                     print(f"Full reformatted transcript saved to file.")
             elif choice == '5':
                 target_language = input("Enter target language: ")
-                translated = processors.translate_transcript(transcript, target_language)
+                translated = processors.translate_transcript(transcript, target_language, source_path=source_path,
+                                                             stream=stream)
                 
-                if translated:
+                if translated and not stream:
                     print("\nTranslated Transcript:")
                     print("-" * 50)
                     print(translated[:300] + "..." if len(translated) > 300 else translated)
                     print("-" * 50)
                     print(f"Full translation saved to file.")
             elif choice == '6':
-                sentiment = processors.analyze_sentiment(transcript)
+                sentiment = processors.analyze_sentiment(transcript, source_path=source_path, stream=stream)
                 
-                if sentiment:
+                if sentiment and not stream:
                     print("\nSentiment Analysis:")
                     print("-" * 50)
                     print(sentiment)
@@ -268,10 +380,23 @@ def process_transcript_workflow() -> None:
             elif choice == '7':
                 # Start conversation with the assistant
                 from whisper_transcription_tool import conversation
-                conversation.interactive_conversation(transcript)
+                conversation.interactive_conversation(transcript, source_path)
+            elif choice == '8':
+                results = processors.analyze_all(transcript, source_path=source_path)
+                for task, text in results.items():
+                    if text:
+                        print(f"\n{processors.ANALYSES[task][1]}:")
+                        print("-" * 50)
+                        print(text)
+                        print("-" * 50)
             else:
                 print("Invalid choice. Please try again.")
         
+        stats = client.get_llm_cache().stats()
+        if stats["memory_hits"] + stats["disk_hits"] + stats["misses"]:
+            console.print(f"[dim]GPT response cache: {stats['memory_hits'] + stats['disk_hits']} hits, "
+                          f"{stats['misses']} misses ({stats['hit_ratio']:.0%} hit ratio)[/]")
+        
     except Exception as e:
         print(f"Error in processing workflow: {e}")
 
@@ -307,6 +432,7 @@ def generate_image_workflow() -> None:
                 
             try:
                 transcript = transcription.get_transcript_content(file_index)
+                source_path = transcription.get_transcript_file_path(file_index)
                 if not transcript:
                     return
             except ValueError:
@@ -321,7 +447,7 @@ def generate_image_workflow() -> None:
             quality = "hd" if quality_choice == "2" else "standard"
                 
             # Generate image from transcript
-            image_path = image_gen.generate_image_from_transcript(transcript, quality=quality)
+            image_path = image_gen.generate_image_from_transcript(transcript, quality=quality, source_path=source_path)
             
         elif choice == '2':
             # Generate from custom prompt
@@ -390,6 +516,13 @@ def file_management_workflow() -> None:
                     console.print("[yellow]No conversation files found.[/]")
                 else:
                     console.print(Panel("[bold]Available conversation files[/]", style="blue"))
+                    file_index = IntPrompt.ask("Enter the number of a conversation to resume (or 0 to go back)", default=0)
+                    if file_index != 0:
+                        file_path = conversation.get_conversation_file_path(file_index)
+                        loaded = conversation.load_conversation(file_path, conversation.RESUME_TURNS) if file_path else None
+                        if loaded is not None:
+                            loaded.display_conversation()
+                            conversation.interactive_conversation(conversation=loaded)
                     
             elif choice == '5':
                 # Delete file
@@ -508,12 +641,8 @@ def file_management_workflow() -> None:
                         
                     if file_path and os.path.exists(file_path):
                         confirm = Confirm.ask(f"Are you sure you want to delete {os.path.basename(file_path)}?")
-                        if confirm:
-                            try:
-                                os.remove(file_path)
-                                console.print("[bold green]File deleted successfully.[/]")
-                            except Exception as e:
-                                console.print(f"[bold red]Error deleting file:[/] {str(e)}")
+                        if confirm and conversation.delete_conversation(file_path):
+                            console.print("[bold green]File deleted successfully.[/]")
                 else:
                     console.print("[bold red]Invalid choice.[/]")
             else:
@@ -530,31 +659,136 @@ def main() -> None:
     parser.add_argument("--record", action="store_true", help="Record audio")
     parser.add_argument("--transcribe", metavar="FILE", help="Transcribe audio file")
     parser.add_argument("--duration", type=int, default=0, help="Recording duration in seconds (0 for manual stop)")
+    parser.add_argument("--rate", type=int, default=audio.RATE, help=f"Recording sample rate in Hz ({audio.WHISPER_RATE} records upload-ready audio)")
+    parser.add_argument("--transcribe-dir", metavar="DIR", help="Transcribe every audio file in a directory concurrently")
+    parser.add_argument("--trim-silence", action="store_true", help="Compress long silences before uploading for transcription")
+    parser.add_argument("--chunked", action="store_true", help="Split long audio at silences and transcribe segments in parallel")
+    parser.add_argument("--codec", choices=["auto", "wav", "flac", "opus"], default=transcription.UPLOAD_CODEC, help="Upload encoding for transcription requests")
+    parser.add_argument("--engine", choices=list(engines.ENGINES), default=None, help="Transcription engine (default from config: OpenAI API, local CPU Whisper or offline stub)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached transcriptions and GPT responses and always call the API")
+    parser.add_argument("--cache-stats", action="store_true", help="Show transcription and GPT response cache statistics")
+    parser.add_argument("--no-stream", action="store_true", help="Wait for complete GPT responses instead of showing them as they are generated")
+    parser.add_argument("--hedge", action="store_true", help="Send a duplicate request when a transcription or chat call is slower than usual")
+    parser.add_argument("--workers", type=int, default=transcription.MAX_WORKERS, help="Maximum concurrent transcription requests")
+    parser.add_argument("--enqueue", metavar="PATH", help="Queue transcription and processing jobs for an audio file or directory")
+    parser.add_argument("--tasks", default="summary", help=f"Comma-separated processing tasks for queued jobs ({', '.join(processors.TASKS)})")
+    parser.add_argument("--run-jobs", action="store_true", help="Run queued jobs, resuming any interrupted ones")
+    parser.add_argument("--jobs-status", action="store_true", help="Show the job queue")
+    parser.add_argument("--search", metavar="QUERY", help="Search transcripts and processed outputs")
+    parser.add_argument("--limit", type=int, default=10, help="Maximum number of search results")
+    parser.add_argument("--reindex", action="store_true", help="Rebuild the search index from the files on disk")
     args = parser.parse_args()
     
     # Create necessary directories
     config.create_directories()
     
-    # Load OpenAI API key
-    if not load_api_key():
+    if args.no_cache:
+        config.LLM_CACHE_SETTINGS["enabled"] = False
+    if args.no_stream:
+        config.STREAM_SETTINGS["enabled"] = False
+    
+    if args.cache_stats:
+        stats = transcription.cache_stats()
+        total = stats["total"]
+        console.print(Panel("[bold]Transcription Cache[/]", style="blue"))
+        console.print(f"Entries: {stats['entries']} ({stats['bytes'] / (1024 * 1024):.1f} of "
+                      f"{stats['max_bytes'] / (1024 * 1024):.0f} MB)")
+        console.print(f"All runs: {total['hits']} hits, {total['misses']} misses "
+                      f"({total['hit_ratio']:.0%} hit ratio), {total['evictions']} evictions")
+        stats = client.get_llm_cache().stats()
+        total = stats["total"]
+        console.print(Panel("[bold]GPT Response Cache[/]", style="blue"))
+        console.print(f"Entries: {stats['entries']} ({stats['bytes'] / (1024 * 1024):.1f} of "
+                      f"{stats['max_bytes'] / (1024 * 1024):.0f} MB)")
+        console.print(f"All runs: {total['memory_hits'] + total['disk_hits']} hits "
+                      f"({total['memory_hits']} from memory), {total['misses']} misses "
+                      f"({total['hit_ratio']:.0%} hit ratio), {total['expired']} expired")
+        sys.exit(0)
+    
+    if args.jobs_status:
+        display_job_status()
+        sys.exit(0)
+    
+    if args.enqueue:
+        if os.path.isdir(args.enqueue):
+            files = sorted(os.path.join(args.enqueue, f) for f in os.listdir(args.enqueue)
+                           if f.lower().endswith(transcription.AUDIO_EXTENSIONS))
+        elif os.path.exists(args.enqueue):
+            files = [args.enqueue]
+        else:
+            console.print(f"[bold red]Error:[/] {args.enqueue} not found.")
+            sys.exit(1)
+        tasks = [task.strip() for task in args.tasks.split(",") if task.strip()]
+        unknown = [task for task in tasks if task not in processors.TASKS]
+        if unknown:
+            console.print(f"[bold red]Error:[/] Unknown tasks: {', '.join(unknown)}")
+            sys.exit(1)
+        options = {"trim_silence": args.trim_silence, "codec": args.codec, "use_cache": not args.no_cache}
+        if args.engine:
+            options["engine"] = args.engine
+        for path in files:
+            jobs.enqueue_pipeline(path, tasks=tasks, transcribe_options=options)
+        console.print(f"Queued {len(files)} files ({', '.join(tasks) or 'transcription only'}).")
+        if not args.run_jobs:
+            sys.exit(0)
+    
+    if args.reindex or args.search:
+        if args.reindex:
+            search.rebuild()
+        if args.search:
+            display_search_results(args.search, args.limit)
+        sys.exit(0)
+    
+    # Load OpenAI API key (transcribing with an in-process engine doesn't need one)
+    offline = (args.transcribe or args.transcribe_dir) and not engines.get_engine(args.engine).remote
+    if not offline and not load_api_key():
         sys.exit(1)
+    
+    if args.hedge:
+        hedging.enable("transcription", "chat")
         
     # Handle command-line actions
     if args.record:
-        audio.record_audio(args.duration)
+        audio.record_audio(args.duration, rate=args.rate)
         sys.exit(0)
     elif args.transcribe:
         if os.path.exists(args.transcribe):
-            transcription.transcribe_audio(args.transcribe)
+            if args.chunked:
+                transcription.transcribe_audio_chunked(args.transcribe, max_workers=args.workers, codec=args.codec,
+                                                       use_cache=not args.no_cache, engine=args.engine,
+                                                       trim_silence=args.trim_silence)
+            else:
+                transcription.transcribe_audio(args.transcribe, trim_silence=args.trim_silence, codec=args.codec,
+                                               use_cache=not args.no_cache, engine=args.engine)
+            stats = transcription.cache_stats()
+            console.print(f"[dim]Cache: {stats['hits']} hits, {stats['misses']} misses[/]")
         else:
             console.print(f"[bold red]Error:[/] File {args.transcribe} not found.")
         sys.exit(0)
     
+    elif args.run_jobs:
+        summary = jobs.run_jobs(max_workers=args.workers)
+        console.print(f"Jobs completed: {summary['completed']}, failed attempts: {summary['failed']} "
+                      f"in {summary['elapsed_seconds']:.1f} s")
+        display_job_status()
+        sys.exit(0)
+    
+    elif args.transcribe_dir:
+        if os.path.isdir(args.transcribe_dir):
+            summary = transcription.transcribe_directory(
+                args.transcribe_dir, max_workers=args.workers, trim_silence=args.trim_silence,
+                codec=args.codec, use_cache=not args.no_cache, engine=args.engine
+            )
+            display_batch_summary(summary)
+        else:
+            console.print(f"[bold red]Error:[/] Directory {args.transcribe_dir} not found.")
+        sys.exit(0)
+    
     # Main application loop
     try:
         while True:
             display_main_menu()
-            choice = Prompt.ask("Enter your choice", choices=["0", "1", "2", "3", "4", "5"], default="0")
+            choice = Prompt.ask("Enter your choice", choices=["0", "1", "2", "3", "4", "5", "6", "7"], default="0")
             
             if choice == '0':
                 console.print("[green]Exiting...[/]")
@@ -569,6 +803,10 @@ def main() -> None:
                 generate_image_workflow()
             elif choice == '5':
                 file_management_workflow()
+            elif choice == '6':
+                search_workflow()
+            elif choice == '7':
+                multi_transcript_conversation_workflow()
             else:
                 console.print("[bold red]Invalid choice. Please try again.[/]")
     except KeyboardInterrupt:
@@ -0,0 +1,418 @@
+"""
+Shared OpenAI API clients for the Whisper Transcription Tool.
+
+All API calls go through the helpers here so they share one connection pool per
+client, are paced by the per-endpoint schedulers in ``scheduler`` and can be
+hedged against slow responses (see ``hedging``). The clients
+are created with SDK retries disabled because the scheduler owns retries.
+Chat completions can opt in to the response cache (``cache.LLMCache``) and can be
+streamed (``stream_chat_completion``).
+"""
+import os
+import time
+import threading
+import openai
+from openai.types.chat import ChatCompletion
+from typing import Optional, Any, Callable, Dict, List, Tuple
+from whisper_transcription_tool import cache, config, scheduler, hedging
+
+# Completion budget assumed when a chat request doesn't set max_tokens
+DEFAULT_COMPLETION_TOKENS = 1000
+
+_client: Optional[openai.OpenAI] = None
+_async_client: Optional[openai.AsyncOpenAI] = None
+_llm_cache: Optional[cache.LLMCache] = None
+_lock = threading.Lock()
+
+
+def get_client() -> openai.OpenAI:
+    """
+    Get the process-wide synchronous OpenAI client.
+
+    Returns:
+        openai.OpenAI: The shared client
+    """
+    global _client
+    with _lock:
+        if _client is None:
+            _client = openai.OpenAI(api_key=openai.api_key, max_retries=0)
+        return _client
+
+
+def get_async_client() -> openai.AsyncOpenAI:
+    """
+    Get the process-wide asynchronous OpenAI client.
+
+    The client is created on first use with the same API key as the module-level
+    synchronous client, and is shared by every async call so all requests reuse
+    one connection pool.
+
+    Returns:
+        openai.AsyncOpenAI: The shared async client
+    """
+    global _async_client
+    with _lock:
+        if _async_client is None:
+            _async_client = openai.AsyncOpenAI(api_key=openai.api_key, max_retries=0)
+        return _async_client
+
+
+def get_llm_cache() -> cache.LLMCache:
+    """
+    Get the process-wide chat completion cache, configured from ``config.LLM_CACHE_SETTINGS``.
+
+    Returns:
+        cache.LLMCache: The shared cache
+    """
+    global _llm_cache
+    with _lock:
+        if _llm_cache is None:
+            settings = config.LLM_CACHE_SETTINGS
+            _llm_cache = cache.LLMCache(os.path.join(cache.CACHE_DIR, "llm"),
+                                        max_entries=settings["max_entries"],
+                                        max_bytes=settings["max_bytes"],
+                                        ttl_seconds=settings["ttl_seconds"])
+        return _llm_cache
+
+
+def _chat_cache_key(use_cache: bool, kwargs: Dict[str, Any]) -> Optional[str]:
+    """Get the cache key for a chat request, or None if the request isn't cached."""
+    if not use_cache or not config.LLM_CACHE_SETTINGS["enabled"] or kwargs.get("stream"):
+        return None
+    params = {key: value for key, value in kwargs.items() if key not in ("model", "messages")}
+    return cache.LLMCache.make_key(kwargs.get("model"), kwargs.get("messages", []), **params)
+
+
+def _cached_completion(key: Optional[str]) -> Optional[ChatCompletion]:
+    if key is None:
+        return None
+    hit = get_llm_cache().get(key)
+    return ChatCompletion.model_validate(hit) if hit is not None else None
+
+
+def _store_completion(key: Optional[str], response: Any) -> None:
+    if key is not None:
+        get_llm_cache().put(key, response.model_dump(mode="json"))
+
+
+def estimate_chat_tokens(messages: List[Dict[str, Any]], max_tokens: Optional[int] = None) -> int:
+    """
+    Roughly estimate the tokens a chat request will be billed for.
+
+    Args:
+        messages: The request messages
+        max_tokens: The completion limit, if set
+
+    Returns:
+        int: Prompt estimate (about four characters per token) plus the completion budget
+    """
+    prompt_chars = sum(len(str(message.get("content", ""))) for message in messages)
+    return prompt_chars // 4 + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+def _upload_stream(file: Any) -> Any:
+    """Get the seekable stream behind a ``file`` argument (handle or (name, stream) tuple)."""
+    stream = file[1] if isinstance(file, tuple) else file
+    return stream if hasattr(stream, "seek") else None
+
+
+def _upload_megabytes(file: Any) -> float:
+    """Size of an upload in MB, the cost unit for transcription hedging."""
+    if isinstance(file, tuple) and isinstance(file[1], bytes):
+        return len(file[1]) / 1e6
+    stream = _upload_stream(file)
+    if stream is None:
+        return 1.0
+    position = stream.tell()
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(position)
+    return size / 1e6
+
+
+def _materialize_upload(file: Any) -> Tuple[str, bytes]:
+    """
+    Read an upload into a (name, bytes) tuple.
+
+    Hedged attempts run concurrently, so they can't share one stream position.
+    """
+    if isinstance(file, tuple):
+        name, stream = file[0], file[1]
+    else:
+        name, stream = os.path.basename(getattr(file, "name", "audio.wav")), file
+    if isinstance(stream, bytes):
+        return name, stream
+    stream.seek(0)
+    return name, stream.read()
+
+
+def chat_completion(hedge: Optional[bool] = None, use_cache: bool = False, **kwargs: Any) -> Any:
+    """
+    Create a chat completion through the chat scheduler.
+
+    Hedging happens inside the scheduler slot, so the hedge deadline measures
+    only the API call and not time spent queued behind the rate limits; the
+    duplicate takes a slot and budget of its own.
+
+    Args:
+        hedge: Hedge the request (None uses the chat hedge policy default)
+        use_cache: Return a cached response for an identical request (same model,
+            messages and parameters) and cache new responses
+        **kwargs: Arguments for ``chat.completions.create``
+
+    Returns:
+        Any: The chat completion
+    """
+    key = _chat_cache_key(use_cache, kwargs)
+    cached = _cached_completion(key)
+    if cached is not None:
+        return cached
+
+    create = get_client().chat.completions.with_raw_response.create
+    chat = scheduler.get_scheduler("chat")
+    estimated_tokens = estimate_chat_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+    response = chat.call(
+        hedging.get_policy("chat").run,
+        lambda: create(**kwargs),
+        hedge=hedge,
+        scheduler=chat,
+        tokens=estimated_tokens,
+        estimated_tokens=estimated_tokens
+    )
+    _store_completion(key, response)
+    return response
+
+
+async def chat_completion_async(hedge: Optional[bool] = None, use_cache: bool = False, **kwargs: Any) -> Any:
+    """Asynchronous twin of ``chat_completion``."""
+    key = _chat_cache_key(use_cache, kwargs)
+    cached = _cached_completion(key)
+    if cached is not None:
+        return cached
+
+    create = get_async_client().chat.completions.with_raw_response.create
+    chat = scheduler.get_scheduler("chat")
+    estimated_tokens = estimate_chat_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+    response = await chat.call_async(
+        hedging.get_policy("chat").run_async,
+        lambda: create(**kwargs),
+        hedge=hedge,
+        scheduler=chat,
+        tokens=estimated_tokens,
+        estimated_tokens=estimated_tokens
+    )
+    _store_completion(key, response)
+    return response
+
+
+class _StreamedResponse:
+    """
+    A fully read completion stream, shaped like a raw response so the scheduler
+    can read its rate limit headers and usage.
+    """
+
+    def __init__(self, headers: Any, completion: ChatCompletion):
+        self.headers = headers
+        self.completion = completion
+
+    def parse(self) -> ChatCompletion:
+        return self.completion
+
+
+class _StreamAssembler:
+    """Collects stream chunks into a ChatCompletion, passing text on as it arrives."""
+
+    def __init__(self, on_text: Callable[[str], None], on_start: Optional[Callable[[], None]], start_time: float):
+        self.on_text = on_text
+        self.on_start = on_start
+        self.start_time = start_time
+        self.first_token: Optional[float] = None
+
+    def begin(self) -> None:
+        """Start an attempt, discarding text from a failed earlier one."""
+        self.parts: List[str] = []
+        self.finish_reason = None
+        self.usage = None
+        self.last = None
+        if self.on_start is not None:
+            self.on_start()
+
+    def add(self, chunk: Any) -> None:
+        self.last = chunk
+        if chunk.usage is not None:
+            self.usage = chunk.usage
+        for choice in chunk.choices:
+            if choice.finish_reason:
+                self.finish_reason = choice.finish_reason
+            text = choice.delta.content
+            if text:
+                if self.first_token is None:
+                    self.first_token = time.monotonic() - self.start_time
+                self.parts.append(text)
+                self.on_text(text)
+
+    def completion(self) -> ChatCompletion:
+        return ChatCompletion.model_validate({
+            "id": getattr(self.last, "id", "stream"),
+            "object": "chat.completion",
+            "created": getattr(self.last, "created", int(time.time())),
+            "model": getattr(self.last, "model", ""),
+            "choices": [{
+                "index": 0,
+                "finish_reason": self.finish_reason or "stop",
+                "message": {"role": "assistant", "content": "".join(self.parts)}
+            }],
+            "usage": self.usage.model_dump() if self.usage is not None else None
+        })
+
+    def timing(self) -> Dict[str, float]:
+        total = time.monotonic() - self.start_time
+        return {"first_token": self.first_token if self.first_token is not None else total, "total": total}
+
+
+def _replay(completion: ChatCompletion, on_text: Callable[[str], None],
+            on_start: Optional[Callable[[], None]], start_time: float) -> Tuple[ChatCompletion, Dict[str, float]]:
+    """Deliver a cached completion through the stream callbacks in one piece."""
+    if on_start is not None:
+        on_start()
+    on_text(completion.choices[0].message.content or "")
+    elapsed = time.monotonic() - start_time
+    return completion, {"first_token": elapsed, "total": elapsed}
+
+
+def stream_chat_completion(on_text: Callable[[str], None], on_start: Optional[Callable[[], None]] = None,
+                           use_cache: bool = False, **kwargs: Any) -> Tuple[ChatCompletion, Dict[str, float]]:
+    """
+    Create a chat completion, passing its text to ``on_text`` as tokens arrive.
+
+    The whole stream is read inside one chat scheduler slot, so streamed requests
+    count against the same concurrency and token limits as blocking ones. Streams
+    are never hedged: two attempts would interleave their text. A request that
+    fails before it completes is retried like any other, with ``on_start`` called
+    before every attempt so the caller can drop text from the failed one.
+
+    Args:
+        on_text: Called with each piece of text, in order
+        on_start: Called before each attempt (and before a cached response is replayed)
+        use_cache: Serve and store the response in the response cache; the key is
+            the same as for the equivalent blocking request
+        **kwargs: Arguments for ``chat.completions.create`` (without ``stream``)
+
+    Returns:
+        Tuple[ChatCompletion, Dict[str, float]]: The assembled completion and its
+        timing: seconds to the first token ("first_token") and to the end ("total"),
+        both measured from the call, so time queued behind the rate limits counts
+    """
+    start_time = time.monotonic()
+    key = _chat_cache_key(use_cache, kwargs)
+    cached = _cached_completion(key)
+    if cached is not None:
+        return _replay(cached, on_text, on_start, start_time)
+
+    assembler = _StreamAssembler(on_text, on_start, start_time)
+    create = get_client().chat.completions.with_raw_response.create
+
+    def consume() -> _StreamedResponse:
+        assembler.begin()
+        raw = create(stream=True, stream_options={"include_usage": True}, **kwargs)
+        with raw.parse() as stream:
+            for chunk in stream:
+                assembler.add(chunk)
+        return _StreamedResponse(raw.headers, assembler.completion())
+
+    response = scheduler.get_scheduler("chat").call(
+        consume,
+        estimated_tokens=estimate_chat_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+    )
+    _store_completion(key, response)
+    return response, assembler.timing()
+
+
+async def stream_chat_completion_async(on_text: Callable[[str], None], on_start: Optional[Callable[[], None]] = None,
+                                       use_cache: bool = False,
+                                       **kwargs: Any) -> Tuple[ChatCompletion, Dict[str, float]]:
+    """Asynchronous twin of ``stream_chat_completion``."""
+    start_time = time.monotonic()
+    key = _chat_cache_key(use_cache, kwargs)
+    cached = _cached_completion(key)
+    if cached is not None:
+        return _replay(cached, on_text, on_start, start_time)
+
+    assembler = _StreamAssembler(on_text, on_start, start_time)
+    create = get_async_client().chat.completions.with_raw_response.create
+
+    async def consume() -> _StreamedResponse:
+        assembler.begin()
+        raw = await create(stream=True, stream_options={"include_usage": True}, **kwargs)
+        async with raw.parse() as stream:
+            async for chunk in stream:
+                assembler.add(chunk)
+        return _StreamedResponse(raw.headers, assembler.completion())
+
+    response = await scheduler.get_scheduler("chat").call_async(
+        consume,
+        estimated_tokens=estimate_chat_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+    )
+    _store_completion(key, response)
+    return response, assembler.timing()
+
+
+def transcribe(hedge: Optional[bool] = None, **kwargs: Any) -> Any:
+    """
+    Create a transcription through the transcription scheduler.
+
+    The upload stream is rewound before every attempt so retries resend the whole
+    file; hedged requests read it into memory once so both attempts can send it.
+
+    Args:
+        hedge: Hedge the request (None uses the transcription hedge policy default)
+        **kwargs: Arguments for ``audio.transcriptions.create``
+
+    Returns:
+        Any: The transcription
+    """
+    policy = hedging.get_policy("transcription")
+    if policy.active(hedge):
+        kwargs["file"] = _materialize_upload(kwargs["file"])
+    create = get_client().audio.transcriptions.with_raw_response.create
+    transcription = scheduler.get_scheduler("transcription")
+    return transcription.call(
+        policy.run,
+        lambda: create(**kwargs),
+        cost=_upload_megabytes(kwargs.get("file")),
+        hedge=hedge,
+        scheduler=transcription,
+        rewind=_upload_stream(kwargs.get("file"))
+    )
+
+
+async def transcribe_async(hedge: Optional[bool] = None, **kwargs: Any) -> Any:
+    """Asynchronous twin of ``transcribe``."""
+    policy = hedging.get_policy("transcription")
+    if policy.active(hedge):
+        kwargs["file"] = _materialize_upload(kwargs["file"])
+    create = get_async_client().audio.transcriptions.with_raw_response.create
+    transcription = scheduler.get_scheduler("transcription")
+    return await transcription.call_async(
+        policy.run_async,
+        lambda: create(**kwargs),
+        cost=_upload_megabytes(kwargs.get("file")),
+        hedge=hedge,
+        scheduler=transcription,
+        rewind=_upload_stream(kwargs.get("file"))
+    )
+
+
+def generate_image(**kwargs: Any) -> Any:
+    """
+    Generate images through the images scheduler.
+
+    Args:
+        **kwargs: Arguments for ``images.generate``
+
+    Returns:
+        Any: The images response
+    """
+    return scheduler.get_scheduler("images").call(
+        get_client().images.with_raw_response.generate,
+        **kwargs
+    )
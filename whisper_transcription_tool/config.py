@@ -13,14 +13,23 @@ AUDIO_SETTINGS = {
     "format": "paInt16",
     "channels": 1,
     "rate": 44100,
-    "chunk": 1024,
-    "temp_file": "temp_recording.wav"
+    "whisper_rate": 16000,
+    "chunk": 1024
 }
 
 # Transcription settings
 TRANSCRIPTION_SETTINGS = {
     "model": "whisper-1",
-    "response_format": "text"
+    "response_format": "text",
+    "engine": "openai"  # "openai", "local" (CPU Whisper) or "stub" (offline tests)
+}
+
+# Per-engine settings (see engines.py)
+ENGINE_SETTINGS = {
+    "openai": {"model": "whisper-1"},
+    # Weights are read from model_dir; "model" may also be a path to a checkpoint file
+    "local": {"model": "base", "model_dir": "models/whisper", "threads": None, "language": None},
+    "stub": {"words_per_second": 2.5, "realtime_factor": 0.0}
 }
 
 # Image generation settings
@@ -39,6 +48,50 @@ GPT_MODELS = {
     "formatting": "gpt-4.1"
 }
 
+# Rate limiting per API endpoint. The request/token budgets are starting points;
+# the scheduler replaces them with the limits reported in response headers.
+RATE_LIMIT_SETTINGS = {
+    "default": {"requests_per_minute": 500, "tokens_per_minute": 0, "max_concurrency": 4},
+    "chat": {"requests_per_minute": 500, "tokens_per_minute": 30000, "max_concurrency": 8,
+             "latency_tolerance": 3.0},
+    # Whisper latency scales with upload length, so latency isn't a congestion signal here
+    "transcription": {"requests_per_minute": 500, "tokens_per_minute": 0, "max_concurrency": 8},
+    "images": {"requests_per_minute": 5, "tokens_per_minute": 0, "max_concurrency": 2}
+}
+
+# Request hedging (opt-in). A duplicate request is sent when the original is slower
+# than the given latency percentile, for at most `budget` of all requests.
+HEDGE_SETTINGS = {
+    "default": {"enabled": False, "percentile": 0.95, "budget": 0.05},
+    "chat": {"enabled": False, "percentile": 0.95, "budget": 0.05},
+    # Transcription deadlines scale with upload size (latency is tracked per MB)
+    "transcription": {"enabled": False, "percentile": 0.95, "budget": 0.05}
+}
+
+# Chat completion response cache. Call sites opt in (see CACHE_RESPONSES in processors,
+# image_gen and conversation); "enabled" switches the cache off everywhere.
+LLM_CACHE_SETTINGS = {
+    "enabled": True,
+    "max_entries": 256,  # Responses kept in memory
+    "max_bytes": 64 * 1024 * 1024,  # On-disk budget
+    "ttl_seconds": 7 * 24 * 3600
+}
+
+# Streamed GPT output in the interactive CLI (processing results and conversation
+# replies render as tokens arrive); "enabled" switches streaming off
+STREAM_SETTINGS = {
+    "enabled": True,
+    "refresh_per_second": 8  # Redraws of the live view
+}
+
+# Conversation logs (data/conversation/*.jsonl): every message is appended as it
+# happens. fsync "always" makes each record durable before the next turn, "interval"
+# at most once per fsync_interval seconds, "never" leaves flushing to the OS.
+CONVERSATION_LOG_SETTINGS = {
+    "fsync": "always",
+    "fsync_interval": 1.0
+}
+
 # Create all required directories
 def create_directories() -> None:
     """Create all required directories for the application."""
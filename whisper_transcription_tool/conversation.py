@@ -1,17 +1,35 @@
 import os
+import re
 import json
-import openai
+import time
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from rich.console import Console
 from rich.panel import Panel
 from rich.markdown import Markdown
+from whisper_transcription_tool import catalog, client, config, conversation_log, history, retrieval, search, streaming, tokens
 
 # Constants
 CONVERSATION_DIR = "data/conversation"
+# Replies are sampled (temperature 0.7), so repeating a question should give a fresh answer
+CACHE_RESPONSES = False
+# Transcripts up to INLINE_TRANSCRIPT_TOKENS are sent whole with every question; longer
+# ones are indexed (see retrieval) and each question sends the RETRIEVAL_TOP_K most
+# relevant chunks. Earlier turns are resent as the newest HISTORY_TOKENS verbatim plus
+# a running summary of the rest (see history).
+INLINE_TRANSCRIPT_TOKENS = 3000
+RETRIEVAL_TOP_K = 6
+HISTORY_TOKENS = history.RECENT_TOKENS
+# Conversations over several transcripts retrieve DOCUMENTS_TOP_K chunks per question
+# from the persistent chunk index in ``search``
+DOCUMENTS_TOP_K = 8
+# Turns loaded when resuming a saved conversation (older ones live on in its summary)
+RESUME_TURNS = 20
 
 # Create necessary directories if they don't exist
 os.makedirs(CONVERSATION_DIR, exist_ok=True)
+# Conversations are JSONL logs (see conversation_log); .json files are from older versions
+catalog.define_kind("conversation", CONVERSATION_DIR, (".jsonl", ".json"))
 
 # Initialize Rich console
 console = Console()
@@ -19,18 +37,52 @@ console = Console()
 class Conversation:
     """Class to handle conversation with AI assistant."""
     
-    def __init__(self, transcript: Optional[str] = None):
+    def __init__(self, transcript: Optional[str] = None, source_path: Optional[str] = None,
+                 documents: Optional[List[str]] = None):
         """
         Initialize a new conversation.
         
         Args:
             transcript: Optional transcript to initialize the conversation context
+            source_path: The transcript file, recorded in the catalog as the conversation's source
+            documents: Transcript files to converse about instead of one transcript;
+                questions are answered from their most relevant chunks, with citations
         """
         self.history = []
         self.start_time = datetime.now()
+        self.source_path = source_path
+        self.index: Optional[retrieval.ChunkIndex] = None
+        self.history_manager = history.HistoryManager(HISTORY_TOKENS, on_summary=self._log_summary)
+        self.log: Optional[conversation_log.ConversationLog] = None
+        # Messages after the system message that weren't loaded (see load_conversation)
+        self.skipped = 0
+        self.documents = documents
+        # Citation labels of the excerpts sent with the latest question
+        self.sources: List[str] = []
         
-        # Add transcript as system message if provided
-        if transcript:
+        # Add transcript as system message if provided; long transcripts are indexed instead
+        if documents:
+            self.index_documents()
+            self.history.append({
+                "role": "system",
+                "content": (
+                    f"You are a helpful assistant. The user is asking about {len(documents)} transcripts. "
+                    "Excerpts relevant to their question are provided with each question, each labeled "
+                    "[transcript #part]. Answer from the excerpts and cite the label of every excerpt you "
+                    "use, e.g. [transcript_20250101_093000 #3]. Say so if they don't contain the answer."
+                )
+            })
+        elif transcript and tokens.count_tokens(transcript) > INLINE_TRANSCRIPT_TOKENS:
+            self.index = retrieval.ChunkIndex.from_text(transcript)
+            self.history.append({
+                "role": "system",
+                "content": (
+                    "You are a helpful assistant. The user is referring to a transcript. "
+                    "Excerpts of it relevant to their question are provided with each question; "
+                    "use them to answer, and say so if they don't contain the answer."
+                )
+            })
+        elif transcript:
             self.history.append({
                 "role": "system", 
                 "content": (
@@ -53,6 +105,7 @@ class Conversation:
             message: The message from the user
         """
         self.history.append({"role": "user", "content": message})
+        self._log_message(self.history[-1])
     
     def add_assistant_message(self, message: str) -> None:
         """
@@ -62,23 +115,117 @@ class Conversation:
             message: The message from the assistant
         """
         self.history.append({"role": "assistant", "content": message})
+        self._log_message(self.history[-1])
+    
+    def _open_log(self) -> conversation_log.ConversationLog:
+        """Get the conversation's log, creating it with every message so far on first use."""
+        if self.log is None:
+            timestamp = self.start_time.strftime("%Y%m%d_%H%M%S")
+            filepath = os.path.join(CONVERSATION_DIR, f"conversation_{timestamp}.jsonl")
+            self.log = conversation_log.ConversationLog(filepath, {
+                "timestamp": self.start_time.isoformat(),
+                "source_path": self.source_path,
+                "retrieval": self.index is not None,
+                "documents": self.documents
+            })
+            for message in self.history:
+                self.log.append_message(message)
+            catalog.register(filepath, "conversation", derived_from=self.source_path)
+        return self.log
+    
+    def _log_message(self, message: Dict[str, Any]) -> None:
+        """Append a message to the log, so a crash doesn't lose the session."""
+        try:
+            if self.log is None:
+                self._open_log()
+            else:
+                self.log.append_message(message)
+        except Exception as e:
+            console.print(f"[bold red]Error writing conversation log: {str(e)}[/]")
     
-    def get_assistant_response(self) -> str:
+    def _log_summary(self, summary: str, summarized: int) -> None:
+        """Record a running summary update (called from the history manager's thread)."""
+        if self.log is not None:
+            self.log.append_summary(summary, summarized + self.skipped)
+    
+    def request_messages(self) -> List[Dict[str, Any]]:
+        """
+        Build the messages sent for the next response.
+        
+        The system message, then (for an indexed transcript) the excerpts most
+        relevant to the last two questions, then the history from the history
+        manager: a summary of older turns and the newest messages verbatim. The
+        full history is kept for saving and display.
+        
+        Returns:
+            List[Dict[str, Any]]: The request messages
+        """
+        messages = [self.history[0]]
+        if self.documents:
+            question = next(message["content"] for message in reversed(self.history) if message["role"] == "user")
+            excerpts = search.search_chunks(question, self.documents, DOCUMENTS_TOP_K)
+            self.sources = [self._citation(excerpt) for excerpt in excerpts]
+            messages.append({
+                "role": "system",
+                "content": "Transcript excerpts, most relevant first:\n\n" + "\n\n".join(
+                    f"[{label}]\n{excerpt['body']}" for label, excerpt in zip(self.sources, excerpts)
+                ) if excerpts else "No transcript excerpts matched this question."
+            })
+        elif self.index is not None:
+            questions = [message["content"] for message in self.history if message["role"] == "user"][-2:]
+            excerpts = self.index.context(" ".join(questions), RETRIEVAL_TOP_K)
+            messages.append({
+                "role": "system",
+                "content": "Transcript excerpts, in transcript order:\n\n" + "\n\n[...]\n\n".join(excerpts)
+            })
+        messages.extend(self.history_manager.context(self.history[1:]))
+        return messages
+    
+    @staticmethod
+    def _citation(excerpt: Dict[str, Any]) -> str:
+        """Label of a retrieved chunk: the transcript's name and the chunk's 1-based number."""
+        return f"{os.path.splitext(os.path.basename(excerpt['path']))[0]} #{excerpt['chunk'] + 1}"
+    
+    def index_documents(self) -> None:
+        """Index the conversation's transcripts as chunks; unchanged ones are reused from earlier sessions."""
+        start_time = time.time()
+        count = search.index_chunks(self.documents)
+        if count:
+            console.print(f"[dim]Indexed {count} of {len(self.documents)} transcripts "
+                          f"in {time.time() - start_time:.2f} seconds.[/]")
+    
+    def get_assistant_response(self, stream: bool = False) -> str:
         """
         Generate a response from the assistant using the conversation history.
         
+        Args:
+            stream: Show the response in the console as it is generated
+        
         Returns:
             str: The assistant's response
         """
         try:
-            console.print("[bold blue]Assistant is thinking...[/]")
-            
-            response = openai.chat.completions.create(
-                model="gpt-4.1",
-                messages=self.history,
-                temperature=0.7,
-                max_tokens=1000
-            )
+            if stream:
+                with streaming.StreamDisplay("Assistant") as display:
+                    response, timing = client.stream_chat_completion(
+                        display.write,
+                        display.reset,
+                        use_cache=CACHE_RESPONSES,
+                        model="gpt-4.1",
+                        messages=self.request_messages(),
+                        temperature=0.7,
+                        max_tokens=1000
+                    )
+                streaming.report_timing(timing, getattr(response.usage, "completion_tokens", None))
+            else:
+                console.print("[bold blue]Assistant is thinking...[/]")
+                response = client.chat_completion(
+                    use_cache=CACHE_RESPONSES,
+                    model="gpt-4.1",
+                    messages=self.request_messages(),
+                    temperature=0.7,
+                    max_tokens=1000
+                )
             
             assistant_message = response.choices[0].message.content
             self.add_assistant_message(assistant_message)
@@ -92,26 +239,66 @@ class Conversation:
             self.add_assistant_message(fallback_message)
             return fallback_message
     
-    def save_conversation(self) -> Optional[str]:
+    async def get_assistant_response_async(self, stream: bool = False) -> str:
         """
-        Save the conversation history to a file.
+        Asynchronous twin of ``get_assistant_response`` using the shared async client.
+        
+        Args:
+            stream: Show the response in the console as it is generated
         
         Returns:
-            Optional[str]: Path to the saved file or None if saving failed
+            str: The assistant's response
         """
         try:
-            timestamp = self.start_time.strftime("%Y%m%d_%H%M%S")
-            filename = f"conversation_{timestamp}.json"
-            filepath = os.path.join(CONVERSATION_DIR, filename)
+            if stream:
+                with streaming.StreamDisplay("Assistant") as display:
+                    response, timing = await client.stream_chat_completion_async(
+                        display.write,
+                        display.reset,
+                        use_cache=CACHE_RESPONSES,
+                        model="gpt-4.1",
+                        messages=self.request_messages(),
+                        temperature=0.7,
+                        max_tokens=1000
+                    )
+                streaming.report_timing(timing, getattr(response.usage, "completion_tokens", None))
+            else:
+                console.print("[bold blue]Assistant is thinking...[/]")
+                response = await client.chat_completion_async(
+                    use_cache=CACHE_RESPONSES,
+                    model="gpt-4.1",
+                    messages=self.request_messages(),
+                    temperature=0.7,
+                    max_tokens=1000
+                )
             
-            # Create a conversation object to save
-            conversation_data = {
-                "timestamp": self.start_time.isoformat(),
-                "history": self.history
-            }
+            assistant_message = response.choices[0].message.content
+            self.add_assistant_message(assistant_message)
+            
+            return assistant_message
             
-            with open(filepath, "w", encoding="utf-8") as file:
-                json.dump(conversation_data, file, indent=2)
+        except Exception as e:
+            console.print(f"[bold red]Error getting assistant response: {str(e)}[/]")
+            fallback_message = "I'm sorry, I encountered an issue processing your request. Please try again."
+            self.add_assistant_message(fallback_message)
+            return fallback_message
+    
+    def save_conversation(self) -> Optional[str]:
+        """
+        Make sure the conversation is saved.
+        
+        Messages are appended to the conversation's log as they are added, so
+        this only creates the log for a conversation without messages yet, makes
+        the log durable and updates its catalog entry.
+        
+        Returns:
+            Optional[str]: Path to the saved file or None if saving failed
+        """
+        try:
+            log = self._open_log()
+            log.sync()
+            filepath = log.path
+            catalog.register(filepath, "conversation", derived_from=self.source_path)
                 
             console.print(f"[bold green]Conversation saved to {filepath}[/]")
             return filepath
@@ -129,15 +316,22 @@ class Conversation:
                 console.print(Panel(Markdown(message["content"]), title="Assistant", title_align="left", border_style="green"))
             # Skip system messages in display
 
-def interactive_conversation(transcript: Optional[str] = None) -> None:
+def interactive_conversation(transcript: Optional[str] = None, source_path: Optional[str] = None,
+                             conversation: Optional[Conversation] = None,
+                             documents: Optional[List[str]] = None) -> None:
     """
     Start an interactive conversation with the assistant.
     
     Args:
         transcript: Optional transcript to initialize the conversation context
+        source_path: The transcript file the conversation is about
+        conversation: A loaded conversation to resume instead of starting a new one
+        documents: Transcript files to converse about instead of one transcript
     """
     try:
-        conversation = Conversation(transcript)
+        if conversation is None:
+            conversation = Conversation(transcript, source_path, documents)
+        stream = config.STREAM_SETTINGS["enabled"]
         
         console.print(Panel(
             "[bold]Conversation with AI Assistant[/]\nType your questions below. Type 'exit', 'quit', or 'q' to end the conversation.",
@@ -153,9 +347,14 @@ def interactive_conversation(transcript: Optional[str] = None) -> None:
             
             conversation.add_user_message(user_input)
             
-            # Get and display assistant response
-            assistant_response = conversation.get_assistant_response()
-            console.print(Panel(Markdown(assistant_response), title="Assistant", border_style="green"))
+            # Get and display assistant response (a streamed response is displayed as it arrives)
+            assistant_response = conversation.get_assistant_response(stream=stream)
+            if not stream:
+                console.print(Panel(Markdown(assistant_response), title="Assistant", border_style="green"))
+            cited = [label for label in conversation.sources
+                     if re.search(re.escape(label) + r"(?!\d)", assistant_response)]
+            if cited:
+                console.print(f"[dim]Sources: {', '.join(cited)}[/]")
         
         # Save conversation when done
         conversation.save_conversation()
@@ -164,7 +363,7 @@ def interactive_conversation(transcript: Optional[str] = None) -> None:
     except KeyboardInterrupt:
         console.print("\n[bold blue]Conversation interrupted.[/]")
         # Try to save the conversation if it was interrupted
-        if 'conversation' in locals():
+        if conversation is not None:
             conversation.save_conversation()
     except Exception as e:
         console.print(f"[bold red]Error in conversation: {str(e)}[/]")
@@ -177,25 +376,27 @@ def list_conversations() -> List[str]:
         List[str]: List of formatted conversation file descriptions
     """
     try:
-        files = os.listdir(CONVERSATION_DIR)
-        conversation_files = [f for f in files if f.lower().endswith('.json')]
+        # The catalog returns conversations sorted by modification time (newest first)
+        conversation_files = catalog.list_artifacts("conversation")
         
         if not conversation_files:
             console.print("[yellow]No conversation files found.[/]")
             return []
-            
-        # Sort files by modification time (newest first)
-        conversation_files.sort(key=lambda x: os.path.getmtime(os.path.join(CONVERSATION_DIR, x)), reverse=True)
         
         # Format the list for display
         formatted_list = []
-        for i, file in enumerate(conversation_files):
-            file_path = os.path.join(CONVERSATION_DIR, file)
-            size_kb = os.path.getsize(file_path) / 1024
-            mod_time = datetime.fromtimestamp(os.path.getmtime(file_path)).strftime("%Y-%m-%d %H:%M:%S")
+        for i, entry in enumerate(conversation_files):
+            file = entry["name"]
+            size_kb = entry["size"] / 1024
+            mod_time = datetime.fromtimestamp(entry["mtime"]).strftime("%Y-%m-%d %H:%M:%S")
+            
+            # The message count of a log comes from its index, without reading the log
+            details = f"{size_kb:.2f} KB"
+            if file.endswith(".jsonl"):
+                details += f", {conversation_log.message_count(entry['path']) - 1} messages"
             
-            formatted_list.append(f"{i+1}. {file} ({size_kb:.2f} KB) - {mod_time}")
-            console.print(f"{i+1}. {file} ({size_kb:.2f} KB) - {mod_time}")
+            formatted_list.append(f"{i+1}. {file} ({details}) - {mod_time}")
+            console.print(f"{i+1}. {file} ({details}) - {mod_time}")
             
         return formatted_list
         
@@ -214,44 +415,85 @@ def get_conversation_file_path(index: int) -> Optional[str]:
         Optional[str]: Path to the conversation file or None if not found
     """
     try:
-        files = os.listdir(CONVERSATION_DIR)
-        conversation_files = [f for f in files if f.lower().endswith('.json')]
+        entry = catalog.get_artifact("conversation", index)
+        if entry is not None:
+            return entry["path"]
         
-        if not conversation_files:
+        count = catalog.count_artifacts("conversation")
+        if not count:
             console.print("[yellow]No conversation files found.[/]")
-            return None
-            
-        # Sort files by modification time (newest first)
-        conversation_files.sort(key=lambda x: os.path.getmtime(os.path.join(CONVERSATION_DIR, x)), reverse=True)
-        
-        if index < 1 or index > len(conversation_files):
-            console.print(f"[bold red]Invalid file index.[/] Please choose a number between 1 and {len(conversation_files)}.")
-            return None
-            
-        file_path = os.path.join(CONVERSATION_DIR, conversation_files[index-1])
-        return file_path
+        else:
+            console.print(f"[bold red]Invalid file index.[/] Please choose a number between 1 and {count}.")
+        return None
         
     except Exception as e:
         console.print(f"[bold red]Error getting conversation file path: {str(e)}[/]")
         return None
 
-def load_conversation(file_path: str) -> Optional[Conversation]:
+def delete_conversation(file_path: str) -> bool:
     """
-    Load a conversation from a file.
+    Delete a conversation file and its log index.
     
     Args:
         file_path: Path to the conversation file
         
     Returns:
-        Optional[Conversation]: Loaded conversation or None if loading failed
+        bool: True if the file was deleted
     """
     try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            data = json.load(file)
+        os.remove(file_path)
+        if os.path.exists(conversation_log.index_path(file_path)):
+            os.remove(conversation_log.index_path(file_path))
+        catalog.unregister(file_path)
+        return True
         
+    except Exception as e:
+        console.print(f"[bold red]Error deleting conversation: {str(e)}[/]")
+        return False
+
+def load_conversation(file_path: str, last_turns: Optional[int] = None) -> Optional[Conversation]:
+    """
+    Load a conversation from a file to display or resume it.
+    
+    New messages are appended to the same log. A conversation saved as .json by
+    an older version is read whole, and continues in a new .jsonl log.
+    
+    Args:
+        file_path: Path to the conversation file
+        last_turns: Load only the system message and the last this many turns
+            (None loads them all; .json files are always loaded whole)
+        
+    Returns:
+        Optional[Conversation]: Loaded conversation or None if loading failed
+    """
+    try:
         conversation = Conversation()
-        conversation.history = data["history"]
-        conversation.start_time = datetime.fromisoformat(data["timestamp"])
+        if file_path.endswith(".jsonl"):
+            data = conversation_log.load(file_path, last_turns)
+            header = data["header"]
+            conversation.history = data["messages"]
+            conversation.start_time = datetime.fromisoformat(header["timestamp"])
+            conversation.source_path = header.get("source_path")
+            conversation.skipped = data["skipped"]
+            conversation.log = conversation_log.ConversationLog(file_path)
+            if header.get("documents"):
+                conversation.documents = header["documents"]
+                conversation.index_documents()
+            # Re-index a long transcript so resumed questions get excerpts again
+            if header.get("retrieval") and conversation.source_path and os.path.exists(conversation.source_path):
+                with open(conversation.source_path, "r", encoding="utf-8") as file:
+                    conversation.index = retrieval.ChunkIndex.from_text(file.read())
+        else:
+            with open(file_path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            conversation.history = data["history"]
+            conversation.start_time = datetime.fromisoformat(data["timestamp"])
+        
+        # Summary positions are counted over the whole conversation
+        summarized = max(0, data.get("summarized", 0) - conversation.skipped)
+        conversation.history_manager = history.HistoryManager(HISTORY_TOKENS, summary=data.get("summary", ""),
+                                                              summarized=summarized,
+                                                              on_summary=conversation._log_summary)
         
         return conversation
         
@@ -0,0 +1,262 @@
+"""
+Append-only JSONL conversation logs.
+
+Each conversation is one ``.jsonl`` file: a header line, then one line per
+message (and per running-summary update) appended as it happens, so a crash
+loses at most the record being written. A sidecar ``.idx`` file holds the byte
+offset and type of every record in fixed-size entries; counting a conversation's
+messages reads only the sidecar, and loading the last few turns reads only the
+lines it returns.
+
+The log is the source of truth: a sidecar that is missing or behind the log
+(e.g. after a crash between the two writes) is repaired from the log on load.
+"""
+import os
+import json
+import time
+import struct
+import threading
+from typing import Optional, Dict, Any, List, Tuple
+from whisper_transcription_tool import config
+
+# Constants
+LOG_VERSION = 1
+# Sidecar entry: byte offset of the record's line and its type
+_ENTRY = struct.Struct("<QI")
+MESSAGE, SUMMARY = 0, 1
+_TYPES = {"message": MESSAGE, "summary": SUMMARY}
+
+
+def index_path(path: str) -> str:
+    """
+    Get the sidecar index path of a log.
+
+    Args:
+        path: Path to the ``.jsonl`` log
+
+    Returns:
+        str: Path to its ``.idx`` sidecar
+    """
+    return os.path.splitext(path)[0] + ".idx"
+
+
+class ConversationLog:
+    """
+    Appends records to a conversation log and its sidecar index.
+
+    Appends are serialized with a lock because the running summary is logged
+    from a background thread. Durability follows ``config.CONVERSATION_LOG_SETTINGS``:
+    "always" fsyncs after every record, "interval" at most once per
+    ``fsync_interval`` seconds, and "never" leaves it to the OS.
+    """
+
+    def __init__(self, path: str, header: Optional[Dict[str, Any]] = None):
+        """
+        Open a log for appending, creating it if it doesn't exist.
+
+        Args:
+            path: Path to the ``.jsonl`` log
+            header: Header fields for a new log (ignored if the log exists)
+        """
+        self.path = path
+        self.fsync = config.CONVERSATION_LOG_SETTINGS["fsync"]
+        self.fsync_interval = config.CONVERSATION_LOG_SETTINGS["fsync_interval"]
+        self._last_sync = 0.0
+        self._lock = threading.Lock()
+        exists = os.path.exists(path)
+        if exists:
+            # Bring the sidecar up to date and cut a line torn by a crash before appending
+            _, end = _read_index(path)
+            if end < os.path.getsize(path):
+                os.truncate(path, end)
+        self._log = open(path, "ab")
+        self._index = open(index_path(path), "ab")
+        if not exists:
+            self._write_line(dict({"type": "header", "version": LOG_VERSION}, **(header or {})))
+            self._sync(force=True)
+
+    def _write_line(self, record: Dict[str, Any]) -> int:
+        """Write a record's line to the log and return its offset."""
+        offset = self._log.tell()
+        self._log.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+        return offset
+
+    def _sync(self, force: bool = False) -> None:
+        """Flush both files and fsync them as the policy allows."""
+        self._log.flush()
+        self._index.flush()
+        now = time.monotonic()
+        if force or self.fsync == "always" or (self.fsync == "interval"
+                                               and now - self._last_sync >= self.fsync_interval):
+            os.fsync(self._log.fileno())
+            os.fsync(self._index.fileno())
+            self._last_sync = now
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """
+        Append a record.
+
+        Args:
+            record: A "message" record (role, content) or a "summary" record
+                (summary, summarized)
+        """
+        record = dict(record, time=time.time())
+        with self._lock:
+            offset = self._write_line(record)
+            # The log line is flushed first so the sidecar never points past the log
+            self._log.flush()
+            self._index.write(_ENTRY.pack(offset, _TYPES[record["type"]]))
+            self._sync()
+
+    def append_message(self, message: Dict[str, Any]) -> None:
+        """
+        Append a conversation message.
+
+        Args:
+            message: The message (role and content)
+        """
+        self.append({"type": "message", "role": message["role"], "content": message["content"]})
+
+    def append_summary(self, summary: str, summarized: int) -> None:
+        """
+        Append a running summary update.
+
+        Args:
+            summary: The summary text
+            summarized: Number of messages (after the system message) it covers
+        """
+        self.append({"type": "summary", "summary": summary, "summarized": summarized})
+
+    def sync(self) -> None:
+        """Flush and fsync the log regardless of the policy."""
+        with self._lock:
+            self._sync(force=True)
+
+    def close(self) -> None:
+        """Flush, fsync and close the log."""
+        with self._lock:
+            if not self._log.closed:
+                self._sync(force=True)
+                self._log.close()
+                self._index.close()
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    """
+    Read a log's header line.
+
+    Args:
+        path: Path to the log
+
+    Returns:
+        Dict[str, Any]: The header record
+    """
+    with open(path, "rb") as file:
+        return json.loads(file.readline())
+
+
+def _read_index(path: str) -> Tuple[List[Tuple[int, int]], int]:
+    """
+    Read a log's sidecar index, repairing it from the log if it is missing or behind.
+
+    Returns the (offset, type) entries and the offset just past the last complete line.
+    """
+    log_size = os.path.getsize(path)
+    entries: List[Tuple[int, int]] = []
+    sidecar = index_path(path)
+    if os.path.exists(sidecar):
+        with open(sidecar, "rb") as file:
+            data = file.read()
+        # A torn final entry or one written ahead of an unsynced log line is dropped
+        usable = len(data) - len(data) % _ENTRY.size
+        entries = [entry for entry in _ENTRY.iter_unpack(data[:usable]) if entry[0] < log_size]
+
+    with open(path, "rb") as file:
+        while entries:
+            file.seek(entries[-1][0])
+            if file.readline().endswith(b"\n"):
+                break
+            entries.pop()  # Points at a line torn by a crash
+        if not entries:
+            file.seek(0)
+            file.readline()  # Header
+        missing = []
+        while True:
+            offset = file.tell()
+            line = file.readline()
+            if not line.endswith(b"\n"):
+                break  # End of file, or a line torn by a crash
+            record = json.loads(line)
+            missing.append((offset, _TYPES[record["type"]]))
+        end = offset
+
+    if missing or not os.path.exists(sidecar) or len(entries) * _ENTRY.size != os.path.getsize(sidecar):
+        entries.extend(missing)
+        with open(sidecar, "wb") as file:
+            file.write(b"".join(_ENTRY.pack(*entry) for entry in entries))
+    return entries, end
+
+
+def message_count(path: str) -> int:
+    """
+    Count the messages in a log without reading them.
+
+    Args:
+        path: Path to the log
+
+    Returns:
+        int: Number of messages, including the system message
+    """
+    try:
+        with open(index_path(path), "rb") as file:
+            data = file.read()
+        return sum(1 for _, kind in _ENTRY.iter_unpack(data[:len(data) - len(data) % _ENTRY.size])
+                   if kind == MESSAGE)
+    except FileNotFoundError:
+        return sum(1 for _, kind in _read_index(path)[0] if kind == MESSAGE)
+
+
+def load(path: str, last_turns: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Load a conversation log.
+
+    Args:
+        path: Path to the log
+        last_turns: Load only the system message and the last this many turns
+            (a turn starts at a user message); None loads every message
+
+    Returns:
+        Dict[str, Any]: "header", "messages", the latest "summary" and the number
+        of messages it covers ("summarized"), and "skipped", the number of
+        messages after the system message that were not loaded
+    """
+    entries, _ = _read_index(path)
+    messages = [offset for offset, kind in entries if kind == MESSAGE]
+    summaries = [offset for offset, kind in entries if kind == SUMMARY]
+
+    with open(path, "rb") as file:
+        def read(offset: int) -> Dict[str, Any]:
+            file.seek(offset)
+            return json.loads(file.readline())
+
+        header = json.loads(file.readline())
+        start = 1
+        if last_turns is not None and len(messages) > 1:
+            # Walk back from the end over `last_turns` user messages
+            start = len(messages)
+            turns = 0
+            while start > 1 and turns < last_turns:
+                start -= 1
+                if read(messages[start])["role"] == "user":
+                    turns += 1
+        selected = messages[:1] + messages[start:]
+        records = [read(offset) for offset in selected]
+        summary = read(summaries[-1]) if summaries else {"summary": "", "summarized": 0}
+
+    return {
+        "header": header,
+        "messages": [{"role": record["role"], "content": record["content"]} for record in records],
+        "summary": summary["summary"],
+        "summarized": summary["summarized"],
+        "skipped": start - 1
+    }
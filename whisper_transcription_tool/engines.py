@@ -0,0 +1,214 @@
+"""
+Transcription engines for the Whisper Transcription Tool.
+
+``transcription.transcribe_audio`` prepares the audio and hands it to an engine:
+the OpenAI API engine takes an encoded upload, while in-process engines take 16 kHz
+mono int16 samples (``takes_samples``). Engines are picked by name, per call or
+per queued job, from ``config.ENGINE_SETTINGS``.
+"""
+import time
+import zlib
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional, Dict, Any, Tuple
+from whisper_transcription_tool import config, client
+
+# Sample rate in-process engines receive
+SAMPLE_RATE = 16000
+
+
+class TranscriptionEngine(ABC):
+    """
+    Turns audio into text.
+    """
+
+    name = ""
+    # True for engines that take 16 kHz samples, False for engines that take an upload
+    takes_samples = True
+    # True if the engine calls a remote API (and so needs an API key)
+    remote = False
+
+    def __init__(self, model: str):
+        """
+        Initialize the engine.
+
+        Args:
+            model: Model name (or weights path) the engine runs
+        """
+        self.model = model
+
+    @abstractmethod
+    def transcribe(self, audio: Any, hedge: Optional[bool] = None) -> str:
+        """
+        Transcribe audio.
+
+        Args:
+            audio: 16 kHz mono int16 samples if ``takes_samples``, otherwise the
+                upload ``file`` argument (handle or (name, stream) tuple)
+            hedge: Hedge remote calls against slow responses (ignored locally)
+
+        Returns:
+            str: The transcript text
+        """
+
+    async def transcribe_async(self, audio: Any, hedge: Optional[bool] = None) -> str:
+        """Asynchronous twin of ``transcribe``; runs it in the loop's default executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.transcribe, audio, hedge)
+
+    def cache_params(self) -> Dict[str, Any]:
+        """
+        Parameters that distinguish this engine's results in the transcription cache.
+
+        Returns:
+            Dict[str, Any]: Engine name and model
+        """
+        return {"engine": self.name, "engine_model": self.model}
+
+
+class OpenAIEngine(TranscriptionEngine):
+    """
+    The OpenAI transcription API, called through the shared scheduled client.
+    """
+
+    name = "openai"
+    takes_samples = False
+    remote = True
+
+    def __init__(self, model: str = "whisper-1"):
+        super().__init__(model)
+
+    def transcribe(self, audio: Any, hedge: Optional[bool] = None) -> str:
+        transcript = client.transcribe(hedge=hedge, model=self.model, file=audio, response_format="text")
+        return transcript.text if hasattr(transcript, "text") else transcript
+
+    async def transcribe_async(self, audio: Any, hedge: Optional[bool] = None) -> str:
+        transcript = await client.transcribe_async(hedge=hedge, model=self.model, file=audio,
+                                                   response_format="text")
+        return transcript.text if hasattr(transcript, "text") else transcript
+
+    def cache_params(self) -> Dict[str, Any]:
+        # Same key shape as before engines existed, so earlier cached results stay valid
+        return {"model": self.model}
+
+
+class LocalWhisperEngine(TranscriptionEngine):
+    """
+    openai-whisper running on the CPU, with weights loaded from a local directory.
+
+    The model is loaded once on first use. PyTorch already spreads one inference
+    over all CPU threads, so calls are serialized rather than run side by side.
+    """
+
+    name = "local"
+
+    def __init__(self, model: str = "base", model_dir: str = "models/whisper",
+                 threads: Optional[int] = None, language: Optional[str] = None):
+        """
+        Initialize the engine.
+
+        Args:
+            model: Whisper model name looked up in ``model_dir``, or a path to a checkpoint file
+            model_dir: Directory holding (or receiving) the weights
+            threads: CPU threads for inference (None lets PyTorch decide)
+            language: Spoken language, skipping detection (None detects it)
+        """
+        super().__init__(model)
+        self.model_dir = model_dir
+        self.threads = threads
+        self.language = language
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Any:
+        """Load the model (caller holds the lock)."""
+        if self._model is None:
+            try:
+                import torch
+                import whisper
+            except ImportError as e:
+                raise ImportError("The local engine needs openai-whisper (pip install openai-whisper)") from e
+            if self.threads:
+                torch.set_num_threads(self.threads)
+            start_time = time.time()
+            self._model = whisper.load_model(self.model, device="cpu", download_root=self.model_dir)
+            print(f"Loaded local Whisper model {self.model} in {time.time() - start_time:.2f} seconds.")
+        return self._model
+
+    def transcribe(self, audio: Any, hedge: Optional[bool] = None) -> str:
+        with self._lock:
+            model = self._load()
+            # Whisper expects float32 in [-1, 1]; fp16 is GPU-only
+            result = model.transcribe(audio.astype("float32") / 32768.0, fp16=False, language=self.language)
+        return result["text"].strip()
+
+
+class StubEngine(TranscriptionEngine):
+    """
+    Deterministic offline engine for tests and throughput runs.
+
+    The text depends only on the audio content, so repeated runs produce
+    identical transcripts. An optional real-time factor makes each call take a
+    fixed fraction of the audio's duration.
+    """
+
+    name = "stub"
+    WORDS = ("alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel")
+
+    def __init__(self, model: str = "stub", words_per_second: float = 2.5, realtime_factor: float = 0.0):
+        """
+        Initialize the engine.
+
+        Args:
+            model: Name reported as the model used
+            words_per_second: Words generated per second of audio
+            realtime_factor: Seconds spent per second of audio (0 returns immediately)
+        """
+        super().__init__(model)
+        self.words_per_second = words_per_second
+        self.realtime_factor = realtime_factor
+
+    def transcribe(self, audio: Any, hedge: Optional[bool] = None) -> str:
+        seconds = len(audio) / SAMPLE_RATE
+        if self.realtime_factor:
+            time.sleep(seconds * self.realtime_factor)
+        seed = zlib.crc32(audio.tobytes())
+        count = max(1, int(seconds * self.words_per_second))
+        return " ".join(self.WORDS[(seed + i * 7) % len(self.WORDS)] for i in range(count))
+
+
+# Engine name -> class
+ENGINES = {
+    "openai": OpenAIEngine,
+    "local": LocalWhisperEngine,
+    "stub": StubEngine
+}
+
+_engines: Dict[Tuple[str, ...], TranscriptionEngine] = {}
+_registry_lock = threading.Lock()
+
+
+def get_engine(name: Optional[str] = None, **overrides: Any) -> TranscriptionEngine:
+    """
+    Get a shared engine configured from ``config.ENGINE_SETTINGS``.
+
+    Args:
+        name: Engine name (None uses ``config.TRANSCRIPTION_SETTINGS["engine"]``)
+        **overrides: Settings that replace the configured ones
+
+    Returns:
+        TranscriptionEngine: The engine, created on first use so models load once
+
+    Raises:
+        ValueError: If the engine name is unknown
+    """
+    name = name or config.TRANSCRIPTION_SETTINGS.get("engine", "openai")
+    if name not in ENGINES:
+        raise ValueError(f"Unknown transcription engine: {name}")
+    settings = dict(config.ENGINE_SETTINGS.get(name, {}), **overrides)
+    key = (name,) + tuple(f"{k}={v!r}" for k, v in sorted(settings.items()))
+    with _registry_lock:
+        if key not in _engines:
+            _engines[key] = ENGINES[name](**settings)
+        return _engines[key]
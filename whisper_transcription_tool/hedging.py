@@ -0,0 +1,333 @@
+"""
+Hedged requests for cutting tail latency on API calls.
+
+A HedgePolicy tracks recent latencies for one endpoint. When hedging is on and a
+request is still running at the policy's percentile deadline, a duplicate is sent
+and whichever finishes first wins. Hedges are capped by a per-endpoint budget (a
+fraction of all requests) so a slow upstream isn't hit with double the load.
+
+Latencies are recorded per unit of cost (e.g. seconds per MB uploaded), so one
+deadline serves requests of different sizes. Hedges run inside the original
+request's scheduler slot; given the scheduler, each duplicate is also charged its
+own slot and rate budget, and is only sent if those are free.
+"""
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Future, wait, FIRST_COMPLETED, TimeoutError as FuturesTimeoutError
+from typing import Optional, Dict, Any, Callable, Awaitable, List
+from whisper_transcription_tool import config
+
+
+def _spawn(fn: Callable[[], Any]) -> Future:
+    """
+    Run ``fn`` on its own daemon thread.
+
+    A dedicated thread per attempt means hedged calls from worker pools can never
+    starve each other, and an abandoned loser doesn't keep the process alive.
+    """
+    future: Future = Future()
+
+    def runner() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=runner, daemon=True).start()
+    return future
+
+
+class HedgePolicy:
+    """
+    Percentile-deadline hedging with a budget and metrics for one endpoint.
+    """
+
+    def __init__(self, name: str, enabled: bool = False, percentile: float = 0.95,
+                 budget: float = 0.05, min_samples: int = 20, window: int = 200,
+                 min_delay: float = 0.05):
+        """
+        Initialize the policy.
+
+        Args:
+            name: Endpoint name used in stats
+            enabled: Hedge calls that don't say otherwise
+            percentile: Latency percentile used as the hedge deadline
+            budget: Maximum hedges as a fraction of requests
+            min_samples: Latencies needed before the deadline is trusted
+            window: Number of recent latencies the percentile is taken over
+            min_delay: Floor for the deadline in seconds
+        """
+        self.name = name
+        self.enabled = enabled
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.latencies: deque = deque(maxlen=window)
+        self.requests = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self.hedges_abandoned = 0
+        self._lock = threading.Lock()
+
+    def active(self, hedge: Optional[bool] = None) -> bool:
+        """
+        Whether a call should be hedged.
+
+        Args:
+            hedge: Per-call override; None falls back to the policy default
+
+        Returns:
+            bool: True if the call may be hedged
+        """
+        return self.enabled if hedge is None else hedge
+
+    def record(self, latency: float, cost: float = 1.0) -> None:
+        """
+        Record the latency of a completed request.
+
+        Args:
+            latency: Seconds the request took
+            cost: Size of the request in the policy's cost unit
+        """
+        with self._lock:
+            self.latencies.append(latency / max(cost, 1e-9))
+
+    def deadline(self, cost: float = 1.0) -> Optional[float]:
+        """
+        Get the hedge deadline for a request.
+
+        Args:
+            cost: Size of the request in the policy's cost unit
+
+        Returns:
+            Optional[float]: Seconds to wait before hedging, or None until enough
+            latencies have been recorded
+        """
+        with self._lock:
+            if len(self.latencies) < self.min_samples:
+                return None
+            ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(self.percentile * len(ordered)))
+        return max(self.min_delay, ordered[index] * cost)
+
+    def _take_budget(self, scheduler: Any = None, tokens: int = 0) -> bool:
+        """Claim a hedge if the budget allows one and the scheduler admits the extra attempt."""
+        with self._lock:
+            # Only fired hedges count: an abandoned loser is the other half of a
+            # hedge already counted here, and keeps its scheduler slot instead
+            if self.hedges_fired >= self.budget * self.requests:
+                return False
+            self.hedges_fired += 1
+        if scheduler is not None and not scheduler.try_admit(tokens):
+            with self._lock:
+                self.hedges_fired -= 1
+            return False
+        return True
+
+    def _abandoned(self) -> None:
+        with self._lock:
+            self.hedges_abandoned += 1
+
+    @staticmethod
+    def _release_when_done(attempts: List[Any], scheduler: Any) -> None:
+        """Free the hedge's scheduler slot once every attempt has finished."""
+        if scheduler is None:
+            return
+        remaining = [len(attempts)]
+        lock = threading.Lock()
+
+        def finished(_: Any) -> None:
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                scheduler.release()
+
+        for attempt in attempts:
+            attempt.add_done_callback(finished)
+
+    def _timed(self, fn: Callable[[], Any], cost: float) -> Any:
+        start_time = time.monotonic()
+        result = fn()
+        self.record(time.monotonic() - start_time, cost)
+        return result
+
+    async def _timed_async(self, fn: Callable[[], Awaitable[Any]], cost: float) -> Any:
+        start_time = time.monotonic()
+        result = await fn()
+        self.record(time.monotonic() - start_time, cost)
+        return result
+
+    def _won(self) -> None:
+        with self._lock:
+            self.hedges_won += 1
+
+    def run(self, fn: Callable[[], Any], cost: float = 1.0, hedge: Optional[bool] = None,
+            scheduler: Any = None, tokens: int = 0) -> Any:
+        """
+        Call ``fn``, sending a duplicate if it misses the deadline.
+
+        Blocking calls can't be interrupted, so a losing attempt still in flight is
+        abandoned: it finishes on its daemon thread and its result is discarded. It
+        keeps the hedge's scheduler slot until then and is counted in
+        ``hedges_abandoned``.
+
+        Args:
+            fn: Zero-argument callable making the request; must be safe to call twice
+            cost: Size of the request in the policy's cost unit
+            hedge: Per-call override of the policy default
+            scheduler: The ``RequestScheduler`` running the request; the duplicate
+                then needs its own slot and budget from it
+            tokens: Token estimate the duplicate is charged
+
+        Returns:
+            Any: The result of the first attempt to succeed
+
+        Raises:
+            Exception: The last error if every attempt failed
+        """
+        with self._lock:
+            self.requests += 1
+        delay = self.deadline(cost) if self.active(hedge) else None
+        if delay is None:
+            return self._timed(fn, cost)
+
+        primary = _spawn(lambda: self._timed(fn, cost))
+        try:
+            return primary.result(timeout=delay)
+        except FuturesTimeoutError:
+            pass
+        if not self._take_budget(scheduler, tokens):
+            return primary.result()
+
+        backup = _spawn(lambda: self._timed(fn, cost))
+        self._release_when_done([primary, backup], scheduler)
+        pending = {primary, backup}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        if not other.cancel():
+                            self._abandoned()
+                    if future is backup:
+                        self._won()
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def run_async(self, fn: Callable[[], Awaitable[Any]], cost: float = 1.0,
+                        hedge: Optional[bool] = None, scheduler: Any = None, tokens: int = 0) -> Any:
+        """
+        Asynchronous twin of ``run``; the losing attempt is cancelled.
+
+        Args:
+            fn: Zero-argument coroutine function making the request
+            cost: Size of the request in the policy's cost unit
+            hedge: Per-call override of the policy default
+            scheduler: The ``RequestScheduler`` running the request
+            tokens: Token estimate the duplicate is charged
+
+        Returns:
+            Any: The result of the first attempt to succeed
+        """
+        with self._lock:
+            self.requests += 1
+        delay = self.deadline(cost) if self.active(hedge) else None
+        if delay is None:
+            return await self._timed_async(fn, cost)
+
+        primary = asyncio.ensure_future(self._timed_async(fn, cost))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done or not self._take_budget(scheduler, tokens):
+                return await primary
+
+            backup = asyncio.ensure_future(self._timed_async(fn, cost))
+            self._release_when_done([primary, backup], scheduler)
+            pending = {primary, backup}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self._won()
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hedging statistics.
+
+        Returns:
+            Dict[str, Any]: Requests, hedges fired and won, and the current deadline
+        """
+        deadline = self.deadline()
+        with self._lock:
+            return {
+                "endpoint": self.name,
+                "enabled": self.enabled,
+                "requests": self.requests,
+                "hedges_fired": self.hedges_fired,
+                "hedges_won": self.hedges_won,
+                "hedges_abandoned": self.hedges_abandoned,
+                "hedge_rate": self.hedges_fired / self.requests if self.requests else 0.0,
+                "win_rate": self.hedges_won / self.hedges_fired if self.hedges_fired else 0.0,
+                "deadline": deadline,
+            }
+
+
+_policies: Dict[str, HedgePolicy] = {}
+_registry_lock = threading.Lock()
+
+
+def get_policy(name: str) -> HedgePolicy:
+    """
+    Get the shared hedge policy for an endpoint, creating it from config on first use.
+
+    Args:
+        name: Endpoint name ("chat", "transcription")
+
+    Returns:
+        HedgePolicy: The endpoint's policy
+    """
+    with _registry_lock:
+        if name not in _policies:
+            settings = config.HEDGE_SETTINGS.get(name, config.HEDGE_SETTINGS["default"])
+            _policies[name] = HedgePolicy(name, **settings)
+        return _policies[name]
+
+
+def enable(*names: str) -> None:
+    """
+    Turn hedging on by default for the given endpoints.
+
+    Args:
+        *names: Endpoint names
+    """
+    for name in names:
+        get_policy(name).enabled = True
+
+
+def hedging_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get statistics for every hedge policy used so far.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Stats keyed by endpoint name
+    """
+    with _registry_lock:
+        policies = list(_policies.values())
+    return {policy.name: policy.stats() for policy in policies}
@@ -0,0 +1,142 @@
+"""
+Token-budgeted conversation history.
+
+A ``HistoryManager`` decides which part of a conversation is resent with each
+request: the newest messages verbatim, up to a token budget, and a running
+summary of everything older. Messages that fall out of the verbatim window are
+folded into the summary in the background, a batch at a time, so a turn never
+waits for summarization and the prompt stays about the same size however long
+the conversation runs.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Callable, List, Dict, Any
+from whisper_transcription_tool import client, tokens
+
+# Constants
+SUMMARY_MODEL = "gpt-4.1"
+RECENT_TOKENS = 4000  # Newest messages kept verbatim
+FOLD_TOKENS = 1500  # Older messages are folded into the summary once this many have built up
+SUMMARY_TOKENS = 600  # Length limit of the running summary
+
+SUMMARY_PROMPT = (
+    "You maintain the running summary of a conversation between a user and an assistant. "
+    "Update the summary with the new messages. Keep facts, names, numbers, decisions, the user's "
+    "goals and preferences, and questions still open; drop pleasantries. Write compact notes, "
+    f"under {SUMMARY_TOKENS * 3 // 4} words."
+)
+
+# Folds are short and infrequent; one small shared pool serves every conversation
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="history")
+
+
+class HistoryManager:
+    """
+    Builds the history part of each request from the newest messages plus a running summary.
+
+    The manager doesn't own the messages: callers pass the conversation's
+    messages (without the system message) to ``context``. Messages are only
+    ever appended, so the manager tracks progress by position.
+    """
+
+    def __init__(self, recent_tokens: int = RECENT_TOKENS, fold_tokens: int = FOLD_TOKENS,
+                 summary: str = "", summarized: int = 0,
+                 on_summary: Optional[Callable[[str, int], None]] = None):
+        """
+        Initialize the manager.
+
+        Args:
+            recent_tokens: Token budget for messages resent verbatim
+            fold_tokens: Tokens of older messages that trigger a summary update
+            summary: Running summary restored from a saved conversation
+            summarized: Number of leading messages the summary covers
+            on_summary: Called with the new summary and ``summarized`` after each update
+        """
+        self.recent_tokens = recent_tokens
+        self.fold_tokens = fold_tokens
+        self.summary = summary
+        self.summarized = summarized
+        self.on_summary = on_summary
+        self._counts: List[int] = []
+        self._pending: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    def _count(self, messages: List[Dict[str, Any]]) -> List[int]:
+        """Token counts of the messages, counting each new message once."""
+        if len(self._counts) > len(messages):
+            self._counts = []
+        for message in messages[len(self._counts):]:
+            self._counts.append(tokens.count_tokens(message["content"]))
+        return self._counts
+
+    def _recent_start(self, counts: List[int]) -> int:
+        """Index of the oldest message in the verbatim window (always includes the newest)."""
+        start = len(counts)
+        used = 0
+        while start > 0 and (start == len(counts) or used + counts[start - 1] <= self.recent_tokens):
+            start -= 1
+            used += counts[start]
+        return start
+
+    def context(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Get the history to send with the next request.
+
+        Messages older than the verbatim window that the summary doesn't cover yet
+        are sent verbatim too, so nothing is lost while a summary update runs; once
+        they add up to ``fold_tokens`` an update is started in the background.
+
+        Args:
+            messages: The conversation so far, without the system message
+
+        Returns:
+            List[Dict[str, Any]]: A summary system message (once there is a
+            summary) followed by the messages to send verbatim
+        """
+        counts = self._count(messages)
+        start = self._recent_start(counts)
+        with self._lock:
+            summary, summarized = self.summary, min(self.summarized, start)
+            if self._pending is None and sum(counts[summarized:start]) >= self.fold_tokens:
+                self._pending = _executor.submit(self._fold, summary, messages[summarized:start], start)
+
+        history = []
+        if summary:
+            history.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+        return history + messages[summarized:]
+
+    def _fold(self, summary: str, messages: List[Dict[str, Any]], end: int) -> None:
+        """Fold messages into the running summary (runs on the executor)."""
+        try:
+            transcript = "\n\n".join(f"{message['role']}: {message['content']}" for message in messages)
+            response = client.chat_completion(
+                model=SUMMARY_MODEL,
+                messages=[
+                    {"role": "system", "content": SUMMARY_PROMPT},
+                    {"role": "user", "content": f"Current summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}"}
+                ],
+                temperature=0,
+                max_tokens=SUMMARY_TOKENS
+            )
+            with self._lock:
+                self.summary = response.choices[0].message.content.strip()
+                self.summarized = end
+            if self.on_summary is not None:
+                self.on_summary(self.summary, end)
+        except Exception as e:
+            # The messages stay verbatim and the next turn tries again
+            print(f"Error updating conversation summary: {e}")
+        finally:
+            with self._lock:
+                self._pending = None
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait for a running summary update to finish.
+
+        Args:
+            timeout: Maximum seconds to wait (None waits until it finishes)
+        """
+        pending = self._pending
+        if pending is not None:
+            pending.exception(timeout)
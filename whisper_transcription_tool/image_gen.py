@@ -1,32 +1,43 @@
 import os
+import base64
 import requests
-from PIL import Image
-from io import BytesIO
-import openai
-from typing import Optional, Literal, List
+from typing import Optional, List, Any
 from datetime import datetime
 from rich.console import Console
 from rich.panel import Panel
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeElapsedColumn
 from rich.table import Table
 from rich import box
+from whisper_transcription_tool import catalog, client
 
 # Constants
 IMAGES_DIR = "data/images"
+# Reuse the image prompt written for a transcript instead of asking GPT again
+CACHE_RESPONSES = True
+# Ask for the image inline (base64) so it is saved without a second request
+RESPONSE_FORMAT = "b64_json"
+DOWNLOAD_BLOCK_SIZE = 1024 * 1024  # Used when the API returns a URL instead
+# (connect, read) seconds; the read timeout applies between blocks, so a stalled download fails
+DOWNLOAD_TIMEOUT = (10, 60)
+# Decode saved images with PIL to check them; off because the API returns valid PNGs
+VALIDATE_IMAGES = False
 
 # Create necessary directories if they don't exist
 os.makedirs(IMAGES_DIR, exist_ok=True)
+catalog.define_kind("image", IMAGES_DIR, (".png", ".jpg", ".jpeg", ".gif", ".webp"))
 
 # Initialize Rich console
 console = Console()
 
-def generate_image_from_transcript(transcript: str, quality: str = "standard") -> Optional[str]:
+def generate_image_from_transcript(transcript: str, quality: str = "standard",
+                                   source_path: Optional[str] = None) -> Optional[str]:
     """
     Generate an image based on the transcript using OpenAI's DALL-E 3 model.
     
     Args:
         transcript: The text to base the image generation on
         quality: Image quality ("standard" or "hd")
+        source_path: The transcript file, recorded in the catalog as the image's source
         
     Returns:
         Optional[str]: Path to the saved image or None if generation failed
@@ -44,7 +55,8 @@ def generate_image_from_transcript(transcript: str, quality: str = "standard") -
             task = progress.add_task("Generating prompt", total=None)
             
             # First, use GPT to create a good image prompt
-            response = openai.chat.completions.create(
+            response = client.chat_completion(
+                use_cache=CACHE_RESPONSES,
                 model="gpt-4.1",
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant that creates detailed, vivid image generation prompts. Your prompts should capture the essence of the text and translate it into visual concepts. Be specific about style, mood, colors, composition, and other visual elements. Limit your response to 1000 characters."},
@@ -74,46 +86,39 @@ def generate_image_from_transcript(transcript: str, quality: str = "standard") -
             api_quality = quality if quality in ["standard", "hd"] else "standard"
                 
             # Generate the image with DALL-E 3
-            image_response = openai.images.generate(
+            image_response = client.generate_image(
                 model="dall-e-3",
                 prompt=image_prompt,
                 size="1024x1024",
                 quality=api_quality,
+                response_format=RESPONSE_FORMAT,
                 n=1
             )
             
-            # Get the image URL with error handling
-            image_url = image_response.data[0].url if image_response.data and hasattr(image_response.data[0], 'url') else None
+            # The image comes back inline, or as a URL if the API ignored the response format
+            image = image_response.data[0] if image_response.data else None
             
-            # Check if URL is valid
-            if not image_url:
-                console.print("[bold red]Error: Image generation API did not return a valid URL[/]")
+            # Check the response has an image
+            if image is None or not (getattr(image, 'b64_json', None) or getattr(image, 'url', None)):
+                console.print("[bold red]Error: Image generation API did not return an image[/]")
                 progress.update(task, completed=True)
                 return None
                 
             progress.update(task, completed=True)
         
-        # Download and save the image
+        # Save the image
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"dalle3_image_{timestamp}.png"
         filepath = os.path.join(IMAGES_DIR, filename)
-        
-        # Download and save the image
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[bold blue]Downloading image...[/]"),
-            BarColumn(),
-            TimeElapsedColumn(),
-            console=console
-        ) as progress:
-            task = progress.add_task("Downloading", total=100)
-            success = download_image(image_url, filepath, progress, task)
+        success = save_image(image, filepath)
             
         if success:
+            if source_path:
+                catalog.register(filepath, "image", derived_from=source_path)
             console.print(f"[bold green]Image generated and saved to[/] [bold yellow]{filepath}[/]")
             return filepath
         else:
-            console.print("[bold red]Failed to download the image.[/]")
+            console.print("[bold red]Failed to save the image.[/]")
             return None
         
     except Exception as e:
@@ -148,46 +153,37 @@ def generate_image_from_prompt(prompt: str, quality: str = "standard") -> Option
             api_quality = quality if quality in ["standard", "hd"] else "standard"
                 
             # Generate the image with DALL-E 3
-            image_response = openai.images.generate(
+            image_response = client.generate_image(
                 model="dall-e-3",
                 prompt=prompt,
                 size="1024x1024",
                 quality=api_quality,
+                response_format=RESPONSE_FORMAT,
                 n=1
             )
             
-            # Get the image URL with error handling
-            image_url = image_response.data[0].url if image_response.data and hasattr(image_response.data[0], 'url') else None
+            # The image comes back inline, or as a URL if the API ignored the response format
+            image = image_response.data[0] if image_response.data else None
             
-            # Check if URL is valid
-            if not image_url:
-                console.print("[bold red]Error: Image generation API did not return a valid URL[/]")
+            # Check the response has an image
+            if image is None or not (getattr(image, 'b64_json', None) or getattr(image, 'url', None)):
+                console.print("[bold red]Error: Image generation API did not return an image[/]")
                 progress.update(task, completed=True)
                 return None
                 
             progress.update(task, completed=True)
         
-        # Download and save the image
+        # Save the image
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"dalle3_image_{timestamp}.png"
         filepath = os.path.join(IMAGES_DIR, filename)
-        
-        # Download and save the image
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[bold blue]Downloading image...[/]"),
-            BarColumn(),
-            TimeElapsedColumn(),
-            console=console
-        ) as progress:
-            task = progress.add_task("Downloading", total=100)
-            success = download_image(image_url, filepath, progress, task)
+        success = save_image(image, filepath)
             
         if success:
             console.print(f"[bold green]Image generated and saved to[/] [bold yellow]{filepath}[/]")
             return filepath
         else:
-            console.print("[bold red]Failed to download the image.[/]")
+            console.print("[bold red]Failed to save the image.[/]")
             return None
         
     except Exception as e:
@@ -195,56 +191,159 @@ def generate_image_from_prompt(prompt: str, quality: str = "standard") -> Option
         return None
 
 
-def download_image(url: str, filepath: str, progress=None, task_id=None) -> bool:
+# File signatures of the formats the API returns, for matching a payload to its extension
+_SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": "PNG",
+    b"\xff\xd8\xff": "JPEG",
+    b"GIF8": "GIF",
+}
+_EXTENSIONS = {".png": "PNG", ".jpg": "JPEG", ".jpeg": "JPEG", ".gif": "GIF", ".webp": "WEBP"}
+
+
+def _image_format(head: bytes) -> Optional[str]:
+    """Identify an image format from the first bytes of the file."""
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "WEBP"
+    for signature, image_format in _SIGNATURES.items():
+        if head.startswith(signature):
+            return image_format
+    return None
+
+
+def _finish_image(partial_path: str, filepath: str, head: bytes, validate: bool) -> None:
+    """
+    Move a written image into place, decoding it with PIL only if it has to be
+    checked or isn't already in the format its extension names.
+    """
+    target = _EXTENSIONS.get(os.path.splitext(filepath)[1].lower())
+    if validate or _image_format(head) != target:
+        from PIL import Image  # Only needed on this path
+
+        with Image.open(partial_path) as image:
+            image.load()  # Decodes the whole image, so truncated data fails here
+            if image.format != target:
+                image.save(filepath, format=target)
+                os.remove(partial_path)
+                return
+    os.replace(partial_path, filepath)
+
+
+def save_image(image: Any, filepath: str, validate: bool = VALIDATE_IMAGES) -> bool:
+    """
+    Save an image from an image generation response.
+
+    Inline (base64) images are decoded straight to the file; images returned as
+    a URL are downloaded.
+
+    Args:
+        image: An entry of the response's ``data``
+        filepath: The path to save the image to
+        validate: Decode the image with PIL to check it before keeping it
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    if getattr(image, "b64_json", None):
+        return write_image(image.b64_json, filepath, validate)
+
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[bold blue]Downloading image...[/]"),
+        BarColumn(),
+        TimeElapsedColumn(),
+        console=console
+    ) as progress:
+        task = progress.add_task("Downloading", total=100)
+        return download_image(image.url, filepath, progress, task, validate)
+
+
+def write_image(b64_data: str, filepath: str, validate: bool = VALIDATE_IMAGES) -> bool:
+    """
+    Save a base64-encoded image to a file.
+
+    Args:
+        b64_data: The base64 image payload
+        filepath: The path to save the image to
+        validate: Decode the image with PIL to check it before keeping it
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    partial_path = filepath + ".part"
+    try:
+        data = base64.b64decode(b64_data)
+        with open(partial_path, "wb") as file:
+            file.write(data)
+        _finish_image(partial_path, filepath, data[:16], validate)
+        catalog.register(filepath, "image")
+        return True
+
+    except Exception as e:
+        console.print(f"[bold red]Error saving image:[/] {str(e)}")
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        return False
+
+
+def download_image(url: str, filepath: str, progress=None, task_id=None,
+                   validate: bool = VALIDATE_IMAGES) -> bool:
     """
     Download an image from a URL and save it to a file.
-    
+
+    The response is streamed to disk in large blocks; the image is only decoded
+    if it has to be validated or converted to the format of ``filepath``.
+
     Args:
         url: The URL of the image
         filepath: The path to save the image to
         progress: Optional Progress instance for updating download progress
         task_id: ID of the task in the progress bar
-        
+        validate: Decode the image with PIL to check it before keeping it
+
     Returns:
         bool: True if successful, False otherwise
     """
+    partial_path = filepath + ".part"
     try:
         # Validate URL before making request
         if not url or url == "None":
             console.print(f"[bold red]Error downloading image:[/] Invalid URL '{url}': No scheme supplied.")
             return False
             
-        response = requests.get(url, stream=True)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        
-        # Get total size in bytes
-        total_size = int(response.headers.get('content-length', 0))
-        block_size = 1024  # 1 Kibibyte
-        
-        if progress and task_id:
-            progress.update(task_id, total=total_size if total_size > 0 else 100)
-            progress.start_task(task_id)
-        
-        content = BytesIO()
-        downloaded = 0
-        
-        for data in response.iter_content(block_size):
-            content.write(data)
-            downloaded += len(data)
-            if progress and task_id and total_size > 0:
-                progress.update(task_id, completed=downloaded)
+        with requests.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+            response.raise_for_status()  # Raise an exception for HTTP errors
+            
+            # Get total size in bytes
+            total_size = int(response.headers.get('content-length', 0))
+            
+            if progress is not None and task_id is not None:
+                progress.update(task_id, total=total_size if total_size > 0 else 100)
+                progress.start_task(task_id)
+            
+            head = b""
+            downloaded = 0
+            # Written beside the target so a failed download never shows up as an image
+            with open(partial_path, "wb") as file:
+                for data in response.iter_content(DOWNLOAD_BLOCK_SIZE):
+                    if not head:
+                        head = data[:16]
+                    file.write(data)
+                    downloaded += len(data)
+                    if progress is not None and task_id is not None and total_size > 0:
+                        progress.update(task_id, completed=downloaded)
         
-        content.seek(0)
-        image = Image.open(content)
-        image.save(filepath)
+        _finish_image(partial_path, filepath, head, validate)
+        catalog.register(filepath, "image")
         
-        if progress and task_id:
+        if progress is not None and task_id is not None:
             progress.update(task_id, completed=total_size if total_size > 0 else 100)
         
         return True
         
     except Exception as e:
         console.print(f"[bold red]Error downloading image:[/] {str(e)}")
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
         return False
 
 
@@ -256,16 +355,13 @@ def list_images() -> List[str]:
         List[str]: List of formatted image file descriptions
     """
     try:
-        files = os.listdir(IMAGES_DIR)
-        image_files = [f for f in files if f.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp'))]
+        # The catalog returns images sorted by modification time (newest first)
+        image_files = catalog.list_artifacts("image")
         
         if not image_files:
             console.print("[yellow]No image files found.[/]")
             return []
             
-        # Sort files by modification time (newest first)
-        image_files.sort(key=lambda x: os.path.getmtime(os.path.join(IMAGES_DIR, x)), reverse=True)
-        
         # Create a table for display
         table = Table(box=box.ROUNDED, title="Available Images", show_header=True, header_style="bold magenta")
         table.add_column("#", style="dim", width=4)
@@ -275,10 +371,10 @@ def list_images() -> List[str]:
         
         # Format the list for display
         formatted_list = []
-        for i, file in enumerate(image_files):
-            file_path = os.path.join(IMAGES_DIR, file)
-            size_kb = os.path.getsize(file_path) / 1024
-            mod_time = datetime.fromtimestamp(os.path.getmtime(file_path)).strftime("%Y-%m-%d %H:%M:%S")
+        for i, entry in enumerate(image_files):
+            file = entry["name"]
+            size_kb = entry["size"] / 1024
+            mod_time = datetime.fromtimestamp(entry["mtime"]).strftime("%Y-%m-%d %H:%M:%S")
             
             # Add to table
             table.add_row(
@@ -310,22 +406,16 @@ def get_image_path(index: int) -> Optional[str]:
         Optional[str]: Path to the image file or None if not found
     """
     try:
-        files = os.listdir(IMAGES_DIR)
-        image_files = [f for f in files if f.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp'))]
+        entry = catalog.get_artifact("image", index)
+        if entry is not None:
+            return entry["path"]
         
-        if not image_files:
+        count = catalog.count_artifacts("image")
+        if not count:
             console.print("[yellow]No image files found.[/]")
-            return None
-            
-        # Sort files by modification time (newest first)
-        image_files.sort(key=lambda x: os.path.getmtime(os.path.join(IMAGES_DIR, x)), reverse=True)
-        
-        if index < 1 or index > len(image_files):
-            console.print(f"[bold red]Invalid file index.[/] Please choose a number between 1 and {len(image_files)}.")
-            return None
-            
-        file_path = os.path.join(IMAGES_DIR, image_files[index-1])
-        return file_path
+        else:
+            console.print(f"[bold red]Invalid file index.[/] Please choose a number between 1 and {count}.")
+        return None
         
     except Exception as e:
         console.print(f"[bold red]Error getting image file path:[/] {str(e)}")
@@ -0,0 +1,377 @@
+"""
+Durable job queue for the record -> transcribe -> process pipeline.
+
+Every stage of a pipeline is a row in an SQLite table with its status, attempt
+count and input/output paths. A processing job names its transcription job as
+parent and takes the parent's output as input, so a whole pipeline can be queued
+up front and picked up by any number of worker threads.
+
+Jobs move pending -> running -> done (or failed after MAX_ATTEMPTS). Completed
+jobs are never run again: re-queueing the same input and options reuses them.
+Executors heartbeat the jobs they are running; if one dies, ``recover`` (called
+by ``run_jobs``) returns its jobs to pending once its process is gone or its
+heartbeat is older than LEASE_SECONDS.
+"""
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Iterator, Callable
+from whisper_transcription_tool import transcription, processors
+
+# Constants
+JOBS_PATH = "data/jobs.db"
+MAX_ATTEMPTS = 3
+MAX_WORKERS = 4
+HEARTBEAT_INTERVAL = 10  # Seconds between lease renewals of running jobs
+LEASE_SECONDS = 60  # Running jobs not renewed for this long are considered orphaned
+STATUSES = ("pending", "running", "done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    input_path TEXT,
+    output_path TEXT,
+    parent_id INTEGER REFERENCES jobs (id),
+    options TEXT NOT NULL DEFAULT '{}',
+    owner TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS jobs_by_parent ON jobs (parent_id);
+CREATE INDEX IF NOT EXISTS jobs_by_input ON jobs (stage, input_path);
+"""
+
+_local = threading.local()
+# Identifies this process in the owner column so recovery only touches dead executors
+_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _connect() -> sqlite3.Connection:
+    """Get this thread's connection to the job database, creating the schema on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(JOBS_PATH) or ".", exist_ok=True)
+        conn = sqlite3.connect(JOBS_PATH, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Job state changes must survive a crash, unlike the rebuildable catalog
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.executescript(_SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+@contextmanager
+def _transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """Run a block of statements as one write transaction."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _encode_options(options: Optional[Dict[str, Any]]) -> str:
+    # Canonical JSON so identical options compare equal in SQL
+    return json.dumps(options or {}, sort_keys=True)
+
+
+def _find_or_add(conn: sqlite3.Connection, stage: str, input_path: Optional[str],
+                 parent_id: Optional[int], options: str) -> int:
+    """Reuse a job with the same stage, input and options unless it failed; otherwise add one."""
+    row = conn.execute(
+        "SELECT id FROM jobs WHERE stage = ? AND input_path IS ? AND parent_id IS ? AND options = ? "
+        "AND status != 'failed' ORDER BY id DESC LIMIT 1",
+        (stage, input_path, parent_id, options)
+    ).fetchone()
+    if row is not None:
+        return row["id"]
+    now = time.time()
+    cursor = conn.execute(
+        "INSERT INTO jobs (stage, max_attempts, input_path, parent_id, options, created, updated) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (stage, MAX_ATTEMPTS, input_path, parent_id, options, now, now)
+    )
+    return cursor.lastrowid
+
+
+def enqueue_pipeline(audio_path: str, tasks: Optional[List[Any]] = None,
+                     transcribe_options: Optional[Dict[str, Any]] = None) -> List[int]:
+    """
+    Queue the transcription of an audio file and the processing of its transcript.
+
+    Args:
+        audio_path: Path to the audio file
+        tasks: Processing tasks to run on the transcript; each is a ``processors.TASKS``
+            name or a dict with a "task" key plus task options
+            (e.g. {"task": "translate", "target_language": "French"})
+        transcribe_options: Extra options for ``transcription.transcribe_audio``
+
+    Returns:
+        List[int]: Job ids, the transcription job first. Stages already queued or
+        completed for the same input and options are reused rather than added.
+    """
+    audio_path = os.path.normpath(audio_path)
+    conn = _connect()
+    with _transaction(conn):
+        parent_id = _find_or_add(conn, "transcribe", audio_path, None, _encode_options(transcribe_options))
+        job_ids = [parent_id]
+        for task in tasks or []:
+            options = dict(task) if isinstance(task, dict) else {"task": task}
+            job_ids.append(_find_or_add(conn, "process", None, parent_id, _encode_options(options)))
+    return job_ids
+
+
+def _owner_alive(owner: Optional[str]) -> bool:
+    """Whether the executor that claimed a job is still running."""
+    if owner is None:
+        return False
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname():
+        # Can't see processes on other hosts; assume they're alive
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        return True
+    return True
+
+
+def recover() -> int:
+    """
+    Return jobs left running by executors that are no longer alive to pending.
+
+    Returns:
+        int: Number of jobs recovered
+    """
+    conn = _connect()
+    now = time.time()
+    with _transaction(conn):
+        rows = conn.execute("SELECT id, owner, updated FROM jobs WHERE status = 'running'").fetchall()
+        stale = [(now, row["id"]) for row in rows
+                 if row["owner"] != _OWNER
+                 and (row["updated"] < now - LEASE_SECONDS or not _owner_alive(row["owner"]))]
+        conn.executemany("UPDATE jobs SET status = 'pending', owner = NULL, updated = ? WHERE id = ?", stale)
+    return len(stale)
+
+
+def _claim() -> Optional[Dict[str, Any]]:
+    """Mark the oldest runnable job as running by this process and return it."""
+    conn = _connect()
+    with _transaction(conn):
+        row = conn.execute(
+            "SELECT j.*, p.output_path AS parent_output FROM jobs j LEFT JOIN jobs p ON p.id = j.parent_id "
+            "WHERE j.status = 'pending' AND (j.parent_id IS NULL OR p.status = 'done') "
+            "ORDER BY j.id LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE jobs SET status = 'running', attempts = attempts + 1, owner = ?, updated = ? "
+                     "WHERE id = ?", (_OWNER, time.time(), row["id"]))
+    job = dict(row)
+    job["attempts"] += 1
+    job["options"] = json.loads(job["options"])
+    return job
+
+
+def _heartbeat(stop: threading.Event) -> None:
+    """Renew the lease on this process's running jobs until ``stop`` is set."""
+    while not stop.wait(HEARTBEAT_INTERVAL):
+        try:
+            conn = _connect()
+            with _transaction(conn):
+                conn.execute("UPDATE jobs SET updated = ? WHERE status = 'running' AND owner = ?",
+                             (time.time(), _OWNER))
+        except Exception as e:
+            print(f"Error renewing job leases: {e}")
+
+
+def _has_pending() -> bool:
+    """Whether any pending job could still become runnable."""
+    return _connect().execute("SELECT 1 FROM jobs WHERE status = 'pending' LIMIT 1").fetchone() is not None
+
+
+def _complete(job: Dict[str, Any], output_path: str) -> None:
+    conn = _connect()
+    with _transaction(conn):
+        conn.execute("UPDATE jobs SET status = 'done', output_path = ?, error = NULL, owner = NULL, "
+                     "updated = ? WHERE id = ?", (output_path, time.time(), job["id"]))
+
+
+def _fail(job: Dict[str, Any], error: str) -> None:
+    """Retry a failed job, or give up on it and the jobs waiting on it."""
+    conn = _connect()
+    now = time.time()
+    with _transaction(conn):
+        if job["attempts"] < job["max_attempts"]:
+            conn.execute("UPDATE jobs SET status = 'pending', error = ?, owner = NULL, updated = ? WHERE id = ?",
+                         (error, now, job["id"]))
+            return
+        conn.execute("UPDATE jobs SET status = 'failed', error = ?, owner = NULL, updated = ? WHERE id = ?",
+                     (error, now, job["id"]))
+        # Fail every descendant still waiting on this job
+        conn.execute(
+            "WITH RECURSIVE waiting(id) AS ("
+            "SELECT id FROM jobs WHERE parent_id = ? "
+            "UNION SELECT j.id FROM jobs j JOIN waiting w ON j.parent_id = w.id) "
+            "UPDATE jobs SET status = 'failed', error = ?, updated = ? "
+            "WHERE id IN waiting AND status = 'pending'",
+            (job["id"], f"Parent job {job['id']} failed", now)
+        )
+
+
+def _run_transcribe(job: Dict[str, Any]) -> Optional[str]:
+    """Transcribe the job's audio file to its batch transcript path."""
+    output_path = transcription.batch_transcript_path(job["input_path"])
+    result = transcription.transcribe_audio(job["input_path"], transcript_path=output_path, **job["options"])
+    return output_path if result is not None else None
+
+
+def _run_process(job: Dict[str, Any]) -> Optional[str]:
+    """Run a processing task on the parent job's transcript."""
+    source_path = job["input_path"] or job["parent_output"]
+    with open(source_path, "r", encoding="utf-8") as file:
+        transcript = file.read()
+    options = dict(job["options"])
+    task = options.pop("task")
+    output_path = os.path.join(processors.PROCESSED_DIR, f"{task}_{Path(source_path).stem}_job{job['id']}.txt")
+    content = processors.run_task(task, transcript, source_path=source_path, output_path=output_path, **options)
+    return output_path if content is not None else None
+
+
+# Stage name -> runner returning the output path, or None if the stage failed
+STAGES: Dict[str, Callable[[Dict[str, Any]], Optional[str]]] = {
+    "transcribe": _run_transcribe,
+    "process": _run_process
+}
+
+
+def _execute(job: Dict[str, Any]) -> bool:
+    """Run a claimed job and record the outcome."""
+    runner = STAGES.get(job["stage"])
+    try:
+        if runner is None:
+            raise ValueError(f"Unknown stage {job['stage']}")
+        output_path = runner(job)
+        if output_path is None:
+            _fail(job, f"{job['stage']} stage returned no result")
+            return False
+        _complete(job, output_path)
+        return True
+    except Exception as e:
+        print(f"Error running job {job['id']} ({job['stage']}): {e}")
+        _fail(job, str(e))
+        return False
+
+
+def run_jobs(max_workers: int = MAX_WORKERS) -> Dict[str, Any]:
+    """
+    Run queued jobs until none are left.
+
+    Jobs orphaned by a crashed executor are recovered first. Workers claim jobs
+    one at a time; a worker with nothing runnable waits while other workers are
+    still busy, since finishing a transcription unblocks its processing jobs.
+
+    Args:
+        max_workers: Number of worker threads
+
+    Returns:
+        Dict[str, Any]: Counts of recovered, completed and failed attempts and the elapsed time
+    """
+    recovered = recover()
+    if recovered:
+        print(f"Recovered {recovered} interrupted jobs.")
+
+    start_time = time.time()
+    counts = {"recovered": recovered, "completed": 0, "failed": 0}
+    condition = threading.Condition()
+    busy = [0]
+
+    def worker() -> None:
+        while True:
+            with condition:
+                while True:
+                    job = _claim()
+                    if job is not None:
+                        busy[0] += 1
+                        break
+                    if busy[0] == 0 or not _has_pending():
+                        # Wake the others so they can exit too
+                        condition.notify_all()
+                        return
+                    condition.wait(timeout=1.0)
+
+            print(f"Running job {job['id']} ({job['stage']}, attempt {job['attempts']})")
+            succeeded = _execute(job)
+
+            with condition:
+                busy[0] -= 1
+                counts["completed" if succeeded else "failed"] += 1
+                condition.notify_all()
+
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(stop,), name="job-heartbeat", daemon=True)
+    heartbeat.start()
+    threads = [threading.Thread(target=worker, name=f"job-worker-{i}") for i in range(max_workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stop.set()
+
+    counts["elapsed_seconds"] = time.time() - start_time
+    return counts
+
+
+def job_counts() -> Dict[str, Dict[str, int]]:
+    """
+    Count jobs by stage and status.
+
+    Returns:
+        Dict[str, Dict[str, int]]: Counts keyed by stage, then status
+    """
+    counts: Dict[str, Dict[str, int]] = {}
+    rows = _connect().execute("SELECT stage, status, COUNT(*) AS n FROM jobs GROUP BY stage, status")
+    for row in rows:
+        counts.setdefault(row["stage"], {status: 0 for status in STATUSES})[row["status"]] = row["n"]
+    return counts
+
+
+def list_jobs(status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    List jobs, most recently updated first.
+
+    Args:
+        status: Only list jobs with this status
+        limit: Maximum number of jobs
+
+    Returns:
+        List[Dict[str, Any]]: Job rows with options decoded
+    """
+    conn = _connect()
+    if status is None:
+        rows = conn.execute("SELECT * FROM jobs ORDER BY updated DESC LIMIT ?", (limit,))
+    else:
+        rows = conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY updated DESC LIMIT ?", (status, limit))
+    jobs = []
+    for row in rows:
+        job = dict(row)
+        job["options"] = json.loads(job["options"])
+        jobs.append(job)
+    return jobs
+
@@ -1,276 +1,723 @@
 import os
-import openai
-from typing import Optional, Dict, Any, List
+import json
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Sequence
 from datetime import datetime
+from whisper_transcription_tool import catalog, client, search, streaming, tokens
 
 # Constants
 PROCESSED_DIR = "data/processed"
+MODEL = "gpt-4.1"
+# Serve repeated requests (same transcript, task and options) from the LLM response cache
+CACHE_RESPONSES = True
+
+# Transcripts longer than MAX_PROMPT_TOKENS are processed map-reduce style (see
+# map_reduce): split into CHUNK_TOKENS chunks at sentence boundaries, up to
+# MAP_WORKERS chunks processed at once, and up to REDUCE_FAN_IN partial results
+# combined per reduce call
+MAX_PROMPT_TOKENS = 100000
+CHUNK_TOKENS = 8000
+MAP_WORKERS = 8
+REDUCE_FAN_IN = 8
 
 # Create necessary directories if they don't exist
 os.makedirs(PROCESSED_DIR, exist_ok=True)
+catalog.define_kind("processed", PROCESSED_DIR, (".txt",))
+
+# Prompts for the different reformatting options
+FORMAT_OPTIONS = {
+    "clean": {
+        "system": "You are a helpful assistant that reformats transcripts into clean, readable text. Fix grammar, punctuation, and formatting without changing the content's meaning.",
+        "user": "Please reformat this transcript into clean, readable text with proper grammar and punctuation."
+    },
+    "paragraphs": {
+        "system": "You are a helpful assistant that reformats transcripts into paragraphs. Organize the text into coherent paragraphs with proper transitions.",
+        "user": "Please reformat this transcript into well-structured paragraphs."
+    },
+    "structured": {
+        "system": "You are a helpful assistant that reformats transcripts into a structured document with headings and sections.",
+        "user": "Please reformat this transcript into a structured document with appropriate headings and sections."
+    },
+    "qa": {
+        "system": "You are a helpful assistant that reformats transcripts into a Q&A format. Identify questions and answers in the conversation.",
+        "user": "Please reformat this transcript into a Q&A format."
+    },
+    "minutes": {
+        "system": "You are a helpful assistant that reformats transcripts into meeting minutes with action items, decisions, and discussion points.",
+        "user": "Please reformat this transcript into meeting minutes with action items, decisions, and discussion points."
+    },
+    "narrative": {
+        "system": "You are a helpful assistant that reformats transcripts into a narrative story, making the content more engaging while preserving the factual information.",
+        "user": "Please reformat this transcript into a narrative story, making it more engaging while preserving the factual information."
+    }
+}
+
+
+def _output_path(prefix: str) -> str:
+    """Get a timestamped output path in the processed directory."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(PROCESSED_DIR, f"{prefix}_{timestamp}.txt")
+
 
-def get_summary(transcript: str) -> Optional[str]:
+def _save_output(prefix: str, content: str, label: str, source_path: Optional[str] = None,
+                 filepath: Optional[str] = None) -> str:
     """
-    Generate a summary of the transcript using OpenAI's GPT model.
+    Save processed output to a timestamped file in the processed directory.
     
     Args:
-        transcript: The text to summarize
+        prefix: Filename prefix (e.g. "summary")
+        content: The text to save
+        label: Human-readable name used in the status message
+        source_path: The transcript file the output was derived from
+        filepath: Where to save the output instead of a timestamped file
         
     Returns:
-        Optional[str]: The generated summary or None if generation failed
+        str: Path to the saved file
     """
+    if filepath is None:
+        filepath = _output_path(prefix)
+    
+    with open(filepath, "w", encoding="utf-8") as file:
+        file.write(content)
+    catalog.register(filepath, "processed", derived_from=source_path)
+    search.index_file(filepath, "processed", content)
+        
+    print(f"{label} saved to {filepath}")
+    return filepath
+
+
+def _process(request: Dict[str, Any], hedge: Optional[bool] = None,
+             source_path: Optional[str] = None, output_path: Optional[str] = None,
+             stream: bool = False) -> Optional[str]:
+    """
+    Run a processing request built by one of the ``_*_request`` helpers.
+    
+    Args:
+        request: Messages, output prefix and status/error messages
+        hedge: Hedge the API call against slow responses (None uses the config default)
+        source_path: The transcript file, recorded in the catalog as the output's source
+        output_path: Where to save the output (defaults to a timestamped file)
+        stream: Show the output in the console and write it to the output file as
+            it is generated (streams are never hedged)
+        
+    Returns:
+        Optional[str]: The generated text or None if the request failed
+    """
+    if stream:
+        return _process_streamed(request, source_path, output_path or _output_path(request["prefix"]))
     try:
-        print("Generating summary...")
+        print(request["status"])
         
-        response = openai.chat.completions.create(
-            model="gpt-4.1",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that creates concise, insightful summaries. Identify the main topics, key points, and conclusions."},
-                {"role": "user", "content": f"Please summarize the following transcript:\n\n{transcript}"}
-            ]
+        response = client.chat_completion(
+            hedge=hedge,
+            use_cache=CACHE_RESPONSES,
+            model=MODEL,
+            messages=request["messages"]
         )
         
-        summary = response.choices[0].message.content
-        
-        # Save the summary to a file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"summary_{timestamp}.txt"
-        filepath = os.path.join(PROCESSED_DIR, filename)
+        content = response.choices[0].message.content
+        _save_output(request["prefix"], content, request["label"], source_path, output_path)
+        return content
         
-        with open(filepath, "w", encoding="utf-8") as file:
-            file.write(summary)
-            
-        print(f"Summary saved to {filepath}")
-        return summary
+    except Exception as e:
+        print(f"{request['error']}: {e}")
+        return None
+
+
+def _process_streamed(request: Dict[str, Any], source_path: Optional[str], output_path: str) -> Optional[str]:
+    """Run a processing request as a stream (see ``_process``)."""
+    try:
+        print(request["status"])
+        
+        try:
+            with streaming.StreamDisplay(request["label"], output_path) as display:
+                response, timing = client.stream_chat_completion(
+                    display.write,
+                    display.reset,
+                    use_cache=CACHE_RESPONSES,
+                    model=MODEL,
+                    messages=request["messages"]
+                )
+        except BaseException:
+            # Don't leave a partial output behind
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise
+        streaming.report_timing(timing, getattr(response.usage, "completion_tokens", None))
+        
+        content = response.choices[0].message.content
+        _save_output(request["prefix"], content, request["label"], source_path, output_path)
+        return content
         
     except Exception as e:
-        print(f"Error generating summary: {e}")
+        print(f"{request['error']}: {e}")
         return None
 
 
-def get_key_points(transcript: str) -> Optional[str]:
+async def _process_async(request: Dict[str, Any], hedge: Optional[bool] = None,
+                         source_path: Optional[str] = None) -> Optional[str]:
     """
-    Extract key points from a transcript using OpenAI's GPT model.
+    Asynchronous twin of ``_process`` using the shared async client.
     
     Args:
-        transcript: The text to analyze
+        request: Messages, output prefix and status/error messages
+        hedge: Hedge the API call against slow responses (None uses the config default)
+        source_path: The transcript file, recorded in the catalog as the output's source
         
     Returns:
-        Optional[str]: The extracted key points or None if extraction failed
+        Optional[str]: The generated text or None if the request failed
     """
     try:
-        print("Extracting key points...")
+        print(request["status"])
         
-        response = openai.chat.completions.create(
-            model="gpt-4.1",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that identifies and extracts the most important points from text. Format as a bulleted list with clear, concise statements."},
-                {"role": "user", "content": f"Please extract the key points from the following transcript as a bulleted list:\n\n{transcript}"}
-            ]
+        response = await client.chat_completion_async(
+            hedge=hedge,
+            use_cache=CACHE_RESPONSES,
+            model=MODEL,
+            messages=request["messages"]
         )
         
-        key_points = response.choices[0].message.content
-        
-        # Save the key points to a file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"key_points_{timestamp}.txt"
-        filepath = os.path.join(PROCESSED_DIR, filename)
-        
-        with open(filepath, "w", encoding="utf-8") as file:
-            file.write(key_points)
-            
-        print(f"Key points saved to {filepath}")
-        return key_points
+        content = response.choices[0].message.content
+        _save_output(request["prefix"], content, request["label"], source_path)
+        return content
         
     except Exception as e:
-        print(f"Error extracting key points: {e}")
+        print(f"{request['error']}: {e}")
         return None
 
 
-def get_action_items(transcript: str) -> Optional[str]:
+def _summary_request(transcript: str) -> Dict[str, Any]:
+    """Build the summary request."""
+    return {
+        "messages": [
+            {"role": "system", "content": "You are a helpful assistant that creates concise, insightful summaries. Identify the main topics, key points, and conclusions."},
+            {"role": "user", "content": f"Please summarize the following transcript:\n\n{transcript}"}
+        ],
+        "prefix": "summary",
+        "label": "Summary",
+        "status": "Generating summary...",
+        "error": "Error generating summary"
+    }
+
+
+def _key_points_request(transcript: str) -> Dict[str, Any]:
+    """Build the key points request."""
+    return {
+        "messages": [
+            {"role": "system", "content": "You are a helpful assistant that identifies and extracts the most important points from text. Format as a bulleted list with clear, concise statements."},
+            {"role": "user", "content": f"Please extract the key points from the following transcript as a bulleted list:\n\n{transcript}"}
+        ],
+        "prefix": "key_points",
+        "label": "Key points",
+        "status": "Extracting key points...",
+        "error": "Error extracting key points"
+    }
+
+
+def _action_items_request(transcript: str) -> Dict[str, Any]:
+    """Build the action items request."""
+    return {
+        "messages": [
+            {"role": "system", "content": "You are a helpful assistant that identifies action items, tasks, and commitments mentioned in text. Format as a prioritized list with clear ownership and timelines if mentioned."},
+            {"role": "user", "content": f"Please extract all action items, tasks, and commitments from the following transcript as a bulleted list:\n\n{transcript}"}
+        ],
+        "prefix": "action_items",
+        "label": "Action items",
+        "status": "Extracting action items...",
+        "error": "Error extracting action items"
+    }
+
+
+def _reformat_request(transcript: str, format_type: str = "clean") -> Dict[str, Any]:
+    """Build the reformatting request, defaulting to clean formatting for unknown types."""
+    format_info = FORMAT_OPTIONS.get(format_type.lower(), FORMAT_OPTIONS["clean"])
+    return {
+        "messages": [
+            {"role": "system", "content": format_info["system"]},
+            {"role": "user", "content": f"{format_info['user']}\n\n{transcript}"}
+        ],
+        "prefix": f"reformatted_{format_type}",
+        "label": "Reformatted transcript",
+        "status": f"Reformatting transcript to {format_type} format...",
+        "error": "Error reformatting transcript"
+    }
+
+
+def _translation_request(transcript: str, target_language: str) -> Dict[str, Any]:
+    """Build the translation request."""
+    return {
+        "messages": [
+            {"role": "system", "content": f"You are a helpful assistant that translates text to {target_language}. Maintain the original meaning and tone while producing natural, fluent text in the target language."},
+            {"role": "user", "content": f"Please translate the following text to {target_language}:\n\n{transcript}"}
+        ],
+        "prefix": f"translated_{target_language}",
+        "label": "Translated transcript",
+        "status": f"Translating transcript to {target_language}...",
+        "error": "Error translating transcript"
+    }
+
+
+def _sentiment_request(transcript: str) -> Dict[str, Any]:
+    """Build the sentiment analysis request."""
+    return {
+        "messages": [
+            {"role": "system", "content": "You are a helpful assistant that analyzes the sentiment of text. Provide a detailed analysis including overall sentiment (positive, negative, neutral), emotional tone, and notable sentiment shifts. Format as JSON with keys for 'overall_sentiment', 'confidence' (1-10), 'emotional_tone', 'key_positive_points', 'key_negative_points', and 'sentiment_shifts'."},
+            {"role": "user", "content": f"Please analyze the sentiment of the following transcript and provide the results in JSON format:\n\n{transcript}"}
+        ],
+        "prefix": "sentiment_analysis",
+        "label": "Sentiment analysis",
+        "status": "Analyzing sentiment...",
+        "error": "Error analyzing sentiment"
+    }
+
+
+# Processing tasks by name, for callers that pick a task at runtime (e.g. queued jobs).
+# Extra options are passed to the builder: format_type for "reformat",
+# target_language for "translate".
+TASKS = {
+    "summary": _summary_request,
+    "key_points": _key_points_request,
+    "action_items": _action_items_request,
+    "reformat": _reformat_request,
+    "translate": _translation_request,
+    "sentiment": _sentiment_request
+}
+
+
+def run_task(task: str, transcript: str, source_path: Optional[str] = None,
+             output_path: Optional[str] = None, hedge: Optional[bool] = None,
+             stream: bool = False, **options: Any) -> Optional[str]:
     """
-    Extract action items from a transcript using OpenAI's GPT model.
+    Run a processing task by name.
     
     Args:
-        transcript: The text to analyze
+        task: Key of ``TASKS``
+        transcript: The text to process
+        source_path: The transcript file the output is derived from (for the catalog)
+        output_path: Where to save the output (defaults to a timestamped file)
+        hedge: Send a duplicate request if the first is slower than usual
+        stream: Show the output in the console as it is generated (map-reduce
+            output is shown once it is complete)
+        **options: Task options (format_type, target_language)
         
     Returns:
-        Optional[str]: The extracted action items or None if extraction failed
+        Optional[str]: The generated text or None if the task failed
     """
+    if task not in TASKS:
+        print(f"Error: Unknown processing task {task}")
+        return None
     try:
-        print("Extracting action items...")
-        
-        response = openai.chat.completions.create(
-            model="gpt-4.1",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that identifies action items, tasks, and commitments mentioned in text. Format as a prioritized list with clear ownership and timelines if mentioned."},
-                {"role": "user", "content": f"Please extract all action items, tasks, and commitments from the following transcript as a bulleted list:\n\n{transcript}"}
-            ]
-        )
-        
-        action_items = response.choices[0].message.content
-        
-        # Save the action items to a file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"action_items_{timestamp}.txt"
-        filepath = os.path.join(PROCESSED_DIR, filename)
-        
-        with open(filepath, "w", encoding="utf-8") as file:
-            file.write(action_items)
-            
-        print(f"Action items saved to {filepath}")
-        return action_items
-        
-    except Exception as e:
-        print(f"Error extracting action items: {e}")
+        request = TASKS[task](transcript, **options)
+    except TypeError as e:
+        print(f"Error: Invalid options for {task}: {e}")
         return None
+    if needs_map_reduce(transcript):
+        content = map_reduce(task, transcript, hedge=hedge, source_path=source_path,
+                             output_path=output_path, **options)
+        if stream and content is not None:
+            streaming.show(request["label"], content)
+        return content
+    return _process(request, hedge=hedge, source_path=source_path, output_path=output_path, stream=stream)
+
+
+async def _run_task_async(task: str, transcript: str, source_path: Optional[str] = None,
+                          hedge: Optional[bool] = None, **options: Any) -> Optional[str]:
+    """Asynchronous twin of ``run_task``; map-reduce runs on its own threads in the default executor."""
+    if needs_map_reduce(transcript):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(
+            map_reduce, task, transcript, hedge=hedge, source_path=source_path, **options
+        ))
+    return await _process_async(TASKS[task](transcript, **options), hedge=hedge, source_path=source_path)
+
 
+# How map-reduce combines chunk results for each task. Tasks without a prompt
+# transform text piece by piece, so their chunk results are joined in order.
+REDUCE_PROMPTS = {
+    "summary": "You are a helpful assistant that combines summaries of consecutive parts of one transcript into a single concise, insightful summary. Identify the main topics, key points, and conclusions across all parts.",
+    "key_points": "You are a helpful assistant that merges the key points extracted from consecutive parts of one transcript into a single bulleted list. Remove duplicates and keep the most important points.",
+    "action_items": "You are a helpful assistant that merges the action items extracted from consecutive parts of one transcript into a single prioritized list. Remove duplicates and keep ownership and timelines.",
+    "sentiment": "You are a helpful assistant that combines sentiment analyses of consecutive parts of one transcript into one analysis of the whole. Format as JSON with keys for 'overall_sentiment', 'confidence' (1-10), 'emotional_tone', 'key_positive_points', 'key_negative_points', and 'sentiment_shifts'.",
+    "minutes": "You are a helpful assistant that merges meeting minutes written for consecutive parts of one meeting into a single set of minutes with action items, decisions, and discussion points."
+}
 
-def reformat_transcript(transcript: str, format_type: str = "clean") -> Optional[str]:
+
+def needs_map_reduce(transcript: str, max_prompt_tokens: int = MAX_PROMPT_TOKENS) -> bool:
     """
-    Reformat the transcript using OpenAI's GPT model.
+    Check whether a transcript is too long to process in a single prompt.
     
     Args:
-        transcript: The text to reformat
-        format_type: The type of formatting to apply (clean, paragraphs, structured, qa, minutes, narrative)
+        transcript: The text to process
+        max_prompt_tokens: Largest transcript sent in one prompt
         
     Returns:
-        Optional[str]: The reformatted transcript or None if reformatting failed
+        bool: True if the transcript should go through ``map_reduce``
     """
-    # Define system prompts for different formatting options
-    format_options = {
-        "clean": {
-            "system": "You are a helpful assistant that reformats transcripts into clean, readable text. Fix grammar, punctuation, and formatting without changing the content's meaning.",
-            "user": "Please reformat this transcript into clean, readable text with proper grammar and punctuation."
-        },
-        "paragraphs": {
-            "system": "You are a helpful assistant that reformats transcripts into paragraphs. Organize the text into coherent paragraphs with proper transitions.",
-            "user": "Please reformat this transcript into well-structured paragraphs."
-        },
-        "structured": {
-            "system": "You are a helpful assistant that reformats transcripts into a structured document with headings and sections.",
-            "user": "Please reformat this transcript into a structured document with appropriate headings and sections."
-        },
-        "qa": {
-            "system": "You are a helpful assistant that reformats transcripts into a Q&A format. Identify questions and answers in the conversation.",
-            "user": "Please reformat this transcript into a Q&A format."
-        },
-        "minutes": {
-            "system": "You are a helpful assistant that reformats transcripts into meeting minutes with action items, decisions, and discussion points.",
-            "user": "Please reformat this transcript into meeting minutes with action items, decisions, and discussion points."
-        },
-        "narrative": {
-            "system": "You are a helpful assistant that reformats transcripts into a narrative story, making the content more engaging while preserving the factual information.",
-            "user": "Please reformat this transcript into a narrative story, making it more engaging while preserving the factual information."
-        }
-    }
+    return tokens.count_tokens(transcript) > max_prompt_tokens
+
+
+def _reduce_prompt(task: str, options: Dict[str, Any]) -> Optional[str]:
+    """Get the reduce prompt for a task, or None if its chunk results are concatenated."""
+    if task == "reformat":
+        return REDUCE_PROMPTS["minutes"] if options.get("format_type") == "minutes" else None
+    return REDUCE_PROMPTS.get(task)
+
+
+def _group_partials(partials: List[str], max_tokens: int, fan_in: int) -> List[List[str]]:
+    """Pack consecutive partial results into reduce groups under a token budget."""
+    groups: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for partial in partials:
+        partial_tokens = tokens.count_tokens(partial)
+        # Groups take at least two results so every reduce level shrinks the list
+        if len(current) >= 2 and (len(current) >= fan_in or current_tokens + partial_tokens > max_tokens):
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(partial)
+        current_tokens += partial_tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+def map_reduce(task: str, transcript: str, chunk_tokens: int = CHUNK_TOKENS,
+               max_workers: int = MAP_WORKERS, fan_in: int = REDUCE_FAN_IN,
+               hedge: Optional[bool] = None, source_path: Optional[str] = None,
+               output_path: Optional[str] = None, **options: Any) -> Optional[str]:
+    """
+    Run a processing task over a long transcript in chunks.
     
-    # Default to clean formatting if the specified format is not available
-    format_info = format_options.get(format_type.lower(), format_options["clean"])
+    Map: the transcript is split at sentence boundaries into chunks under
+    ``chunk_tokens`` and the task runs on every chunk concurrently. Reduce:
+    chunk results are merged ``fan_in`` at a time, level by level, until one
+    result is left. Tasks that transform text piece by piece (translation and
+    reformatting other than minutes) join their chunk results in order instead.
     
+    Args:
+        task: Key of ``TASKS``
+        transcript: The text to process
+        chunk_tokens: Token budget per chunk and per reduce call's input
+        max_workers: Maximum concurrent map or reduce requests
+        fan_in: Maximum partial results merged per reduce request
+        hedge: Send a duplicate request if one is slower than usual
+        source_path: The transcript file the output is derived from (for the catalog)
+        output_path: Where to save the output (defaults to a timestamped file)
+        **options: Task options (format_type, target_language)
+        
+    Returns:
+        Optional[str]: The final result or None if processing failed
+    """
+    request = TASKS[task]("", **options)
     try:
-        print(f"Reformatting transcript to {format_type} format...")
+        chunks = tokens.chunk_text(transcript, chunk_tokens)
+        print(f"{request['status']} ({len(chunks)} chunks, up to {max_workers} at a time)")
+        
+        def complete(messages: List[Dict[str, Any]]) -> str:
+            response = client.chat_completion(hedge=hedge, use_cache=CACHE_RESPONSES, model=MODEL,
+                                              messages=messages)
+            return response.choices[0].message.content
+        
+        def map_chunk(index: int) -> str:
+            messages = TASKS[task](chunks[index], **options)["messages"]
+            note = f" The text is part {index + 1} of {len(chunks)} of a longer transcript."
+            messages[0] = {"role": "system", "content": messages[0]["content"] + note}
+            return complete(messages)
+        
+        def reduce_group(group: List[str]) -> str:
+            parts = "\n\n".join(f"Part {i}:\n{partial}" for i, partial in enumerate(group, 1))
+            return complete([
+                {"role": "system", "content": reduce_prompt},
+                {"role": "user", "content": f"Please combine these results, given in transcript order:\n\n{parts}"}
+            ])
+        
+        reduce_prompt = _reduce_prompt(task, options)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            partials = list(pool.map(map_chunk, range(len(chunks))))
+            if reduce_prompt is None:
+                partials = ["\n\n".join(partials)]
+            while len(partials) > 1:
+                groups = _group_partials(partials, chunk_tokens, max(2, fan_in))
+                print(f"Combining {len(partials)} partial results in {len(groups)} requests...")
+                partials = list(pool.map(lambda group: group[0] if len(group) == 1 else reduce_group(group),
+                                         groups))
+        
+        content = partials[0] if partials else ""
+        _save_output(request["prefix"], content, request["label"], source_path, output_path)
+        return content
         
-        response = openai.chat.completions.create(
-            model="gpt-4.1",
-            messages=[
-                {"role": "system", "content": format_info["system"]},
-                {"role": "user", "content": f"{format_info['user']}\n\n{transcript}"}
-            ]
-        )
+    except Exception as e:
+        print(f"{request['error']}: {e}")
+        return None
+
+
+def get_summary(transcript: str, hedge: Optional[bool] = None,
+                source_path: Optional[str] = None, stream: bool = False) -> Optional[str]:
+    """
+    Generate a summary of the transcript using OpenAI's GPT model.
+    
+    Args:
+        transcript: The text to summarize
+        hedge: Send a duplicate request if the first is slower than usual
+            (None uses the chat setting in ``config.HEDGE_SETTINGS``)
+        source_path: The transcript file the output is derived from (for the catalog)
+        stream: Show the summary in the console as it is generated
         
-        reformatted = response.choices[0].message.content
+    Returns:
+        Optional[str]: The generated summary or None if generation failed
+    """
+    return run_task("summary", transcript, source_path=source_path, hedge=hedge, stream=stream)
+
+
+def get_key_points(transcript: str, source_path: Optional[str] = None, stream: bool = False) -> Optional[str]:
+    """
+    Extract key points from a transcript using OpenAI's GPT model.
+    
+    Args:
+        transcript: The text to analyze
+        source_path: The transcript file the output is derived from (for the catalog)
+        stream: Show the key points in the console as they are generated
         
-        # Save the reformatted transcript to a file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"reformatted_{format_type}_{timestamp}.txt"
-        filepath = os.path.join(PROCESSED_DIR, filename)
+    Returns:
+        Optional[str]: The extracted key points or None if extraction failed
+    """
+    return run_task("key_points", transcript, source_path=source_path, stream=stream)
+
+
+def get_action_items(transcript: str, source_path: Optional[str] = None, stream: bool = False) -> Optional[str]:
+    """
+    Extract action items from a transcript using OpenAI's GPT model.
+    
+    Args:
+        transcript: The text to analyze
+        source_path: The transcript file the output is derived from (for the catalog)
+        stream: Show the action items in the console as they are generated
         
-        with open(filepath, "w", encoding="utf-8") as file:
-            file.write(reformatted)
-            
-        print(f"Reformatted transcript saved to {filepath}")
-        return reformatted
+    Returns:
+        Optional[str]: The extracted action items or None if extraction failed
+    """
+    return run_task("action_items", transcript, source_path=source_path, stream=stream)
+
+
+def reformat_transcript(transcript: str, format_type: str = "clean",
+                        source_path: Optional[str] = None, stream: bool = False) -> Optional[str]:
+    """
+    Reformat the transcript using OpenAI's GPT model.
+    
+    Args:
+        transcript: The text to reformat
+        format_type: The type of formatting to apply (clean, paragraphs, structured, qa, minutes, narrative)
+        source_path: The transcript file the output is derived from (for the catalog)
+        stream: Show the reformatted transcript in the console as it is generated
         
-    except Exception as e:
-        print(f"Error reformatting transcript: {e}")
-        return None
+    Returns:
+        Optional[str]: The reformatted transcript or None if reformatting failed
+    """
+    return run_task("reformat", transcript, source_path=source_path, stream=stream, format_type=format_type)
 
 
-def translate_transcript(transcript: str, target_language: str) -> Optional[str]:
+def translate_transcript(transcript: str, target_language: str,
+                         source_path: Optional[str] = None, stream: bool = False) -> Optional[str]:
     """
     Translate the transcript to another language using OpenAI's GPT model.
     
     Args:
         transcript: The text to translate
         target_language: The language to translate to
+        source_path: The transcript file the output is derived from (for the catalog)
+        stream: Show the translation in the console as it is generated
         
     Returns:
         Optional[str]: The translated transcript or None if translation failed
     """
-    try:
-        print(f"Translating transcript to {target_language}...")
-        
-        response = openai.chat.completions.create(
-            model="gpt-4.1",
-            messages=[
-                {"role": "system", "content": f"You are a helpful assistant that translates text to {target_language}. Maintain the original meaning and tone while producing natural, fluent text in the target language."},
-                {"role": "user", "content": f"Please translate the following text to {target_language}:\n\n{transcript}"}
-            ]
-        )
-        
-        translated = response.choices[0].message.content
-        
-        # Save the translated transcript to a file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"translated_{target_language}_{timestamp}.txt"
-        filepath = os.path.join(PROCESSED_DIR, filename)
-        
-        with open(filepath, "w", encoding="utf-8") as file:
-            file.write(translated)
-            
-        print(f"Translated transcript saved to {filepath}")
-        return translated
-        
-    except Exception as e:
-        print(f"Error translating transcript: {e}")
-        return None
+    return run_task("translate", transcript, source_path=source_path, stream=stream,
+                    target_language=target_language)
 
 
-def analyze_sentiment(transcript: str) -> Optional[Dict[str, Any]]:
+def analyze_sentiment(transcript: str, source_path: Optional[str] = None,
+                      stream: bool = False) -> Optional[Dict[str, Any]]:
     """
     Analyze the sentiment of the transcript using OpenAI's GPT model.
     
     Args:
         transcript: The text to analyze
+        source_path: The transcript file the output is derived from (for the catalog)
+        stream: Show the analysis in the console as it is generated
         
     Returns:
         Optional[Dict[str, Any]]: The sentiment analysis results or None if analysis failed
     """
-    try:
-        print("Analyzing sentiment...")
-        
-        response = openai.chat.completions.create(
-            model="gpt-4.1",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that analyzes the sentiment of text. Provide a detailed analysis including overall sentiment (positive, negative, neutral), emotional tone, and notable sentiment shifts. Format as JSON with keys for 'overall_sentiment', 'confidence' (1-10), 'emotional_tone', 'key_positive_points', 'key_negative_points', and 'sentiment_shifts'."},
-                {"role": "user", "content": f"Please analyze the sentiment of the following transcript and provide the results in JSON format:\n\n{transcript}"}
-            ]
-        )
-        
-        analysis = response.choices[0].message.content
-        
-        # Save the sentiment analysis to a file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"sentiment_analysis_{timestamp}.txt"
-        filepath = os.path.join(PROCESSED_DIR, filename)
-        
-        with open(filepath, "w", encoding="utf-8") as file:
-            file.write(analysis)
-            
-        print(f"Sentiment analysis saved to {filepath}")
-        return analysis
+    return run_task("sentiment", transcript, source_path=source_path, stream=stream)
+
+
+# Outputs of the combined analysis: JSON key -> (file prefix, label, what to put there).
+# Prefixes match the single-task requests so both modes save the same kind of files.
+ANALYSES = {
+    "summary": ("summary", "Summary",
+                "a concise, insightful summary identifying the main topics, key points, and conclusions"),
+    "key_points": ("key_points", "Key points",
+                   "the most important points as a bulleted list of clear, concise statements"),
+    "action_items": ("action_items", "Action items",
+                     "all action items, tasks, and commitments as a prioritized bulleted list, "
+                     "with ownership and timelines if mentioned"),
+    "sentiment": ("sentiment_analysis", "Sentiment analysis",
+                  "an object with keys 'overall_sentiment', 'confidence' (1-10), 'emotional_tone', "
+                  "'key_positive_points', 'key_negative_points', and 'sentiment_shifts'")
+}
+
+
+def _analysis_request(transcript: str, tasks: Sequence[str]) -> Dict[str, Any]:
+    """Build one JSON-mode request that asks for every analysis in ``tasks``."""
+    fields = "\n".join(f'- "{task}": {ANALYSES[task][2]}' for task in tasks)
+    return {
+        "messages": [
+            {"role": "system", "content": f"You are a helpful assistant that analyzes transcripts. Respond with a JSON object containing exactly these keys:\n{fields}\nUse strings for text and lists, with bullets as \"- \" lines."},
+            {"role": "user", "content": f"Please analyze the following transcript:\n\n{transcript}"}
+        ],
+        "response_format": {"type": "json_object"}
+    }
+
+
+def _save_analysis(content: str, tasks: Sequence[str], source_path: Optional[str]) -> Dict[str, str]:
+    """Split a combined JSON response into one saved file per analysis."""
+    data = json.loads(content)
+    results = {}
+    for task in tasks:
+        value = data.get(task)
+        if not value:
+            continue
+        if isinstance(value, list):
+            value = "\n".join(f"- {item}" for item in value)
+        elif not isinstance(value, str):
+            value = json.dumps(value, indent=2, ensure_ascii=False)
+        prefix, label, _ = ANALYSES[task]
+        _save_output(prefix, value, label, source_path)
+        results[task] = value
+    return results
+
+
+def _check_analyses(tasks: Sequence[str]) -> List[str]:
+    """Drop (and report) names that aren't keys of ``ANALYSES``."""
+    unknown = [task for task in tasks if task not in ANALYSES]
+    if unknown:
+        print(f"Error: Unknown analyses {', '.join(unknown)}")
+    return [task for task in tasks if task in ANALYSES]
+
+
+def analyze_all(transcript: str, tasks: Sequence[str] = tuple(ANALYSES), combined: bool = True,
+                hedge: Optional[bool] = None, source_path: Optional[str] = None) -> Dict[str, Optional[str]]:
+    """
+    Run several analyses (summary, key points, action items, sentiment) at once.
+    
+    In combined mode the transcript is sent once and every analysis comes back in
+    one structured JSON response, so input tokens are paid once instead of once
+    per analysis. Analyses missing from the response, or every analysis when
+    ``combined`` is False or the transcript needs ``map_reduce``, are requested
+    separately and concurrently.
+    
+    Args:
+        transcript: The text to analyze
+        tasks: Keys of ``ANALYSES`` to run
+        combined: Ask for all analyses in a single request
+        hedge: Send a duplicate request if one is slower than usual
+        source_path: The transcript file the outputs are derived from (for the catalog)
         
-    except Exception as e:
-        print(f"Error analyzing sentiment: {e}")
-        return None
\ No newline at end of file
+    Returns:
+        Dict[str, Optional[str]]: Each analysis's text (None if it failed); each is
+        also saved to the processed directory
+    """
+    tasks = _check_analyses(tasks)
+    results: Dict[str, Optional[str]] = {}
+    if combined and needs_map_reduce(transcript):
+        print("Transcript is too long for one request; running each analysis over chunks.")
+        combined = False
+    
+    if combined and tasks:
+        try:
+            print(f"Running {len(tasks)} analyses in one request...")
+            request = _analysis_request(transcript, tasks)
+            response = client.chat_completion(hedge=hedge, use_cache=CACHE_RESPONSES, model=MODEL, **request)
+            results = _save_analysis(response.choices[0].message.content, tasks, source_path)
+        except Exception as e:
+            print(f"Error running combined analysis: {e}")
+    
+    missing = [task for task in tasks if results.get(task) is None]
+    if missing:
+        if combined:
+            print(f"Requesting {', '.join(missing)} separately...")
+        with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+            futures = {task: pool.submit(run_task, task, transcript, source_path=source_path, hedge=hedge)
+                       for task in missing}
+        results.update({task: future.result() for task, future in futures.items()})
+    
+    return {task: results.get(task) for task in tasks}
+
+
+# Async twins for event-loop based callers; they share one AsyncOpenAI client
+
+async def get_summary_async(transcript: str, hedge: Optional[bool] = None,
+                            source_path: Optional[str] = None) -> Optional[str]:
+    """Asynchronous twin of ``get_summary``."""
+    return await _run_task_async("summary", transcript, source_path=source_path, hedge=hedge)
+
+
+async def get_key_points_async(transcript: str, source_path: Optional[str] = None) -> Optional[str]:
+    """Asynchronous twin of ``get_key_points``."""
+    return await _run_task_async("key_points", transcript, source_path=source_path)
+
+
+async def get_action_items_async(transcript: str, source_path: Optional[str] = None) -> Optional[str]:
+    """Asynchronous twin of ``get_action_items``."""
+    return await _run_task_async("action_items", transcript, source_path=source_path)
+
+
+async def reformat_transcript_async(transcript: str, format_type: str = "clean",
+                                    source_path: Optional[str] = None) -> Optional[str]:
+    """Asynchronous twin of ``reformat_transcript``."""
+    return await _run_task_async("reformat", transcript, source_path=source_path, format_type=format_type)
+
+
+async def translate_transcript_async(transcript: str, target_language: str,
+                                     source_path: Optional[str] = None) -> Optional[str]:
+    """Asynchronous twin of ``translate_transcript``."""
+    return await _run_task_async("translate", transcript, source_path=source_path,
+                                 target_language=target_language)
+
+
+async def analyze_sentiment_async(transcript: str,
+                                  source_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Asynchronous twin of ``analyze_sentiment``."""
+    return await _run_task_async("sentiment", transcript, source_path=source_path)
+
+
+async def analyze_all_async(transcript: str, tasks: Sequence[str] = tuple(ANALYSES), combined: bool = True,
+                            hedge: Optional[bool] = None,
+                            source_path: Optional[str] = None) -> Dict[str, Optional[str]]:
+    """Asynchronous twin of ``analyze_all``."""
+    tasks = _check_analyses(tasks)
+    results: Dict[str, Optional[str]] = {}
+    if combined and needs_map_reduce(transcript):
+        print("Transcript is too long for one request; running each analysis over chunks.")
+        combined = False
+    
+    if combined and tasks:
+        try:
+            print(f"Running {len(tasks)} analyses in one request...")
+            request = _analysis_request(transcript, tasks)
+            response = await client.chat_completion_async(hedge=hedge, use_cache=CACHE_RESPONSES,
+                                                        model=MODEL, **request)
+            results = _save_analysis(response.choices[0].message.content, tasks, source_path)
+        except Exception as e:
+            print(f"Error running combined analysis: {e}")
+    
+    missing = [task for task in tasks if results.get(task) is None]
+    if missing:
+        if combined:
+            print(f"Requesting {', '.join(missing)} separately...")
+        outputs = await asyncio.gather(*[_run_task_async(task, transcript, source_path=source_path, hedge=hedge)
+                                         for task in missing])
+        results.update(zip(missing, outputs))
+    
+    return {task: results.get(task) for task in tasks}
@@ -0,0 +1,131 @@
+"""
+In-memory BM25 retrieval over the chunks of one transcript.
+
+The conversation assistant uses this to send only the parts of a long transcript
+that are relevant to the current question instead of the whole transcript on
+every turn. The index is small and built in milliseconds, so it lives in memory
+for the length of a conversation; persistent search across files is ``search``.
+"""
+import re
+from typing import List, Dict, Tuple
+import numpy as np
+from whisper_transcription_tool import tokens
+
+# Constants
+CHUNK_TOKENS = 300  # Small enough that retrieved chunks are mostly on topic
+# BM25 term-frequency saturation and length normalization
+K1 = 1.2
+B = 0.75
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+# Words too common in speech to say anything about relevance
+STOPWORDS = frozenset("""
+a about all also an and any are as at be been but by can could did do does for from had has have he her
+him his how i if in into is it its just like me my no not of on or our she so some that the their them
+then there these they this to was we were what when where which who why will with would you your
+""".split())
+
+
+def terms(text: str) -> List[str]:
+    """
+    Split text into lowercase index terms, dropping stopwords.
+
+    Args:
+        text: The text to split
+
+    Returns:
+        List[str]: Terms in order, with repeats
+    """
+    return [word for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+class ChunkIndex:
+    """
+    BM25 index over a fixed list of text chunks.
+
+    Postings are NumPy arrays (chunk ids and precomputed BM25 term weights per
+    term), so scoring a query is one vectorized add per query term.
+    """
+
+    def __init__(self, chunks: List[str]):
+        """
+        Build the index.
+
+        Args:
+            chunks: The texts to index, in document order
+        """
+        self.chunks = chunks
+        chunk_terms = [terms(chunk) for chunk in chunks]
+        lengths = np.array([len(words) for words in chunk_terms], dtype=np.float64)
+        average = lengths.mean() if len(chunks) and lengths.mean() > 0 else 1.0
+        # Length normalization of each chunk, folded into the stored weights
+        norm = K1 * (1 - B + B * lengths / average)
+
+        counts: Dict[str, Dict[int, int]] = {}
+        for chunk_id, words in enumerate(chunk_terms):
+            for word in words:
+                postings = counts.setdefault(word, {})
+                postings[chunk_id] = postings.get(chunk_id, 0) + 1
+
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for word, postings in counts.items():
+            ids = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+            tf = np.fromiter(postings.values(), dtype=np.float64, count=len(postings))
+            idf = np.log(1 + (len(chunks) - len(ids) + 0.5) / (len(ids) + 0.5))
+            self.postings[word] = (ids, idf * tf * (K1 + 1) / (tf + norm[ids]))
+
+    @classmethod
+    def from_text(cls, text: str, chunk_tokens: int = CHUNK_TOKENS) -> "ChunkIndex":
+        """
+        Split text into sentence-aligned chunks and index them.
+
+        Args:
+            text: The text to index
+            chunk_tokens: Token budget per chunk
+
+        Returns:
+            ChunkIndex: The index
+        """
+        return cls(tokens.chunk_text(text, chunk_tokens))
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """
+        Find the chunks most relevant to a query.
+
+        Args:
+            query: The query text
+            k: Maximum number of chunks to return
+
+        Returns:
+            List[Tuple[int, float]]: (chunk id, BM25 score) pairs, best first;
+            only chunks sharing a term with the query are returned
+        """
+        scores = np.zeros(len(self.chunks))
+        for word in set(terms(query)):
+            if word in self.postings:
+                ids, weights = self.postings[word]
+                scores[ids] += weights
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        ranked = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(int(chunk_id), float(scores[chunk_id])) for chunk_id in ranked]
+
+    def context(self, query: str, k: int) -> List[str]:
+        """
+        Get the chunks to show the model for a query, in document order.
+
+        A query that matches nothing (e.g. "summarize this") gets ``k`` chunks
+        spread evenly over the document instead.
+
+        Args:
+            query: The query text
+            k: Maximum number of chunks
+
+        Returns:
+            List[str]: The chunks, in the order they appear in the document
+        """
+        ids = [chunk_id for chunk_id, _ in self.search(query, k)]
+        if not ids and self.chunks:
+            ids = np.linspace(0, len(self.chunks) - 1, min(k, len(self.chunks))).round().astype(int).tolist()
+        return [self.chunks[chunk_id] for chunk_id in sorted(set(ids))]
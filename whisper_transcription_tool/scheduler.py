@@ -0,0 +1,444 @@
+"""
+Rate-limit-aware scheduling for OpenAI API requests.
+
+Every endpoint (chat, transcription, images) gets one shared RequestScheduler.
+It paces requests with token buckets seeded from config and corrected from the
+x-ratelimit-* response headers, retries throttled and transient failures with
+jittered exponential backoff, and adapts how many requests are in flight
+(additive increase, multiplicative decrease on 429s and latency spikes).
+"""
+import re
+import time
+import random
+import asyncio
+import threading
+import openai
+from typing import Optional, Dict, Any, Callable, IO
+from whisper_transcription_tool import config
+
+# Constants
+RETRY_STATUS = (408, 409, 429, 500, 502, 503, 504)
+MAX_RETRIES = 6
+BASE_DELAY = 0.5  # First backoff ceiling in seconds, doubled per attempt
+MAX_DELAY = 30.0
+POLL_INTERVAL = 0.01  # How often async callers re-check for a free slot
+LATENCY_ALPHA = 0.2  # Weight of the newest sample in the latency average
+DECREASE_FACTOR = 0.5  # Concurrency multiplier after a 429
+LATENCY_DECREASE_FACTOR = 0.9  # Gentler multiplier when latency degrades
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a rate-limit reset duration such as "20ms", "1s" or "6m0s".
+
+    Args:
+        value: Header value, or None if the header was absent
+
+    Returns:
+        Optional[float]: Duration in seconds, or None if it could not be parsed
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at a per-minute rate.
+
+    Reservations may drive the level negative; the caller then waits until the
+    debt is repaid, which queues concurrent callers in arrival order without
+    polling. A bucket with no rate never delays.
+    """
+
+    def __init__(self, per_minute: float):
+        """
+        Initialize the bucket full.
+
+        Args:
+            per_minute: Sustained budget per minute; 0 disables the bucket
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take ``amount`` from the bucket.
+
+        Args:
+            amount: Units to consume (requests or tokens)
+
+        Returns:
+            float: Seconds to wait before the reservation may be used
+        """
+        if self.rate <= 0 or amount <= 0:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level -= min(amount, self.capacity)
+            return max(0.0, -self.level / self.rate)
+
+    def adjust(self, amount: float) -> None:
+        """
+        Return (positive) or charge (negative) units after the true cost is known.
+
+        Args:
+            amount: Units to add back to the bucket
+        """
+        if self.rate <= 0:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level = min(self.capacity, self.level + amount)
+
+    def sync(self, limit: Optional[float], remaining: Optional[float]) -> None:
+        """
+        Align the bucket with the server's view from rate-limit headers.
+
+        Args:
+            limit: Per-minute limit reported by the server
+            remaining: Units the server says are left in the current window
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if limit:
+                self.rate = limit / 60.0
+                self.capacity = float(limit)
+            if remaining is not None and self.rate > 0:
+                self.level = min(self.level, remaining)
+
+
+class RequestScheduler:
+    """
+    Admission control, retries and adaptive concurrency for one API endpoint.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 max_concurrency: int = 8, min_concurrency: int = 1,
+                 latency_tolerance: float = 0, max_retries: int = MAX_RETRIES):
+        """
+        Initialize the scheduler.
+
+        Args:
+            name: Endpoint name used in messages and stats
+            requests_per_minute: Initial request budget until headers say otherwise
+            tokens_per_minute: Initial token budget; 0 for endpoints not billed in tokens
+            max_concurrency: Upper bound on requests in flight
+            min_concurrency: Lower bound the limit never shrinks below
+            latency_tolerance: Shrink concurrency when average latency exceeds this
+                multiple of the fastest observed; 0 disables the latency signal
+            max_retries: Retries per request before the error is raised
+        """
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.latency_tolerance = latency_tolerance
+        self.max_retries = max_retries
+        # Start halfway and let additive increase find the ceiling
+        self.limit = float(max(min_concurrency, (max_concurrency + 1) // 2))
+        self.in_flight = 0
+        self.successes = 0
+        self.throttled = 0
+        self.retries = 0
+        self.failures = 0
+        self.latency_avg: Optional[float] = None
+        self.latency_floor: Optional[float] = None
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    # Concurrency slots
+
+    def _try_enter(self) -> bool:
+        with self._cond:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def _enter(self) -> None:
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait(POLL_INTERVAL * 10)
+            self.in_flight += 1
+
+    def _exit(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def _admission_delay(self, estimated_tokens: int) -> float:
+        """Reserve budget for one request and return how long to wait before sending it."""
+        delay = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        return max(delay, self._paused_until - time.monotonic())
+
+    def try_admit(self, estimated_tokens: int = 0) -> bool:
+        """
+        Admit an extra attempt of a request in flight (a hedge), only if a slot and
+        budget are free right now; a hedge that had to queue would be too late.
+
+        Args:
+            estimated_tokens: Token cost of the attempt
+
+        Returns:
+            bool: True if admitted; the caller calls ``release`` when the attempt ends
+        """
+        if not self._try_enter():
+            return False
+        if self._admission_delay(estimated_tokens) > 0:
+            # Hand back the reservation taken by the check
+            self.requests.adjust(1)
+            self.tokens.adjust(estimated_tokens)
+            self._exit()
+            return False
+        return True
+
+    def release(self) -> None:
+        """Free the slot of an attempt admitted with ``try_admit``."""
+        self._exit()
+
+    # Feedback
+
+    def _decrease(self, factor: float) -> None:
+        """Multiplicatively shrink the limit, at most once per latency window."""
+        now = time.monotonic()
+        with self._cond:
+            if now - self._last_decrease < (self.latency_avg or 1.0):
+                return
+            self.limit = max(float(self.min_concurrency), self.limit * factor)
+            self._last_decrease = now
+
+    def _observe_headers(self, headers: Any) -> None:
+        """Update the buckets from x-ratelimit-* headers."""
+        if headers is None:
+            return
+
+        def number(key: str) -> Optional[float]:
+            try:
+                return float(headers.get(key))
+            except (TypeError, ValueError):
+                return None
+
+        self.requests.sync(number("x-ratelimit-limit-requests"), number("x-ratelimit-remaining-requests"))
+        self.tokens.sync(number("x-ratelimit-limit-tokens"), number("x-ratelimit-remaining-tokens"))
+
+    def _on_success(self, result: Any, latency: float, estimated_tokens: int) -> Any:
+        """Record a completed request and return its parsed response."""
+        if hasattr(result, "parse") and hasattr(result, "headers"):
+            self._observe_headers(result.headers)
+            result = result.parse()
+
+        usage = getattr(result, "usage", None)
+        if estimated_tokens and getattr(usage, "total_tokens", None):
+            self.tokens.adjust(estimated_tokens - usage.total_tokens)
+
+        with self._cond:
+            self.successes += 1
+            if self.latency_avg is None:
+                self.latency_avg = latency
+            else:
+                self.latency_avg += LATENCY_ALPHA * (latency - self.latency_avg)
+            self.latency_floor = latency if self.latency_floor is None else min(self.latency_floor, latency)
+            degraded = (self.latency_tolerance > 0
+                        and self.latency_avg > self.latency_tolerance * self.latency_floor)
+            if not degraded:
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+                self._cond.notify_all()
+
+        if degraded:
+            self._decrease(LATENCY_DECREASE_FACTOR)
+        return result
+
+    def _on_error(self, error: Exception, attempt: int) -> Optional[float]:
+        """
+        Classify a failed attempt.
+
+        Args:
+            error: The exception raised by the API call
+            attempt: Zero-based attempt number
+
+        Returns:
+            Optional[float]: Seconds to wait before retrying, or None to give up
+        """
+        status = getattr(error, "status_code", None)
+        retryable = isinstance(error, openai.APIConnectionError) or status in RETRY_STATUS
+        # An exhausted quota is reported as a 429 but will not recover by waiting
+        if getattr(error, "code", None) == "insufficient_quota":
+            retryable = False
+        if not retryable or attempt >= self.max_retries:
+            with self._cond:
+                self.failures += 1
+            return None
+
+        # Full jitter keeps concurrent retries from arriving in lockstep
+        delay = random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** attempt))
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if status == 429:
+            with self._cond:
+                self.throttled += 1
+            self._decrease(DECREASE_FACTOR)
+            if headers is not None:
+                self._observe_headers(headers)
+                retry_after_ms = parse_duration(headers.get("retry-after-ms"))
+                hinted = [
+                    retry_after_ms / 1000 if retry_after_ms is not None else None,
+                    parse_duration(headers.get("retry-after")),
+                    parse_duration(headers.get("x-ratelimit-reset-requests")),
+                    parse_duration(headers.get("x-ratelimit-reset-tokens")),
+                ]
+                hinted = [value for value in hinted if value is not None]
+                if hinted:
+                    delay = min(MAX_DELAY, max(hinted)) + random.uniform(0, BASE_DELAY)
+            # Hold back every caller, not just this one, until the window resets
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+        with self._cond:
+            self.retries += 1
+        print(f"{self.name} request failed ({status or type(error).__name__}), "
+              f"retrying in {delay:.1f} seconds (attempt {attempt + 1}/{self.max_retries})...")
+        return delay
+
+    # Entry points
+
+    def call(self, fn: Callable[..., Any], *args: Any, estimated_tokens: int = 0,
+             rewind: Optional[IO] = None, **kwargs: Any) -> Any:
+        """
+        Run an API call under the scheduler.
+
+        Args:
+            fn: The API method; ``with_raw_response`` methods let the scheduler read headers
+            estimated_tokens: Token cost to reserve up front, corrected from usage afterwards
+            rewind: Upload stream to seek back to the start before every attempt
+            *args, **kwargs: Passed through to ``fn``
+
+        Returns:
+            Any: The parsed API response
+
+        Raises:
+            Exception: The last error once it is not retryable or retries are exhausted
+        """
+        attempt = 0
+        while True:
+            self._enter()
+            try:
+                delay = self._admission_delay(estimated_tokens)
+                if delay > 0:
+                    time.sleep(delay)
+                if rewind is not None:
+                    rewind.seek(0)
+                start_time = time.monotonic()
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception as e:
+                    retry_delay = self._on_error(e, attempt)
+                    if retry_delay is None:
+                        raise
+                else:
+                    return self._on_success(result, time.monotonic() - start_time, estimated_tokens)
+            finally:
+                self._exit()
+            time.sleep(retry_delay)
+            attempt += 1
+
+    async def call_async(self, fn: Callable[..., Any], *args: Any, estimated_tokens: int = 0,
+                         rewind: Optional[IO] = None, **kwargs: Any) -> Any:
+        """
+        Asynchronous twin of ``call`` for coroutine API methods.
+        """
+        attempt = 0
+        while True:
+            while not self._try_enter():
+                await asyncio.sleep(POLL_INTERVAL)
+            try:
+                delay = self._admission_delay(estimated_tokens)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if rewind is not None:
+                    rewind.seek(0)
+                start_time = time.monotonic()
+                try:
+                    result = await fn(*args, **kwargs)
+                except Exception as e:
+                    retry_delay = self._on_error(e, attempt)
+                    if retry_delay is None:
+                        raise
+                else:
+                    return self._on_success(result, time.monotonic() - start_time, estimated_tokens)
+            finally:
+                self._exit()
+            await asyncio.sleep(retry_delay)
+            attempt += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get scheduler statistics.
+
+        Returns:
+            Dict[str, Any]: Concurrency limit, request outcomes and latency
+        """
+        with self._cond:
+            return {
+                "endpoint": self.name,
+                "concurrency_limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "successes": self.successes,
+                "throttled": self.throttled,
+                "retries": self.retries,
+                "failures": self.failures,
+                "latency_avg": self.latency_avg,
+                "requests_per_minute": self.requests.rate * 60,
+                "tokens_per_minute": self.tokens.rate * 60,
+            }
+
+
+_schedulers: Dict[str, RequestScheduler] = {}
+_registry_lock = threading.Lock()
+
+
+def get_scheduler(name: str) -> RequestScheduler:
+    """
+    Get the shared scheduler for an endpoint, creating it from config on first use.
+
+    Args:
+        name: Endpoint name ("chat", "transcription", "images")
+
+    Returns:
+        RequestScheduler: The endpoint's scheduler
+    """
+    with _registry_lock:
+        if name not in _schedulers:
+            settings = config.RATE_LIMIT_SETTINGS.get(name, config.RATE_LIMIT_SETTINGS["default"])
+            _schedulers[name] = RequestScheduler(name, **settings)
+        return _schedulers[name]
+
+
+def scheduler_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get statistics for every scheduler used so far.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Stats keyed by endpoint name
+    """
+    with _registry_lock:
+        schedulers = list(_schedulers.values())
+    return {scheduler.name: scheduler.stats() for scheduler in schedulers}
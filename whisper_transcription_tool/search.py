@@ -0,0 +1,392 @@
+"""
+Full-text search over transcripts and processed outputs.
+
+Documents live in an SQLite FTS5 index (positional postings, BM25 ranking and
+snippet extraction are all built into FTS5) stored next to the catalog tables.
+Files are indexed as they are saved by ``transcription.save_transcript`` and the
+processors; a directory that changed behind our back (files copied in or
+deleted) is re-synced the next time it is searched by joining the catalog's rows
+against the indexed documents.
+
+Transcripts can also be indexed as ~300-token chunks (``index_chunks``) for
+retrieval across documents: the conversation assistant looks up the passages
+of a set of transcripts relevant to each question with ``search_chunks``. Chunks
+are indexed on first use and kept until the transcript changes, so later
+sessions over the same transcripts reuse them.
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from typing import Optional, Dict, Any, List, Iterable
+from whisper_transcription_tool import catalog, retrieval, tokens
+
+# Constants
+INDEX_PATH = catalog.CATALOG_PATH  # Shared so sync can join against the catalog
+SEARCH_KINDS = ("transcript", "processed")
+SNIPPET_TOKENS = 16
+# Marks around matched terms in snippets; callers replace them with their own styling
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS search_passages USING fts5(
+    body,
+    path UNINDEXED,
+    kind UNINDEXED,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS search_documents (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    doc_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS search_synced (
+    kind TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS search_chunks USING fts5(
+    body,
+    path UNINDEXED,
+    chunk UNINDEXED,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS search_chunked (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    first_chunk INTEGER NOT NULL,
+    chunks INTEGER NOT NULL
+);
+"""
+
+_local = threading.local()
+_QUERY_PART = re.compile(r'"([^"]+)"|(\S+)')
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _connect() -> sqlite3.Connection:
+    """Get this thread's connection to the index, creating the schema on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(INDEX_PATH) or ".", exist_ok=True)
+        conn = sqlite3.connect(INDEX_PATH, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def _write(conn: sqlite3.Connection, path: str, kind: str, text: str, mtime: float) -> None:
+    """Replace a document's postings (caller holds a transaction)."""
+    row = conn.execute("SELECT doc_id FROM search_documents WHERE path = ?", (path,)).fetchone()
+    if row is not None:
+        conn.execute("DELETE FROM search_passages WHERE rowid = ?", (row["doc_id"],))
+    cursor = conn.execute("INSERT INTO search_passages (body, path, kind) VALUES (?, ?, ?)", (text, path, kind))
+    conn.execute("INSERT OR REPLACE INTO search_documents VALUES (?, ?, ?, ?)", (path, kind, mtime, cursor.lastrowid))
+
+
+def _delete(conn: sqlite3.Connection, path: str) -> None:
+    """Remove a document's postings and chunks (caller holds a transaction)."""
+    row = conn.execute("SELECT doc_id FROM search_documents WHERE path = ?", (path,)).fetchone()
+    if row is not None:
+        conn.execute("DELETE FROM search_passages WHERE rowid = ?", (row["doc_id"],))
+        conn.execute("DELETE FROM search_documents WHERE path = ?", (path,))
+    _delete_chunks(conn, path)
+
+
+def _delete_chunks(conn: sqlite3.Connection, path: str) -> None:
+    """Remove a document's chunks (caller holds a transaction)."""
+    row = conn.execute("SELECT first_chunk, chunks FROM search_chunked WHERE path = ?", (path,)).fetchone()
+    if row is not None:
+        # A document's chunks have consecutive rowids; deleting by path would scan the table
+        conn.execute("DELETE FROM search_chunks WHERE rowid >= ? AND rowid < ?",
+                     (row["first_chunk"], row["first_chunk"] + row["chunks"]))
+        conn.execute("DELETE FROM search_chunked WHERE path = ?", (path,))
+
+
+def index_file(path: str, kind: str, text: Optional[str] = None) -> None:
+    """
+    Add or update a file in the index.
+
+    Args:
+        path: Path to the file
+        kind: Catalog kind of the file ("transcript" or "processed")
+        text: The file's content, if the caller already has it in memory
+    """
+    try:
+        path = os.path.normpath(path)
+        if text is None:
+            with open(path, "r", encoding="utf-8", errors="replace") as file:
+                text = file.read()
+        conn = _connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _write(conn, path, kind, text, os.path.getmtime(path))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    except Exception as e:
+        print(f"Error indexing {path}: {e}")
+
+
+def remove_file(path: str) -> None:
+    """
+    Remove a file from the index.
+
+    Args:
+        path: Path to the file
+    """
+    try:
+        conn = _connect()
+        conn.execute("BEGIN IMMEDIATE")
+        _delete(conn, os.path.normpath(path))
+        conn.execute("COMMIT")
+    except Exception as e:
+        print(f"Error removing {path} from the search index: {e}")
+
+
+def sync(kinds: Iterable[str] = SEARCH_KINDS, force: bool = False) -> int:
+    """
+    Index new or changed files and drop deleted ones.
+
+    A kind is only compared against the catalog when its directory's mtime moved
+    since the last sync, so searching an unchanged corpus costs a couple of stats
+    per kind.
+
+    Args:
+        kinds: Catalog kinds to sync
+        force: Compare even if the directory looks unchanged
+
+    Returns:
+        int: Number of files (re)indexed or removed
+    """
+    conn = _connect()
+    changed = 0
+    for kind in kinds:
+        directory = catalog.kind_directory(kind)
+        if directory is None:
+            continue
+        catalog.refresh(kind)
+        try:
+            dir_mtime = os.stat(directory).st_mtime_ns
+        except FileNotFoundError:
+            continue
+        row = conn.execute("SELECT mtime_ns FROM search_synced WHERE kind = ?", (kind,)).fetchone()
+        if not force and row is not None and row["mtime_ns"] == dir_mtime:
+            continue
+
+        stale = conn.execute(
+            "SELECT a.path, a.mtime FROM artifacts a LEFT JOIN search_documents d ON d.path = a.path "
+            "WHERE a.kind = ? AND a.directory = ? AND (d.path IS NULL OR d.mtime != a.mtime)",
+            (kind, directory)
+        ).fetchall()
+        gone = conn.execute(
+            "SELECT d.path FROM search_documents d LEFT JOIN artifacts a ON a.path = d.path "
+            "WHERE d.kind = ? AND a.path IS NULL",
+            (kind,)
+        ).fetchall()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for entry in gone:
+                _delete(conn, entry["path"])
+                changed += 1
+            for entry in stale:
+                try:
+                    with open(entry["path"], "r", encoding="utf-8", errors="replace") as file:
+                        _write(conn, entry["path"], kind, file.read(), entry["mtime"])
+                    changed += 1
+                except FileNotFoundError:
+                    continue
+            conn.execute("INSERT OR REPLACE INTO search_synced VALUES (?, ?)", (kind, dir_mtime))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    return changed
+
+
+def build_query(text: str) -> Optional[str]:
+    """
+    Turn user input into an FTS5 query.
+
+    Words must all appear (in any order); text in double quotes must appear as an
+    exact phrase. Everything is quoted so punctuation can't break the query syntax.
+
+    Args:
+        text: The search text
+
+    Returns:
+        Optional[str]: The FTS5 MATCH expression, or None if the input has no words
+    """
+    parts = []
+    for phrase, word in _QUERY_PART.findall(text):
+        words = _WORD.findall(phrase or word)
+        if words:
+            parts.append('"' + " ".join(words) + '"')
+    return " AND ".join(parts) if parts else None
+
+
+def search(text: str, limit: int = 10, kinds: Iterable[str] = SEARCH_KINDS) -> List[Dict[str, Any]]:
+    """
+    Search transcripts and processed outputs.
+
+    Args:
+        text: Words to find; "quoted text" matches an exact phrase
+        limit: Maximum number of results
+        kinds: Catalog kinds to search
+
+    Returns:
+        List[Dict[str, Any]]: Best matches first, each with path, kind, score
+        (higher is better) and a snippet with matches between HIGHLIGHT_START
+        and HIGHLIGHT_END
+    """
+    query = build_query(text)
+    if query is None:
+        return []
+    kinds = tuple(kinds)
+
+    try:
+        sync(kinds)
+        # The kinds go in as one JSON array so the statement text never changes
+        rows = _connect().execute(
+            "SELECT path, kind, bm25(search_passages) AS rank, "
+            "snippet(search_passages, 0, ?, ?, '...', ?) AS snippet "
+            "FROM search_passages WHERE search_passages MATCH ? "
+            "AND kind IN (SELECT value FROM json_each(?)) ORDER BY rank LIMIT ?",
+            (HIGHLIGHT_START, HIGHLIGHT_END, SNIPPET_TOKENS, query, json.dumps(kinds), limit)
+        ).fetchall()
+        # FTS5 reports BM25 as a negative number (lower is better)
+        return [{"path": row["path"], "kind": row["kind"], "score": -row["rank"],
+                 "snippet": row["snippet"]} for row in rows]
+
+    except Exception as e:
+        print(f"Error searching: {e}")
+        return []
+
+
+def rebuild(kinds: Iterable[str] = SEARCH_KINDS) -> int:
+    """
+    Re-index every file from scratch.
+
+    Args:
+        kinds: Catalog kinds to index
+
+    Returns:
+        int: Number of files indexed
+    """
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute("DELETE FROM search_passages")
+    conn.execute("DELETE FROM search_documents")
+    conn.execute("DELETE FROM search_synced")
+    conn.execute("DELETE FROM search_chunks")
+    conn.execute("DELETE FROM search_chunked")
+    conn.execute("COMMIT")
+    start_time = time.time()
+    count = sync(kinds, force=True)
+    print(f"Indexed {count} files in {time.time() - start_time:.2f} seconds.")
+    return count
+
+
+def index_chunks(paths: Iterable[str], chunk_tokens: int = retrieval.CHUNK_TOKENS) -> int:
+    """
+    Make sure files are indexed as chunks for ``search_chunks``.
+
+    Files already indexed and unchanged since are skipped; changed files are
+    re-chunked and missing ones dropped.
+
+    Args:
+        paths: Paths to the files
+        chunk_tokens: Token budget per chunk
+
+    Returns:
+        int: Number of files (re)indexed
+    """
+    conn = _connect()
+    count = 0
+    for path in paths:
+        path = os.path.normpath(path)
+        try:
+            try:
+                mtime = os.path.getmtime(path)
+            except FileNotFoundError:
+                conn.execute("BEGIN IMMEDIATE")
+                _delete_chunks(conn, path)
+                conn.execute("COMMIT")
+                continue
+            row = conn.execute("SELECT mtime FROM search_chunked WHERE path = ?", (path,)).fetchone()
+            if row is not None and row["mtime"] == mtime:
+                continue
+            with open(path, "r", encoding="utf-8", errors="replace") as file:
+                chunks = tokens.chunk_text(file.read(), chunk_tokens)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                _delete_chunks(conn, path)
+                last = conn.execute("SELECT rowid FROM search_chunks ORDER BY rowid DESC LIMIT 1").fetchone()
+                first = (last[0] if last is not None else 0) + 1
+                conn.executemany("INSERT INTO search_chunks (rowid, body, path, chunk) VALUES (?, ?, ?, ?)",
+                                 ((first + number, chunk, path, number) for number, chunk in enumerate(chunks)))
+                conn.execute("INSERT INTO search_chunked VALUES (?, ?, ?, ?)", (path, mtime, first, len(chunks)))
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            count += 1
+        except Exception as e:
+            print(f"Error indexing chunks of {path}: {e}")
+    return count
+
+
+def search_chunks(text: str, paths: Iterable[str], limit: int = 6) -> List[Dict[str, Any]]:
+    """
+    Find the chunks of a set of files most relevant to a question.
+
+    Unlike ``search``, chunks need not contain every word: any word other than a
+    stopword counts, and BM25 ranks chunks with more (and rarer) words first.
+
+    Args:
+        text: The question
+        paths: Files to search, indexed with ``index_chunks``
+        limit: Maximum number of chunks
+
+    Returns:
+        List[Dict[str, Any]]: Best matches first, each with path, chunk (its
+        0-based position in the file), body and score (higher is better)
+    """
+    words = sorted(set(retrieval.terms(text)))
+    paths = [os.path.normpath(path) for path in paths]
+    if not words or not paths:
+        return []
+    query = " OR ".join(f'"{word}"' for word in words)
+
+    try:
+        rows = _connect().execute(
+            "SELECT path, chunk, body, bm25(search_chunks) AS rank FROM search_chunks "
+            "WHERE search_chunks MATCH ? AND path IN (SELECT value FROM json_each(?)) "
+            "ORDER BY rank LIMIT ?",
+            (query, json.dumps(paths), limit)
+        ).fetchall()
+        return [{"path": row["path"], "chunk": row["chunk"], "body": row["body"], "score": -row["rank"]}
+                for row in rows]
+
+    except Exception as e:
+        print(f"Error searching chunks: {e}")
+        return []
+
+
+def index_stats() -> Dict[str, Any]:
+    """
+    Get index statistics.
+
+    Returns:
+        Dict[str, Any]: Document counts per kind
+    """
+    rows = _connect().execute("SELECT kind, COUNT(*) AS documents FROM search_documents GROUP BY kind")
+    return {row["kind"]: row["documents"] for row in rows}
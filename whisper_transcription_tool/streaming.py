@@ -0,0 +1,121 @@
+"""
+Incremental display of streamed GPT output.
+
+A ``StreamDisplay`` receives text from ``client.stream_chat_completion`` as it
+arrives, renders it live in the Rich console and appends it to an output file,
+so long completions can be read (and tailed) while they are generated.
+"""
+import os
+from typing import Optional, Dict, IO
+from rich.console import Console
+from rich.live import Live
+from rich.markdown import Markdown
+from rich.panel import Panel
+from whisper_transcription_tool import config
+
+# Initialize Rich console
+console = Console()
+
+
+class StreamDisplay:
+    """
+    Shows a streamed completion in the console and writes it to a file as it arrives.
+
+    Use as a context manager around the streaming call, passing ``write`` as
+    ``on_text`` and ``reset`` as ``on_start``. The live view is re-rendered at
+    most ``refresh_per_second`` times a second however fast tokens arrive, and
+    is replaced by the full text when the stream ends.
+    """
+
+    def __init__(self, title: str, path: Optional[str] = None, markdown: bool = True,
+                 border_style: str = "green"):
+        """
+        Initialize the display.
+
+        Args:
+            title: Panel title
+            path: File to write the text to as it arrives (None only displays it)
+            markdown: Render the text as Markdown rather than plain text
+            border_style: Panel border style
+        """
+        self.title = title
+        self.path = path
+        self.markdown = markdown
+        self.border_style = border_style
+        self.text = ""
+        self._parts = []
+        self._file: Optional[IO] = None
+        self._live: Optional[Live] = None
+
+    def __rich__(self) -> Panel:
+        # Called by Live at each refresh, so the text is only joined and parsed that often
+        self.text = "".join(self._parts)
+        body = Markdown(self.text) if self.markdown else self.text
+        return Panel(body, title=self.title, title_align="left", border_style=self.border_style)
+
+    def __enter__(self) -> "StreamDisplay":
+        if self.path is not None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "w", encoding="utf-8")
+        # Transient: a panel taller than the terminal can't be redrawn in place, so
+        # the live view is cleared and the full text printed once at the end
+        self._live = Live(self, console=console, transient=True,
+                          refresh_per_second=config.STREAM_SETTINGS["refresh_per_second"])
+        self._live.start()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self._live.stop()
+        if self._file is not None:
+            self._file.close()
+        if exc_type is None and self._parts:
+            console.print(self)
+
+    def reset(self) -> None:
+        """Discard the text received so far (the request is being retried)."""
+        self._parts = []
+        if self._file is not None:
+            self._file.seek(0)
+            self._file.truncate()
+
+    def write(self, text: str) -> None:
+        """
+        Add a piece of streamed text.
+
+        Args:
+            text: The new text
+        """
+        self._parts.append(text)
+        if self._file is not None:
+            self._file.write(text)
+            # Flush so the file can be followed while the completion is generated
+            self._file.flush()
+
+
+def report_timing(timing: Dict[str, float], completion_tokens: Optional[int] = None) -> None:
+    """
+    Print the latency of a streamed completion.
+
+    Args:
+        timing: Seconds to the first token and in total, from ``client.stream_chat_completion``
+        completion_tokens: Tokens generated, if the API reported usage
+    """
+    rate = ""
+    generating = timing["total"] - timing["first_token"]
+    if completion_tokens and generating > 0:
+        rate = f", {completion_tokens} tokens at {completion_tokens / generating:.0f} tokens/s"
+    console.print(f"[dim]First token after {timing['first_token']:.2f}s, "
+                  f"complete after {timing['total']:.2f}s{rate}[/]")
+
+
+def show(title: str, text: str, markdown: bool = True) -> None:
+    """
+    Print a completed result in the same panel a stream is shown in.
+
+    Args:
+        title: Panel title
+        text: The text to show
+        markdown: Render the text as Markdown rather than plain text
+    """
+    body = Markdown(text) if markdown else text
+    console.print(Panel(body, title=title, title_align="left", border_style="green"))
@@ -0,0 +1,110 @@
+"""
+Token counting and token-budgeted chunking of transcripts.
+
+Counts use tiktoken when it is installed and fall back to an estimate of about
+four characters per token otherwise.
+"""
+import re
+import functools
+from typing import List, Any
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Constants
+ENCODING = "o200k_base"  # Tokenizer of the gpt-4.1 / gpt-4o model family
+CHARS_PER_TOKEN = 4  # Estimate used without tiktoken
+
+# Sentence ends followed by whitespace, or line breaks (segment boundaries)
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\s*\n+\s*")
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding() -> Any:
+    return tiktoken.get_encoding(ENCODING) if tiktoken is not None else None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens in a piece of text.
+
+    Args:
+        text: The text to count
+
+    Returns:
+        int: Token count (an estimate if tiktoken isn't installed)
+    """
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences and line-separated segments.
+
+    Args:
+        text: The text to split
+
+    Returns:
+        List[str]: Non-empty sentences in order
+    """
+    return [sentence for sentence in _SENTENCE_BREAK.split(text.strip()) if sentence]
+
+
+def _split_long(sentence: str, max_tokens: int) -> List[str]:
+    """Break a sentence longer than the budget at word boundaries."""
+    pieces = []
+    current: List[str] = []
+    current_tokens = 0
+    for word in sentence.split():
+        # Words after the first in a piece carry a leading space, about one more token
+        word_tokens = count_tokens(word) + (1 if current else 0)
+        if current and current_tokens + word_tokens > max_tokens:
+            pieces.append(" ".join(current))
+            current, current_tokens = [], count_tokens(word)
+        else:
+            current_tokens += word_tokens
+        current.append(word)
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def chunk_text(text: str, max_tokens: int) -> List[str]:
+    """
+    Split text into chunks of whole sentences that each fit a token budget.
+
+    Sentences are packed greedily in order; a single sentence longer than the
+    budget is split between words.
+
+    Args:
+        text: The text to split
+        max_tokens: Token budget per chunk
+
+    Returns:
+        List[str]: The chunks, in order
+    """
+    chunks = []
+    current: List[str] = []
+    current_tokens = 0
+    for sentence in split_sentences(text):
+        sentence_tokens = count_tokens(sentence)
+        if sentence_tokens > max_tokens:
+            if current:
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+            chunks.extend(_split_long(sentence, max_tokens))
+            continue
+        # +1 for the space joining the sentence to the chunk
+        if current and current_tokens + sentence_tokens + 1 > max_tokens:
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(sentence)
+        current_tokens += sentence_tokens + (1 if current_tokens else 0)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
@@ -1,23 +1,72 @@
 import os
 import time
-import openai
+import asyncio
+import functools
 import json
+import hashlib
+import soundfile as sf
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 from typing import Optional, Dict, Any, List, Tuple, Union
 from datetime import datetime
+from whisper_transcription_tool import audio, cache, catalog, engines, search
 
 # Constants
 TRANSCRIPTS_DIR = "data/transcripts"
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024  # Whisper API request size limit
+SEGMENT_BYTES = 24 * 1024 * 1024  # Target segment size, leaving room for multipart overhead
+MIN_SEGMENT_SECONDS = 30  # Don't cut at silences that would leave tiny segments
+MAX_WORKERS = 4
+PATH_HASH_CHARS = 8  # Length of the path hash that keeps batch transcript names unique
+# Extensions picked up by batch transcription
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".flac", ".ogg", ".oga", ".webm", ".mp4", ".aac", ".wma", ".aiff")
+# Formats the Whisper API accepts directly; anything else is converted first
+WHISPER_FORMATS = (".flac", ".m4a", ".mp3", ".mp4", ".mpeg", ".mpga", ".oga", ".ogg", ".wav", ".webm")
+
+# Upload encoding policy: small requests go as WAV (encoding isn't worth the CPU),
+# mid-size requests as lossless FLAC, and large ones as Opus where the uplink dominates
+UPLOAD_CODEC = "auto"
+FLAC_MIN_BYTES = 1 * 1024 * 1024
+OPUS_MIN_BYTES = 16 * 1024 * 1024
+
+# Transcription result cache, keyed by audio content hash + request parameters
+CACHE_MAX_BYTES = 256 * 1024 * 1024
 
 # Create necessary directories if they don't exist
 os.makedirs(TRANSCRIPTS_DIR, exist_ok=True)
+catalog.define_kind("transcript", TRANSCRIPTS_DIR, (".txt",), order="ctime")
+
+_cache = cache.DiskCache(os.path.join(cache.CACHE_DIR, "transcriptions"), CACHE_MAX_BYTES)
 
-def transcribe_audio(audio_file_path: str, model: str = "whisper-1") -> Optional[Dict[str, Any]]:
+def transcribe_audio(audio_file_path: str, model: Optional[str] = None,
+                     trim_silence: bool = False, resample: bool = True,
+                     codec: str = UPLOAD_CODEC, use_cache: bool = True,
+                     transcript_path: Optional[str] = None,
+                     hedge: Optional[bool] = None,
+                     engine: Optional[str] = None) -> Optional[Dict[str, Any]]:
     """
-    Transcribe an audio file using OpenAI's Whisper API.
+    Transcribe an audio file using OpenAI's Whisper API or another engine.
+    
+    API engines get an upload (resampled, trimmed or converted as needed);
+    in-process engines get 16 kHz samples and have no upload size limit.
     
     Args:
         audio_file_path: Path to the audio file to transcribe
-        model: Whisper model to use (default: "whisper-1")
+        model: Model for API engines (None uses the model in ``config.ENGINE_SETTINGS``)
+        trim_silence: Compress long silent spans before upload. The result then
+            carries an ``offset_map`` (see ``audio.map_to_original``) and ``sample_rate``
+            for mapping positions back to the original file.
+        resample: Downmix and resample WAV input to 16 kHz mono in memory before
+            upload. Compressed formats are uploaded as-is since decoding them to
+            PCM would make the request larger.
+        codec: Upload codec for resampled or trimmed audio ("auto", "wav", "flac"
+            or "opus"); see ``choose_upload_codec``
+        use_cache: Return a cached result for identical audio content and parameters
+        transcript_path: Where to save the transcript (defaults to a timestamped file)
+        hedge: Send a duplicate request when one is slower than usual (None uses
+            the transcription setting in ``config.HEDGE_SETTINGS``)
+        engine: Transcription engine name from ``engines.ENGINES`` (None uses the
+            engine in ``config.TRANSCRIPTION_SETTINGS``)
         
     Returns:
         Optional[Dict[str, Any]]: The transcription result or None if transcription failed
@@ -27,37 +76,461 @@ def transcribe_audio(audio_file_path: str, model: str = "whisper-1") -> Optional
         return None
         
     try:
-        print(f"Transcribing {os.path.basename(audio_file_path)} using whisper-1 model...")
+        transcriber = _get_transcriber(engine, model)
+        cache_key = None
+        if use_cache:
+            cache_key = _cache_key(audio_file_path, "single", trim_silence=trim_silence,
+                                   resample=resample, codec=codec, **transcriber.cache_params())
+            cached = _load_cached(cache_key, transcript_path, audio_file_path)
+            if cached is not None:
+                return cached
+        
+        upload = None
+        if not transcriber.takes_samples:
+            upload = _open_upload(audio_file_path, trim_silence, resample, codec)
+            if upload is None:
+                return None
+            if _needs_chunking(upload[1]):
+                upload[1].close()
+                print("File exceeds the 25 MB upload limit; switching to chunked transcription.")
+                result = transcribe_audio_chunked(audio_file_path, model=model, codec=codec,
+                                                  use_cache=use_cache, transcript_path=transcript_path,
+                                                  hedge=hedge, engine=engine, trim_silence=trim_silence)
+                if result is not None and cache_key:
+                    _cache.put(cache_key, result)
+                return result
+        
+        print(f"Transcribing {os.path.basename(audio_file_path)} using {transcriber.model} model...")
         start_time = time.time()
         
-        # Always use text response format (no timestamps needed for simplified version)
-        response_format = "text"
+        if transcriber.takes_samples:
+            samples, _, extras = _load_samples(audio_file_path, trim_silence)
+            transcript = transcriber.transcribe(samples)
+        else:
+            file_arg, handle, extras = upload
+            with handle:
+                transcript = transcriber.transcribe(file_arg, hedge=hedge)
+        
+        elapsed_time = time.time() - start_time
+        print(f"Transcription completed in {elapsed_time:.2f} seconds.")
+        
+        return _finish_transcription(transcript, extras, cache_key, transcript_path, audio_file_path,
+                                     transcriber.model)
+        
+    except Exception as e:
+        print(f"Error transcribing audio: {e}")
+        return None
+
+
+async def transcribe_audio_async(audio_file_path: str, model: Optional[str] = None,
+                                 trim_silence: bool = False, resample: bool = True,
+                                 codec: str = UPLOAD_CODEC, use_cache: bool = True,
+                                 transcript_path: Optional[str] = None,
+                                 hedge: Optional[bool] = None,
+                                 engine: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Asynchronous twin of ``transcribe_audio`` built on the shared async client.
+    
+    The upload request is awaited on the event loop, so many transcriptions can
+    be in flight from one thread. CPU-bound preparation (hashing, decoding,
+    encoding) runs in the loop's default executor.
+    
+    Args:
+        audio_file_path: Path to the audio file to transcribe
+        model: Model for API engines (None uses the model in ``config.ENGINE_SETTINGS``)
+        trim_silence: Compress long silent spans before upload
+        resample: Downmix and resample WAV input to 16 kHz mono before upload
+        codec: Upload codec for resampled or trimmed audio
+        use_cache: Return a cached result for identical audio content and parameters
+        transcript_path: Where to save the transcript (defaults to a timestamped file)
+        hedge: Send a duplicate request when one is slower than usual (None uses
+            the transcription setting in ``config.HEDGE_SETTINGS``)
+        engine: Transcription engine name from ``engines.ENGINES`` (None uses the
+            engine in ``config.TRANSCRIPTION_SETTINGS``)
+        
+    Returns:
+        Optional[Dict[str, Any]]: The transcription result or None if transcription failed
+    """
+    if not os.path.exists(audio_file_path):
+        print(f"Error: File {audio_file_path} not found.")
+        return None
+    
+    loop = asyncio.get_running_loop()
+    try:
+        transcriber = _get_transcriber(engine, model)
+        cache_key = None
+        if use_cache:
+            cache_key = await loop.run_in_executor(
+                None, functools.partial(_cache_key, audio_file_path, "single",
+                                        trim_silence=trim_silence, resample=resample, codec=codec,
+                                        **transcriber.cache_params())
+            )
+            cached = await loop.run_in_executor(None, _load_cached, cache_key, transcript_path,
+                                                audio_file_path)
+            if cached is not None:
+                return cached
         
-        with open(audio_file_path, "rb") as audio_file:
-            transcript = openai.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format=response_format
+        upload = None
+        if not transcriber.takes_samples:
+            upload = await loop.run_in_executor(
+                None, _open_upload, audio_file_path, trim_silence, resample, codec
             )
+            if upload is None:
+                return None
+            if _needs_chunking(upload[1]):
+                upload[1].close()
+                print("File exceeds the 25 MB upload limit; switching to chunked transcription.")
+                result = await loop.run_in_executor(None, functools.partial(
+                    transcribe_audio_chunked, audio_file_path, model=model, codec=codec,
+                    use_cache=use_cache, transcript_path=transcript_path, hedge=hedge, engine=engine,
+                    trim_silence=trim_silence
+                ))
+                if result is not None and cache_key:
+                    await loop.run_in_executor(None, _cache.put, cache_key, result)
+                return result
+        
+        print(f"Transcribing {os.path.basename(audio_file_path)} using {transcriber.model} model...")
+        start_time = time.time()
+        
+        if transcriber.takes_samples:
+            samples, _, extras = await loop.run_in_executor(None, _load_samples, audio_file_path, trim_silence)
+            transcript = await transcriber.transcribe_async(samples)
+        else:
+            file_arg, handle, extras = upload
+            with handle:
+                transcript = await transcriber.transcribe_async(file_arg, hedge=hedge)
         
         elapsed_time = time.time() - start_time
         print(f"Transcription completed in {elapsed_time:.2f} seconds.")
         
-        # Process response
-        result = {
-            "text": transcript.text if hasattr(transcript, "text") else transcript,
-            "model_used": "whisper-1"
-        }
+        # Saving, cataloguing, indexing and caching all block, so keep them off the loop
+        return await loop.run_in_executor(
+            None, _finish_transcription, transcript, extras, cache_key, transcript_path,
+            audio_file_path, transcriber.model
+        )
+        
+    except Exception as e:
+        print(f"Error transcribing audio: {e}")
+        return None
+
+
+def _needs_chunking(handle: Any) -> bool:
+    """Check whether a prepared upload (after trimming and encoding) exceeds the API size limit."""
+    # 16 kHz mono WAV is ~1.9 MB/minute, so only very long files still need chunking
+    position = handle.tell()
+    upload_bytes = handle.seek(0, os.SEEK_END)
+    handle.seek(position)
+    return upload_bytes > MAX_UPLOAD_BYTES
+
+
+def _load_samples(audio_file_path: str, trim_silence: bool) -> Tuple[Any, int, Dict[str, Any]]:
+    """
+    Decode a file to 16 kHz mono samples, compressing long silences if asked.
+    
+    Returns:
+        Tuple[Any, int, Dict[str, Any]]: The samples, their sample rate and extra
+        result fields (the offset map when silence was trimmed)
+    """
+    extras: Dict[str, Any] = {}
+    samples, sample_rate = audio.load_audio(audio_file_path, audio.WHISPER_RATE)
+    if trim_silence:
+        original_length = len(samples)
+        samples, offset_map = audio.trim_silence(samples, sample_rate)
+        removed = 1 - len(samples) / max(1, original_length)
+        print(f"Silence trimming removed {removed:.0%} of "
+              f"{original_length / sample_rate:.1f} seconds of audio")
+        extras["offset_map"] = offset_map
+        extras["sample_rate"] = sample_rate
+    return samples, sample_rate, extras
+
+
+def _open_upload(audio_file_path: str, trim_silence: bool, resample: bool,
+                 codec: str) -> Optional[Tuple[Any, Any, Dict[str, Any]]]:
+    """
+    Prepare the file argument for a transcription request.
+    
+    Args:
+        audio_file_path: Path to the audio file
+        trim_silence: Compress long silent spans first
+        resample: Resample WAV input to 16 kHz mono
+        codec: Upload codec for resampled or trimmed audio
+        
+    Returns:
+        Optional[Tuple[Any, Any, Dict[str, Any]]]: The ``file`` argument for the
+        API, the handle to close once the request is done, and extra result
+        fields (offset map, upload stats), or None if conversion failed
+    """
+    if trim_silence or (resample and audio_file_path.lower().endswith(".wav")):
+        samples, sample_rate, extras = _load_samples(audio_file_path, trim_silence)
+        upload, extras["upload"] = encode_upload(
+            samples, sample_rate, Path(audio_file_path).stem, codec=codec
+        )
+        return upload, upload, extras
+    
+    if audio_file_path.lower().endswith(WHISPER_FORMATS):
+        audio_file = open(audio_file_path, "rb")
+        return audio_file, audio_file, {}
+    
+    converted = audio.convert_to_wav_stream(audio_file_path)
+    if converted is None:
+        return None
+    return (f"{Path(audio_file_path).stem}.wav", converted), converted, {}
+
+
+def _finish_transcription(transcript: Any, extras: Dict[str, Any], cache_key: Optional[str],
+                          transcript_path: Optional[str], audio_file_path: str,
+                          model_used: str = "whisper-1") -> Dict[str, Any]:
+    """Build the result dict from an engine's transcript, save the transcript and cache it."""
+    result = {
+        "text": transcript.text if hasattr(transcript, "text") else transcript,
+        "model_used": model_used
+    }
+    result.update(extras)
+    
+    result["transcript_path"] = save_transcript(result["text"], transcript_path, source_path=audio_file_path)
+    if cache_key:
+        _cache.put(cache_key, result)
+    
+    return result
+
+
+def choose_upload_codec(pcm_bytes: int, codec: str = UPLOAD_CODEC) -> str:
+    """
+    Pick the upload codec for a request of the given raw PCM size.
+    
+    Args:
+        pcm_bytes: Size of the 16-bit PCM payload in bytes
+        codec: Requested codec; "auto" applies the size thresholds
+        
+    Returns:
+        str: "wav", "flac" or "opus"
+    """
+    if codec != "auto":
+        return codec
+    if pcm_bytes < FLAC_MIN_BYTES:
+        return "wav"
+    if pcm_bytes >= OPUS_MIN_BYTES and "OPUS" in sf.available_subtypes("OGG"):
+        return "opus"
+    return "flac"
+
+
+def encode_upload(samples: Any, sample_rate: int, name: str,
+                  codec: str = UPLOAD_CODEC) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Encode samples for upload in memory and report what the encoding saved.
+    
+    Args:
+        samples: Mono int16 samples
+        sample_rate: Sample rate in Hz
+        name: Filename stem for the upload
+        codec: Requested codec ("auto", "wav", "flac" or "opus")
+        
+    Returns:
+        Tuple[Any, Dict[str, Any]]: The in-memory upload and its stats (codec,
+        raw and encoded sizes, bytes saved and encode time)
+    """
+    pcm_bytes = len(samples) * 2
+    chosen = choose_upload_codec(pcm_bytes, codec)
+    
+    start_time = time.perf_counter()
+    upload = audio.encode_audio(samples, sample_rate, chosen, name=name)
+    encode_seconds = time.perf_counter() - start_time
+    
+    encoded_bytes = upload.getbuffer().nbytes
+    stats = {
+        "codec": chosen,
+        "raw_bytes": pcm_bytes,
+        "encoded_bytes": encoded_bytes,
+        "saved_bytes": pcm_bytes - encoded_bytes,
+        "encode_seconds": encode_seconds
+    }
+    if chosen != "wav":
+        print(f"Upload encoded as {chosen.upper()}: {pcm_bytes / 1048576:.2f} MB -> "
+              f"{encoded_bytes / 1048576:.2f} MB (saved {stats['saved_bytes'] / 1048576:.2f} MB) "
+              f"in {encode_seconds:.2f} s")
+    return upload, stats
+
+
+def _get_transcriber(engine: Optional[str], model: Optional[str]) -> engines.TranscriptionEngine:
+    """Get the engine for a call; ``model`` replaces the configured model of API engines."""
+    transcriber = engines.get_engine(engine)
+    if model and transcriber.remote and model != transcriber.model:
+        transcriber = engines.get_engine(transcriber.name, model=model)
+    return transcriber
+
+
+def _cache_key(audio_file_path: str, mode: str, **params: Any) -> str:
+    """Build the cache key for an audio file's content and request parameters."""
+    return cache.make_key(cache.hash_file(audio_file_path), mode, params)
+
+
+def _load_cached(cache_key: str, transcript_path: Optional[str] = None,
+                 source_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Return a cached transcription result, re-saving its transcript if the file was removed.
+    
+    Args:
+        cache_key: Key built by ``_cache_key``
+        transcript_path: Where the caller wants the transcript; written if missing
+        source_path: The audio file, recorded as the source of a re-saved transcript
+        
+    Returns:
+        Optional[Dict[str, Any]]: The cached result or None on a miss
+    """
+    start_time = time.perf_counter()
+    result = _cache.get(cache_key)
+    if result is None:
+        return None
+    
+    if transcript_path and not os.path.exists(transcript_path):
+        result["transcript_path"] = save_transcript(result["text"], transcript_path, source_path)
+    elif transcript_path:
+        result["transcript_path"] = transcript_path
+    elif not os.path.exists(result.get("transcript_path", "")):
+        result["transcript_path"] = save_transcript(result["text"], source_path=source_path)
+        _cache.put(cache_key, result)
+    
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    print(f"Loaded cached transcription in {elapsed_ms:.1f} ms ({result['transcript_path']}).")
+    return result
+
+
+def cache_stats() -> Dict[str, Any]:
+    """
+    Report transcription cache statistics.
+    
+    Returns:
+        Dict[str, Any]: Hit/miss counts, hit ratio, evictions and disk usage
+    """
+    return _cache.stats()
+
+
+def save_transcript(text: str, filepath: Optional[str] = None,
+                    source_path: Optional[str] = None) -> str:
+    """
+    Save transcript text to a file in the transcripts directory.
+    
+    Args:
+        text: The transcript text
+        filepath: Destination path (defaults to a timestamped file)
+        source_path: The audio file the transcript was made from, recorded in the catalog
         
-        # Save the transcript to a file
+    Returns:
+        str: Path to the saved transcript
+    """
+    if filepath is None:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"transcript_{timestamp}.txt"
         filepath = os.path.join(TRANSCRIPTS_DIR, filename)
+    
+    with open(filepath, "w", encoding="utf-8") as file:
+        file.write(text)
+    catalog.register(filepath, "transcript", derived_from=source_path)
+    search.index_file(filepath, "transcript", text)
         
-        with open(filepath, "w", encoding="utf-8") as file:
-            file.write(result["text"])
-            
-        print(f"Transcript saved to {filepath}")
+    print(f"Transcript saved to {filepath}")
+    return filepath
+
+
+def transcribe_audio_chunked(audio_file_path: str, model: Optional[str] = None,
+                             max_segment_bytes: int = SEGMENT_BYTES,
+                             max_workers: int = MAX_WORKERS,
+                             codec: str = UPLOAD_CODEC,
+                             use_cache: bool = True,
+                             transcript_path: Optional[str] = None,
+                             hedge: Optional[bool] = None,
+                             engine: Optional[str] = None,
+                             trim_silence: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Transcribe a long audio file as silence-aligned segments in parallel.
+    
+    The audio is split at detected silences into segments whose 16-bit WAV
+    encoding stays under ``max_segment_bytes``, and the segments are uploaded
+    concurrently through a pool of ``max_workers`` threads. Only the segments
+    currently in flight are encoded in memory.
+    
+    Args:
+        audio_file_path: Path to the audio file to transcribe
+        model: Model for API engines (None uses the model in ``config.ENGINE_SETTINGS``)
+        max_segment_bytes: Upper bound on the encoded size of each segment
+        max_workers: Maximum number of concurrent transcription requests
+        codec: Upload codec for each segment ("auto", "wav", "flac" or "opus")
+        use_cache: Return a cached result for identical audio content and parameters
+        transcript_path: Where to save the transcript (defaults to a timestamped file)
+        hedge: Send a duplicate request when one is slower than usual (None uses
+            the transcription setting in ``config.HEDGE_SETTINGS``)
+        engine: Transcription engine name from ``engines.ENGINES`` (None uses the
+            engine in ``config.TRANSCRIPTION_SETTINGS``)
+        trim_silence: Compress long silent spans before splitting; segment offsets
+            still refer to the original file
+        
+    Returns:
+        Optional[Dict[str, Any]]: The stitched transcription result, including a
+        ``segments`` list with each segment's start/end offsets in seconds, or
+        None if transcription failed
+    """
+    if not os.path.exists(audio_file_path):
+        print(f"Error: File {audio_file_path} not found.")
+        return None
+        
+    try:
+        transcriber = _get_transcriber(engine, model)
+        cache_key = None
+        if use_cache:
+            cache_key = _cache_key(audio_file_path, "chunked",
+                                   max_segment_bytes=max_segment_bytes, codec=codec,
+                                   trim_silence=trim_silence, **transcriber.cache_params())
+            cached = _load_cached(cache_key, transcript_path, audio_file_path)
+            if cached is not None:
+                return cached
+        
+        samples, rate, extras = _load_samples(audio_file_path, trim_silence)
+        max_samples = (max_segment_bytes - 44) // 2
+        bounds = audio.split_at_silence(samples, rate, max_samples,
+                                        min_segment_samples=MIN_SEGMENT_SECONDS * rate)
+        stem = Path(audio_file_path).stem
+        
+        print(f"Transcribing {os.path.basename(audio_file_path)} as {len(bounds)} segments "
+              f"with up to {max_workers} concurrent requests...")
+        start_time = time.time()
+        
+        def transcribe_segment(index: int, start: int, end: int) -> Tuple[str, Dict[str, Any]]:
+            if transcriber.takes_samples:
+                return transcriber.transcribe(samples[start:end]), {}
+            upload, stats = encode_upload(samples[start:end], rate, f"{stem}_{index:03d}", codec=codec)
+            return transcriber.transcribe(upload, hedge=hedge), stats
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(transcribe_segment, i, start, end)
+                       for i, (start, end) in enumerate(bounds)]
+            outcomes = [future.result() for future in futures]
+        
+        elapsed_time = time.time() - start_time
+        print(f"Transcription completed in {elapsed_time:.2f} seconds.")
+        
+        offset_map = extras.get("offset_map")
+        if offset_map:
+            # Report segment offsets in the original (untrimmed) audio
+            starts = audio.offset_starts(offset_map)
+            bounds = [(audio.map_to_original(offset_map, start, starts),
+                       audio.map_to_original(offset_map, end - 1, starts) + 1)
+                      for start, end in bounds]
+        
+        segments = [
+            {"index": i, "start": start / rate, "end": end / rate, "text": text.strip(), "upload": stats}
+            for i, ((start, end), (text, stats)) in enumerate(zip(bounds, outcomes))
+        ]
+        result = {
+            "text": " ".join(segment["text"] for segment in segments if segment["text"]),
+            "model_used": transcriber.model,
+            "segments": segments
+        }
+        result.update(extras)
+        
+        result["transcript_path"] = save_transcript(result["text"], transcript_path,
+                                                    source_path=audio_file_path)
+        if cache_key:
+            _cache.put(cache_key, result)
         
         return result
         
@@ -65,6 +538,88 @@ def transcribe_audio(audio_file_path: str, model: str = "whisper-1") -> Optional
         print(f"Error transcribing audio: {e}")
         return None
 
+def batch_transcript_path(audio_file_path: str) -> str:
+    """
+    Return the deterministic transcript path used by batch transcription.
+    
+    The name carries the extension and a short hash of the absolute path, so
+    ``a/talk.wav``, ``b/talk.wav`` and ``a/talk.mp3`` never share a transcript.
+    
+    Args:
+        audio_file_path: Path to the audio file
+        
+    Returns:
+        str: ``transcript_<stem>_<ext>_<path hash>.txt`` in the transcripts directory
+    """
+    path = Path(audio_file_path)
+    source = os.path.normcase(os.path.abspath(audio_file_path))
+    digest = hashlib.sha256(source.encode("utf-8")).hexdigest()[:PATH_HASH_CHARS]
+    extension = path.suffix.lstrip(".").lower()
+    return os.path.join(TRANSCRIPTS_DIR, f"transcript_{path.stem}_{extension}_{digest}.txt")
+
+
+def transcribe_directory(directory: str, max_workers: int = MAX_WORKERS,
+                         skip_existing: bool = True, **kwargs: Any) -> Dict[str, Any]:
+    """
+    Transcribe every supported audio file in a directory through a worker pool.
+    
+    Each file's transcript is written to ``batch_transcript_path``, so files
+    that already have one are skipped on re-runs.
+    
+    Args:
+        directory: Directory to scan (not recursive)
+        max_workers: Maximum number of files transcribed concurrently
+        skip_existing: Skip files whose batch transcript already exists
+        **kwargs: Extra options passed to ``transcribe_audio``
+        
+    Returns:
+        Dict[str, Any]: Throughput summary with counts of found, transcribed,
+        skipped and failed files, elapsed and audio seconds, files/minute and
+        audio-hours/hour
+    """
+    files = sorted(
+        os.path.join(directory, f) for f in os.listdir(directory)
+        if f.lower().endswith(AUDIO_EXTENSIONS)
+    )
+    pending = [f for f in files if not (skip_existing and os.path.exists(batch_transcript_path(f)))]
+    print(f"Found {len(files)} audio files, {len(files) - len(pending)} already transcribed.")
+    
+    transcribed = 0
+    audio_seconds = 0.0
+    failed = []
+    start_time = time.time()
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(transcribe_audio, path, transcript_path=batch_transcript_path(path), **kwargs): path
+            for path in pending
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Error transcribing {os.path.basename(path)}: {e}")
+                result = None
+            if result is None:
+                failed.append(path)
+                continue
+            transcribed += 1
+            audio_seconds += audio.get_duration(path) or 0.0
+    
+    elapsed = time.time() - start_time
+    return {
+        "files": len(files),
+        "transcribed": transcribed,
+        "skipped": len(files) - len(pending),
+        "failed": failed,
+        "elapsed_seconds": elapsed,
+        "audio_seconds": audio_seconds,
+        "files_per_minute": transcribed / elapsed * 60 if elapsed else 0.0,
+        "audio_hours_per_hour": audio_seconds / elapsed if elapsed else 0.0
+    }
+
+
 def list_transcripts() -> List[str]:
     """
     List available transcript files.
@@ -72,22 +627,34 @@ def list_transcripts() -> List[str]:
     Returns:
         List[str]: List of transcript filenames with numbering
     """
-    # Get all files in transcripts directory
-    transcript_files = [f for f in os.listdir(TRANSCRIPTS_DIR) if f.endswith('.txt')]
-    
-    # Sort files by creation time (newest first)
-    transcript_files.sort(key=lambda x: os.path.getctime(os.path.join(TRANSCRIPTS_DIR, x)), reverse=True)
+    # The catalog returns transcripts sorted by creation time (newest first)
+    transcript_files = catalog.list_artifacts("transcript")
     
     # Create numbered list
     numbered_files = []
-    for i, file in enumerate(transcript_files, 1):
-        file_path = os.path.join(TRANSCRIPTS_DIR, file)
-        size_kb = os.path.getsize(file_path) / 1024
-        timestamp = datetime.fromtimestamp(os.path.getctime(file_path)).strftime("%Y-%m-%d %H:%M:%S")
-        numbered_files.append(f"{i}. {file} ({size_kb:.1f} KB, {timestamp})")
+    for i, entry in enumerate(transcript_files, 1):
+        size_kb = entry["size"] / 1024
+        timestamp = datetime.fromtimestamp(entry["ctime"]).strftime("%Y-%m-%d %H:%M:%S")
+        numbered_files.append(f"{i}. {entry['name']} ({size_kb:.1f} KB, {timestamp})")
     
     return numbered_files
 
+def transcripts_between(start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[str]:
+    """
+    Get the transcripts created in a date range.
+    
+    Args:
+        start: Earliest creation time (None for no lower bound)
+        end: Latest creation time, exclusive (None for no upper bound)
+        
+    Returns:
+        List[str]: Paths to the transcripts, oldest first
+    """
+    low = start.timestamp() if start is not None else float("-inf")
+    high = end.timestamp() if end is not None else float("inf")
+    entries = [entry for entry in catalog.list_artifacts("transcript") if low <= entry["ctime"] < high]
+    return [entry["path"] for entry in sorted(entries, key=lambda entry: entry["ctime"])]
+
 def get_transcript_content(index: int) -> Optional[str]:
     """
     Get the content of a transcript file by index.
@@ -99,20 +666,9 @@ def get_transcript_content(index: int) -> Optional[str]:
         Optional[str]: Content of the transcript file or None if not found
     """
     try:
-        # Get all transcript files
-        transcript_files = [f for f in os.listdir(TRANSCRIPTS_DIR) if f.endswith('.txt')]
-        
-        # Sort files by creation time (newest first)
-        transcript_files.sort(key=lambda x: os.path.getctime(os.path.join(TRANSCRIPTS_DIR, x)), reverse=True)
-        
-        # Check if index is valid
-        if index < 1 or index > len(transcript_files):
-            print(f"Invalid index: {index}. Valid range is 1-{len(transcript_files)}.")
+        file_path = get_transcript_file_path(index)
+        if file_path is None:
             return None
-            
-        # Get the file at the specified index
-        file = transcript_files[index - 1]
-        file_path = os.path.join(TRANSCRIPTS_DIR, file)
         
         # Read the file content
         with open(file_path, "r", encoding="utf-8") as f:
@@ -135,23 +691,15 @@ def get_transcript_file_path(index: int) -> Optional[str]:
         Optional[str]: Path to the transcript file or None if not found
     """
     try:
-        # Get all transcript files
-        transcript_files = [f for f in os.listdir(TRANSCRIPTS_DIR) if f.endswith('.txt')]
-        
-        # Sort files by creation time (newest first)
-        transcript_files.sort(key=lambda x: os.path.getctime(os.path.join(TRANSCRIPTS_DIR, x)), reverse=True)
+        entry = catalog.get_artifact("transcript", index)
         
         # Check if index is valid
-        if index < 1 or index > len(transcript_files):
-            print(f"Invalid index: {index}. Valid range is 1-{len(transcript_files)}.")
+        if entry is None:
+            print(f"Invalid index: {index}. Valid range is 1-{catalog.count_artifacts('transcript')}.")
             return None
-            
-        # Get the file at the specified index
-        file = transcript_files[index - 1]
-        file_path = os.path.join(TRANSCRIPTS_DIR, file)
         
-        return file_path
+        return entry["path"]
         
     except Exception as e:
         print(f"Error getting transcript file path: {e}")
-        return None
\ No newline at end of file
+        return None